@@ -0,0 +1,47 @@
+"""Store jti hash instead of token
+
+Revision ID: 041a7a472523
+Revises: c545aed968bd
+Create Date: 2026-10-16 10:12:41.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '041a7a472523'
+down_revision: Union[str, Sequence[str], None] = 'c545aed968bd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TOKEN_TABLES = ('active_tokens', 'blacklisted_token')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TOKEN_TABLES:
+        op.add_column(table, sa.Column('jti_hash', sa.LargeBinary(length=16), nullable=True))
+        # Tokens issued before the jti claim are identified by a digest of the whole
+        # token (see app.authentication.security.get_token_id), so they stay valid.
+        op.execute(
+            f"UPDATE {table} SET jti_hash = substring(sha256(convert_to(token, 'UTF8')) from 1 for 16)"
+        )
+        op.alter_column(table, 'jti_hash', nullable=False)
+        op.drop_index(op.f(f'ix_{table}_token'), table_name=table)
+        op.drop_column(table, 'token')
+        op.create_index(op.f(f'ix_{table}_jti_hash'), table, ['jti_hash'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The original token strings cannot be recovered, so every session is dropped.
+    for table in TOKEN_TABLES:
+        op.execute(f"DELETE FROM {table}")
+        op.drop_index(op.f(f'ix_{table}_jti_hash'), table_name=table)
+        op.drop_column(table, 'jti_hash')
+        op.add_column(table, sa.Column('token', sa.String(), nullable=False))
+        op.create_index(op.f(f'ix_{table}_token'), table, ['token'], unique=True)
@@ -0,0 +1,41 @@
+"""Index token expires_at
+
+Revision ID: 0bcb3301aee1
+Revises: 7f45df384ffd
+Create Date: 2026-10-17 09:26:51.117390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0bcb3301aee1'
+down_revision: Union[str, Sequence[str], None] = '7f45df384ffd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TOKEN_TABLES = ('active_tokens', 'blacklisted_token')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built CONCURRENTLY so large, busy token tables are not write-locked
+    with op.get_context().autocommit_block():
+        for table in TOKEN_TABLES:
+            op.create_index(
+                op.f(f'ix_{table}_expires_at'), table, ['expires_at'],
+                unique=False, postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for table in TOKEN_TABLES:
+            op.drop_index(
+                op.f(f'ix_{table}_expires_at'), table_name=table, postgresql_concurrently=True,
+            )
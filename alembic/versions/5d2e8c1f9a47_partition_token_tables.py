@@ -0,0 +1,35 @@
+"""Partition token tables by expires_at
+
+Revision ID: 5d2e8c1f9a47
+Revises: 0bcb3301aee1
+Create Date: 2026-10-17 10:12:40.318227
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.authentication.partitions import convert_token_tables, revert_token_tables
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2e8c1f9a47'
+down_revision: Union[str, Sequence[str], None] = '0bcb3301aee1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Optional: only applied when TOKEN_PARTITION_INTERVAL is set. Enable it later with
+    # `python -m app.authentication.partitions convert` instead of re-running this revision.
+    if settings.TOKEN_PARTITION_INTERVAL is None:
+        return
+    convert_token_tables(op.get_bind(), settings.TOKEN_PARTITION_INTERVAL)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    revert_token_tables(op.get_bind())
@@ -0,0 +1,207 @@
+# app/authentication/bloom.py
+
+from app.monitoring.metrics import register_metrics
+from app.database.connection import AsyncSessionLocal, event_bus
+from typing import Any, Callable, Dict, List, Optional
+from app.authentication.models import BlacklistedToken
+from app.core.config import settings
+from app.helpers.time import utcnow
+from sqlalchemy import select
+import asyncio
+import math
+import time
+
+
+# ============================================================
+# ✅ Bloom Filter
+# ============================================================
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over token ids (see security.hash_jti).
+
+    Token ids are already uniform hash digests, so the k bit positions come from
+    double hashing over their two 64-bit halves instead of hashing them again.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float):
+        self.capacity = max(capacity, 1)
+        self.fp_rate = fp_rate
+        self.num_bits = max(8, math.ceil(-self.capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, token_id: bytes):
+        h1 = int.from_bytes(token_id[:8], "little")
+        h2 = int.from_bytes(token_id[8:16], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, token_id: bytes) -> None:
+        for position in self._positions(token_id):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, token_id: bytes) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(token_id))
+
+    def estimated_fp_rate(self) -> float:
+        """False-positive rate at the current fill, (1 - e^(-kn/m))^k."""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    def memory_bytes(self) -> int:
+        return len(self._bits)
+
+
+# ============================================================
+# ✅ Blacklist Filter (per worker)
+# ============================================================
+class BlacklistFilter:
+    """
+    Per-worker Bloom filter over the ids in blacklisted_token, so the common case
+    (a token that is NOT blacklisted) skips the blacklist lookup entirely.
+
+    Rebuilt from the unexpired rows whenever the event bus (re)connects, every
+    `rebuild_interval` seconds (dropping ids whose expires_at passed) and as soon
+    as it holds more ids than it was sized for. Local revocations and the
+    revocation bus add ids as they happen; ids added while a rebuild runs are
+    carried over to the new filter.
+
+    A negative answer is only trusted while the filter is built and the event bus
+    is connected (`is_synced`), since revocations by other workers arrive through
+    it. Otherwise every token is reported as a possible hit and checked in the DB.
+    """
+
+    def __init__(self, fp_rate: float, rebuild_interval: float, headroom: float = 2.0, min_capacity: int = 10000,
+                 is_synced: Callable[[], bool] = lambda: True, enabled: bool = True):
+        self.fp_rate = fp_rate
+        self.rebuild_interval = rebuild_interval
+        self.headroom = headroom
+        self.min_capacity = min_capacity
+        self.enabled = enabled
+        self._is_synced = is_synced
+        self._filter: Optional[BloomFilter] = None
+        self._pending: Optional[List[bytes]] = None
+        self._generation = 0  # Bumped by invalidate(), so a rebuild that started before is not installed
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"checks": 0, "skipped_db": 0, "possible_hits": 0, "rebuilds": 0,
+                       "last_rebuild_seconds": None, "last_rebuild_at": None, "last_error": None}
+
+    # ---------- lookups ----------
+    def might_contain(self, token_id: bytes) -> bool:
+        """False only when the token is certainly not blacklisted."""
+        if not self.enabled:
+            return True
+        self._stats["checks"] += 1
+        if self._filter is None or not self._is_synced() or token_id in self._filter:
+            self._stats["possible_hits"] += 1
+            return True
+        self._stats["skipped_db"] += 1
+        return False
+
+    def add(self, token_id: bytes) -> None:
+        """Record a newly blacklisted token id."""
+        if not self.enabled:
+            return
+        if self._filter is not None:
+            self._filter.add(token_id)
+            if self._filter.count > self._filter.capacity:
+                self._wake.set()  # Past its sizing the FP rate climbs, rebuild bigger
+        if self._pending is not None:
+            self._pending.append(token_id)
+
+    def invalidate(self) -> None:
+        """Stop trusting the filter and rebuild it (e.g. after revocation events may have been missed)."""
+        self._filter = None
+        self._generation += 1
+        self._wake.set()
+
+    # ---------- rebuilds ----------
+    async def rebuild(self) -> int:
+        """Build a fresh filter from the unexpired blacklisted ids. Returns how many it holds."""
+        started = time.perf_counter()
+        generation = self._generation
+        self._pending = []
+        try:
+            ids = await self._load_ids()
+            fresh = BloomFilter(max(self.min_capacity, int(len(ids) * self.headroom)), self.fp_rate)
+            for token_id in ids:
+                fresh.add(token_id)
+            for token_id in self._pending:
+                fresh.add(token_id)
+            if generation == self._generation:
+                self._filter = fresh
+        finally:
+            self._pending = None
+        self._stats["rebuilds"] += 1
+        self._stats["last_rebuild_seconds"] = round(time.perf_counter() - started, 3)
+        self._stats["last_rebuild_at"] = utcnow().isoformat()
+        return fresh.count
+
+    @staticmethod
+    async def _load_ids() -> List[bytes]:
+        stmt = (
+            select(BlacklistedToken.jti_hash)
+            .where(BlacklistedToken.expires_at > utcnow())
+            .execution_options(yield_per=10000)
+        )
+        async with AsyncSessionLocal() as db:
+            return [token_id async for token_id in await db.stream_scalars(stmt)]
+
+    async def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        # The first build is requested by invalidate() when the event bus connects
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.rebuild_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                count = await self.rebuild()
+                print(f"🧮 Blacklist filter rebuilt: {count} ids")
+            except Exception as e:
+                self._stats["last_error"] = str(e)
+                print(f"❌ Blacklist filter rebuild failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        current = self._filter
+        stats: Dict[str, Any] = {"enabled": self.enabled, "ready": current is not None and self._is_synced(), **self._stats}
+        if current is not None:
+            stats.update({
+                "ids": current.count,
+                "capacity": current.capacity,
+                "hash_functions": current.num_hashes,
+                "memory_bytes": current.memory_bytes(),
+                "target_fp_rate": current.fp_rate,
+                "estimated_fp_rate": round(current.estimated_fp_rate(), 6),
+            })
+        return stats
+
+
+# Per-process instance; negatives are only trusted with the revocation bus connected
+blacklist_filter = BlacklistFilter(
+    fp_rate=settings.BLACKLIST_FILTER_FP_RATE,
+    rebuild_interval=settings.BLACKLIST_FILTER_REBUILD_INTERVAL,
+    is_synced=lambda: event_bus.connected,
+    enabled=(
+        settings.BLACKLIST_FILTER_ENABLED
+        and settings.REVOCATION_BUS_ENABLED
+        and settings.TOKEN_STORE_BACKEND == "sql"
+    ),
+)
+register_metrics("blacklist_filter", blacklist_filter.stats)
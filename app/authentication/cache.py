@@ -0,0 +1,311 @@
+# app/authentication/cache.py
+
+from app.database.connection import publish_event
+from app.monitoring.metrics import register_metrics
+from app.authentication.bloom import blacklist_filter
+from app.users.cache import profile_cache
+from sqlalchemy.ext.asyncio import AsyncSession
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+from app.core.config import settings
+import hashlib
+import time
+
+
+# ============================================================
+# ✅ Revocation Cache
+# ============================================================
+class RevocationCache:
+    """
+    Bounded, per-process cache of token revocation state.
+
+    - Tokens confirmed active in the database are trusted for at most `ttl`
+      seconds (never past their own expiry), so a revocation made elsewhere
+      is picked up within `ttl` seconds.
+    - Tokens revoked through this process are rejected locally until they expire.
+    - User rows are cached next to the tokens so a cache hit needs no DB round-trip.
+    """
+
+    def __init__(self, ttl: int, max_size: int, enabled: bool = True):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.enabled = enabled
+        self._active: "OrderedDict[bytes, Tuple[int, float]]" = OrderedDict()
+        self._revoked: "OrderedDict[bytes, float]" = OrderedDict()
+        self._users: "OrderedDict[int, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._user_tokens: Dict[int, Set[bytes]] = {}
+        self._invalidated_at: Dict[int, float] = {}
+        self._cleared_at = float("-inf")
+
+    @staticmethod
+    def now() -> float:
+        """Monotonic clock used for all cache deadlines."""
+        return time.monotonic()
+
+    # ---------- active tokens ----------
+    def get_active(self, token_id: bytes) -> Optional[int]:
+        """Return the user id for a token known to be active, or None."""
+        if not self.enabled:
+            return None
+        entry = self._active.get(token_id)
+        if entry is None:
+            return None
+        user_id, deadline = entry
+        if deadline <= self.now():
+            self._discard_active(token_id)
+            return None
+        self._active.move_to_end(token_id)
+        return user_id
+
+    def mark_active(self, token_id: bytes, user_id: int, exp: float, checked_at: float) -> None:
+        """
+        Remember a token the database reported as active.
+
+        Args:
+            exp: Token `exp` claim (unix timestamp)
+            checked_at: `now()` taken before the database check started
+        """
+        if not self.enabled or self.is_revoked(token_id):
+            return
+        if self._is_stale(user_id, checked_at):
+            return  # The user was revoked while we were checking
+        deadline = min(checked_at + self.ttl, self.now() + (exp - time.time()))
+        if deadline <= self.now():
+            return
+        self._active[token_id] = (user_id, deadline)
+        self._active.move_to_end(token_id)
+        self._user_tokens.setdefault(user_id, set()).add(token_id)
+        while len(self._active) > self.max_size:
+            oldest, _ = next(iter(self._active.items()))
+            self._discard_active(oldest)
+
+    # ---------- revoked tokens ----------
+    def is_revoked(self, token_id: bytes) -> bool:
+        """Return True if the token was revoked through this process."""
+        deadline = self._revoked.get(token_id)
+        if deadline is None:
+            return False
+        if deadline <= self.now():
+            del self._revoked[token_id]
+            return False
+        return True
+
+    def revoke(self, token_id: bytes, exp: float) -> None:
+        """Reject a single token locally until its `exp` (unix timestamp)."""
+        self._discard_active(token_id)
+        deadline = self.now() + (exp - time.time())
+        if deadline <= self.now():
+            return
+        self._revoked[token_id] = deadline
+        self._revoked.move_to_end(token_id)
+        while len(self._revoked) > self.max_size:
+            # Evicted entries fall back to the token store's blacklist check, which is authoritative
+            self._revoked.popitem(last=False)
+
+    def revoke_user(self, user_id: int) -> None:
+        """Forget every cached token and the cached row for a user."""
+        for token_id in list(self._user_tokens.get(user_id, ())):
+            self._discard_active(token_id)
+        self.invalidate_user(user_id)
+
+    # ---------- users ----------
+    def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Return a cached user row (column values) or None."""
+        if not self.enabled:
+            return None
+        entry = self._users.get(user_id)
+        if entry is None:
+            return None
+        snapshot, deadline = entry
+        if deadline <= self.now():
+            del self._users[user_id]
+            return None
+        self._users.move_to_end(user_id)
+        return snapshot
+
+    def set_user(self, user_id: int, snapshot: Dict[str, Any], checked_at: float) -> None:
+        """Cache a user row loaded from the database at `checked_at`."""
+        if not self.enabled:
+            return
+        if self._is_stale(user_id, checked_at):
+            return
+        self._users[user_id] = (snapshot, checked_at + self.ttl)
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_size:
+            self._users.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop the cached row for a user after it changed."""
+        self._users.pop(user_id, None)
+        self._invalidated_at[user_id] = self.now()
+        if len(self._invalidated_at) > self.max_size:
+            cutoff = self.now() - self.ttl
+            self._invalidated_at = {
+                uid: stamp for uid, stamp in self._invalidated_at.items() if stamp > cutoff
+            }
+
+    # ---------- housekeeping ----------
+    def clear(self) -> None:
+        """Drop everything (e.g. when revocation events may have been missed)."""
+        self._active.clear()
+        self._users.clear()
+        self._user_tokens.clear()
+        self._invalidated_at.clear()
+        self._cleared_at = self.now()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "active_tokens": len(self._active),
+            "revoked_tokens": len(self._revoked),
+            "users": len(self._users),
+        }
+
+    def _is_stale(self, user_id: int, checked_at: float) -> bool:
+        stamp = max(self._cleared_at, self._invalidated_at.get(user_id, float("-inf")))
+        return stamp >= checked_at
+
+    def _discard_active(self, token_id: bytes) -> None:
+        entry = self._active.pop(token_id, None)
+        if entry is None:
+            return
+        tokens = self._user_tokens.get(entry[0])
+        if tokens is not None:
+            tokens.discard(token_id)
+            if not tokens:
+                del self._user_tokens[entry[0]]
+
+
+# Per-process instance shared by the dependencies and the services
+revocation_cache = RevocationCache(
+    ttl=settings.REVOCATION_CACHE_TTL,
+    max_size=settings.REVOCATION_CACHE_MAX_SIZE,
+    enabled=settings.REVOCATION_CACHE_ENABLED,
+)
+register_metrics("revocation_cache", revocation_cache.stats)
+
+
+# ============================================================
+# ✅ Verified Token Cache
+# ============================================================
+class VerifiedTokenCache:
+    """
+    Bounded, per-process LRU of tokens whose signature already checked out.
+
+    Entries are keyed by a digest of the whole token (signature included) and
+    hold the decoded claims until the token's own `exp`, so a client sending the
+    same token again skips signature verification and JSON decoding. Revocation,
+    active state and the user are still checked on every request.
+
+    Failed decodes are never cached, nor are tokens without `exp` or longer than
+    MAX_TOKEN_LENGTH, so memory stays within `max_size` small entries.
+
+    Entries are not tied to the signing key: the key ring clears this cache when
+    a reload drops a key (see KeyRing.on_keys_removed). Changing SECRET_KEY
+    takes a restart, which empties it too.
+    """
+
+    MAX_TOKEN_LENGTH = 2048
+
+    def __init__(self, max_size: int, enabled: bool = True):
+        self.max_size = max_size
+        self.enabled = enabled
+        self._entries: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+        self._hit_seconds = 0.0
+        self._verified = 0  # Misses that decoded a valid token
+        self._verify_seconds = 0.0
+
+    def decode(self, token: str, decode: Callable[[str], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """The claims of `token` from the cache, or from `decode(token)` (cached when valid)."""
+        if not self.enabled or len(token) > self.MAX_TOKEN_LENGTH:
+            return decode(token)
+        started = time.perf_counter()
+        key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        entry = self._entries.get(key)
+        if entry is not None:
+            claims, exp = entry
+            if exp >= time.time():
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                self._hit_seconds += time.perf_counter() - started
+                return dict(claims)  # Callers get their own copy
+            del self._entries[key]
+            self._stats["expired"] += 1
+
+        self._stats["misses"] += 1
+        claims = decode(token)
+        if claims is None:
+            return None
+        self._verified += 1
+        self._verify_seconds += time.perf_counter() - started
+        exp = claims.get("exp")
+        if isinstance(exp, int) and not isinstance(exp, bool):
+            self._entries[key] = (dict(claims), exp)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+        return claims
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        hits, lookups = self._stats["hits"], self._stats["hits"] + self._stats["misses"]
+        verify_cost = self._verify_seconds / self._verified if self._verified else 0.0
+        hit_cost = self._hit_seconds / hits if hits else 0.0
+        cpu_saved = hits * max(verify_cost - hit_cost, 0.0)  # Estimated from the mean cost of each path
+        return {
+            "entries": len(self._entries),
+            **self._stats,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "verify_us": round(verify_cost * 1e6, 2),
+            "hit_us": round(hit_cost * 1e6, 2),
+            "cpu_saved_seconds": round(cpu_saved, 3),
+            "cpu_saved_per_request_us": round(cpu_saved / lookups * 1e6, 2) if lookups else 0.0,
+        }
+
+
+# Per-process instance used by the auth dependencies
+verified_token_cache = VerifiedTokenCache(
+    max_size=settings.VERIFIED_TOKEN_CACHE_MAX_SIZE,
+    enabled=settings.VERIFIED_TOKEN_CACHE_ENABLED,
+)
+register_metrics("verified_token_cache", verified_token_cache.stats)
+
+
+# ============================================================
+# ✅ Revocation Events (shared by all workers)
+# ============================================================
+REVOCATION_CHANNEL = "token_revocation"
+
+
+async def publish_token_revoked(db: AsyncSession, token_id: bytes, exp: float) -> None:
+    """Tell every worker to reject a token. Delivered when `db` commits."""
+    if settings.REVOCATION_BUS_ENABLED:
+        await publish_event(db, REVOCATION_CHANNEL, {"type": "token", "id": token_id.hex(), "exp": exp})
+
+
+async def publish_user_revoked(db: AsyncSession, user_id: int) -> None:
+    """Tell every worker to drop all cached tokens of a user. Delivered when `db` commits."""
+    if settings.REVOCATION_BUS_ENABLED:
+        await publish_event(db, REVOCATION_CHANNEL, {"type": "user", "id": user_id})
+
+
+async def publish_user_changed(db: AsyncSession, user_id: int) -> None:
+    """Tell every worker its cached row for a user is stale. Delivered when `db` commits."""
+    if settings.REVOCATION_BUS_ENABLED:
+        await publish_event(db, REVOCATION_CHANNEL, {"type": "user_changed", "id": user_id})
+
+
+def handle_revocation_event(event: Dict[str, Any]) -> None:
+    """Apply a revocation event received from the event bus to the local cache."""
+    event_type = event.get("type")
+    if event_type == "token":
+        revocation_cache.revoke(bytes.fromhex(event["id"]), event["exp"])
+        blacklist_filter.add(bytes.fromhex(event["id"]))
+    elif event_type == "user":
+        revocation_cache.revoke_user(event["id"])
+        profile_cache.discard_local(event["id"])
+    elif event_type == "user_changed":
+        revocation_cache.invalidate_user(event["id"])
+        profile_cache.discard_local(event["id"])
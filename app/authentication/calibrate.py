@@ -0,0 +1,80 @@
+# app/authentication/calibrate.py
+"""
+Calibrate argon2 parameters for this host.
+
+Measures hashing cost and prints ARGON2_* settings that stay under a target
+latency per hash and a memory budget shared by the password hash pool:
+
+    python -m app.authentication.calibrate --target-ms 250 --memory-budget-mib 512
+
+Copy the printed values into .env. Existing hashes are upgraded lazily on the
+next successful login of each user (see services.authenticate_user).
+"""
+
+from passlib.hash import argon2
+from app.core.config import settings
+import statistics
+import argparse
+import time
+import os
+
+MIN_MEMORY_KIB = 8 * 1024  # Never go below 8 MiB per hash
+MAX_TIME_COST = 20
+
+
+# ============================================================
+# ✅ Measure Hash Cost
+# ============================================================
+def measure_hash_ms(time_cost: int, memory_kib: int, parallelism: int, samples: int = 5) -> float:
+    """Median wall time of one argon2 hash with the given parameters."""
+    hasher = argon2.using(rounds=time_cost, memory_cost=memory_kib, parallelism=parallelism)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        hasher.hash("calibration-password")
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+# ============================================================
+# ✅ Calibrate
+# ============================================================
+def calibrate(target_ms: float, memory_budget_mib: int, workers: int, parallelism: int) -> dict:
+    """
+    Pick the strongest parameters within budget:
+    as much memory per hash as the budget allows for `workers` concurrent hashes,
+    then the highest time_cost whose hash still finishes within `target_ms`.
+    """
+    memory_kib = max(MIN_MEMORY_KIB, memory_budget_mib * 1024 // workers)
+
+    # Shrink memory until a single pass fits the latency target
+    while memory_kib > MIN_MEMORY_KIB and measure_hash_ms(1, memory_kib, parallelism) > target_ms:
+        memory_kib = max(MIN_MEMORY_KIB, memory_kib // 2)
+
+    time_cost, elapsed = 1, measure_hash_ms(1, memory_kib, parallelism)
+    while time_cost < MAX_TIME_COST:
+        candidate = measure_hash_ms(time_cost + 1, memory_kib, parallelism)
+        if candidate > target_ms:
+            break
+        time_cost, elapsed = time_cost + 1, candidate
+
+    return {
+        "ARGON2_TIME_COST": time_cost,
+        "ARGON2_MEMORY_COST": memory_kib,
+        "ARGON2_PARALLELISM": parallelism,
+        "measured_ms": round(elapsed, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target-ms", type=float, default=250, help="Target latency of one hash")
+    parser.add_argument("--memory-budget-mib", type=int, default=512, help="Memory for all concurrent hashes")
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS, help="Concurrent hashes (pool size)")
+    parser.add_argument("--parallelism", type=int, default=min(4, os.cpu_count() or 1), help="argon2 lanes per hash")
+    args = parser.parse_args()
+
+    result = calibrate(args.target_ms, args.memory_budget_mib, args.workers, args.parallelism)
+    print(f"# Calibrated on this host: {result.pop('measured_ms')} ms per hash")
+    for key, value in result.items():
+        print(f"{key}={value}")
@@ -1,29 +1,119 @@
 # app/authentication/dependencies.py
 
-from app.authentication.models import BlacklistedToken, ActiveToken
-from app.authentication.security import decode_token
+from app.authentication.token_store import TokenUserLookup, token_store
+from app.authentication.security import decode_token_cached, get_token_id
+from app.authentication.cache import revocation_cache
 from app.authentication.helpers import ClientType, get_client_type
 from fastapi import Depends, HTTPException, status, Request, Header
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database.connection import get_db
+from app.database.connection import get_db, get_read_db, is_replica_session, ReadOnlySessionLocal
 from app.users.models import User
-from sqlalchemy import select, and_
-from typing import Optional
+from sqlalchemy import select, inspect
+from sqlalchemy.orm import make_transient_to_detached
+from typing import Any, Dict, Optional
 from app.core.config import settings
-from app.helpers.time import utcnow
 
 # Security scheme for mobile Bearer tokens
 security = HTTPBearer(auto_error=False)
 
 
+# ===========================================
+# ✅ User Snapshot Helpers (revocation cache)
+# ===========================================
+def _snapshot_user(user: User) -> Dict[str, Any]:
+    """Copy the column values of a loaded user for the revocation cache."""
+    return {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+
+
+async def _user_from_snapshot(snapshot: Dict[str, Any], db: AsyncSession) -> User:
+    """
+    Rebuild a cached user and attach it to the request session without a SELECT,
+    so routes can still modify and commit it.
+    """
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
+
+
+# ===========================================
+# ✅ Load Token User (single round-trip)
+# ===========================================
+async def load_token_user(
+    email: str, token_id: bytes, db: AsyncSession, use_filter: bool = True
+) -> Optional[TokenUserLookup]:
+    """
+    Fetch the user for `email` together with the active/blacklisted state of
+    the token (ONE statement with the SQL token store). Returns None when the user does not exist.
+    """
+    return await token_store.load_token_user(email, token_id, db, use_filter)
+
+
+async def _load_token_user_on_primary(email: str, token_id: bytes, db: AsyncSession) -> Optional[TokenUserLookup]:
+    """
+    Repeat load_token_user on the primary when the replica missed (e.g. a token
+    issued a moment ago that has not replicated yet), attaching the user to `db`.
+    """
+    async with ReadOnlySessionLocal() as primary:
+        lookup = await load_token_user(email, token_id, primary)
+    if lookup is None:
+        return None
+    return lookup._replace(user=await _user_from_snapshot(_snapshot_user(lookup.user), db))
+
+
+# ===========================================
+# ✅ Stateless Access Token User
+# ===========================================
+async def _get_stateless_token_user(payload: Dict[str, Any], token_id: bytes, db: AsyncSession) -> User:
+    """
+    Resolve the user of a stateless access token (STATELESS_ACCESS_TOKENS mode).
+    No active token row is read; the token is rejected once the user's token_epoch
+    moved past it, or once it was logged out (blacklisted). The blacklist check
+    costs no query for tokens the per-worker Bloom filter rules out.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    user_id = payload.get("user_id")
+    email: Optional[str] = payload.get("sub")
+    if user_id is None or email is None:
+        raise credentials_exception
+
+    snapshot = revocation_cache.get_user(user_id)
+    if snapshot is not None:
+        user = await _user_from_snapshot(snapshot, db)
+    else:
+        checked_at = revocation_cache.now()
+        stmt = select(User).where(User.email == email)
+        result = await db.execute(stmt)
+        user = result.scalar_one_or_none()
+        if is_replica_session(db) and (user is None or payload.get("epoch") != user.token_epoch):
+            # The replica may not have caught up with a new user or epoch yet
+            async with ReadOnlySessionLocal() as primary:
+                user = (await primary.execute(stmt)).scalar_one_or_none()
+            if user is not None:
+                user = await _user_from_snapshot(_snapshot_user(user), db)
+        if user is None:
+            raise credentials_exception
+        revocation_cache.set_user(user.id, _snapshot_user(user), checked_at)
+
+    if payload.get("epoch") != user.token_epoch or await token_store.is_blacklisted(db, token_id):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, 
+            detail="Token has been revoked"
+        )
+    return user
+
+
 # ===========================================
 # ✅ Get Current User
 # ===========================================
 async def get_current_user(
     request: Request,
     client_type: ClientType = Depends(get_client_type),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ) -> User:
     """
     Dependency to get the current authenticated user.
@@ -31,6 +121,9 @@ async def get_current_user(
     
     - Web clients: Token from cookie
     - Mobile clients: Token from Authorization: Bearer header
+
+    On GET requests with a replica configured, the token is checked there;
+    misses are confirmed on the primary.
     """
     token = None
     credentials_exception = HTTPException(
@@ -55,7 +148,7 @@ async def get_current_user(
         raise credentials_exception
 
     # Decode token
-    payload = decode_token(token)
+    payload = decode_token_cached(token)
     if payload is None:
         raise credentials_exception
 
@@ -66,44 +159,60 @@ async def get_current_user(
             detail="Invalid token type"
         )
 
-    # Check if token is still active
-    stmt = select(ActiveToken).where(
-        and_(
-            ActiveToken.token == token,
-            ActiveToken.expires_at > utcnow()
-        )
-    )
-    result = await db.execute(stmt)
-    active_token = result.scalar_one_or_none()
-    
-    if not active_token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token is no longer active"
-        )
-
-    # Get user email from token
-    email: Optional[str] = payload.get("sub")
-    if email is None:
-        raise credentials_exception
-
-    # Check if token is blacklisted
-    stmt = select(BlacklistedToken).where(BlacklistedToken.token == token)
-    result = await db.execute(stmt)
-    blacklisted = result.scalar_one_or_none()
-    if blacklisted:
+    # Reject tokens revoked through this worker without touching the DB
+    token_id = get_token_id(token, payload)
+    if revocation_cache.is_revoked(token_id):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, 
             detail="Token has been revoked"
         )
 
-    # Get user from database
-    stmt = select(User).where(User.email == email)
-    result = await db.execute(stmt)
-    user = result.scalar_one_or_none()
+    if settings.STATELESS_ACCESS_TOKENS:
+        # Stateless mode: signature, expiry, the user's revocation epoch and the blacklist
+        user = await _get_stateless_token_user(payload, token_id, db)
+    else:
+        # Hot path: token recently confirmed active and user row cached
+        user = None
+        cached_user_id = revocation_cache.get_active(token_id)
+        if cached_user_id is not None:
+            snapshot = revocation_cache.get_user(cached_user_id)
+            if snapshot is not None:
+                user = await _user_from_snapshot(snapshot, db)
 
     if user is None:
-        raise credentials_exception
+        checked_at = revocation_cache.now()
+
+        # Get user email from token
+        email: Optional[str] = payload.get("sub")
+        if email is None:
+            raise credentials_exception
+
+        # User row plus token state in a single round-trip
+        lookup = await load_token_user(email, token_id, db)
+        if is_replica_session(db) and (lookup is None or not lookup.is_active_token):
+            lookup = await _load_token_user_on_primary(email, token_id, db)
+        if lookup is None:
+            raise credentials_exception
+
+        # Check if token is still active
+        if not lookup.is_active_token:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token is no longer active"
+            )
+
+        # Check if token is blacklisted
+        if lookup.is_blacklisted:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, 
+                detail="Token has been revoked"
+            )
+
+        user = lookup.user
+
+        # Remember the outcome so the next requests skip the DB
+        revocation_cache.mark_active(token_id, user.id, payload["exp"], checked_at)
+        revocation_cache.set_user(user.id, _snapshot_user(user), checked_at)
 
     if not user.is_active:
         raise HTTPException(
@@ -149,6 +258,24 @@ async def get_current_verified_user(
 
 
 
+# ===========================================
+# ✅ Get Current Admin User
+# ===========================================
+async def get_current_admin_user(
+    current_user: User = Depends(get_current_user),
+) -> User:
+    """
+    Dependency to ensure user has the admin role.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, 
+            detail="Admin privileges required"
+        )
+    return current_user
+
+
+
 # ===========================================
 # ✅ Get Refresh Token User (CORRECTED)
 # ===========================================
@@ -185,7 +312,7 @@ async def get_refresh_token_user(
         raise credentials_exception
 
     # Decode token
-    payload = decode_token(token)
+    payload = decode_token_cached(token)
     if payload is None:
         raise credentials_exception
 
@@ -196,42 +323,32 @@ async def get_refresh_token_user(
             detail="Invalid token type, expected refresh token",
         )
 
+    email: Optional[str] = payload.get("sub")
+    if email is None:
+        raise credentials_exception
+
+    # User row plus refresh token state in a single round-trip. Always check the
+    # blacklist table: a refresh token rotated on another worker may not have
+    # reached this worker's Bloom filter yet, and replaying it must fail.
+    token_id = get_token_id(token, payload)
+    lookup = await load_token_user(email, token_id, db, use_filter=False)
+    if lookup is None:
+        raise credentials_exception
+
     # Check if refresh token is still active
-    stmt = select(ActiveToken).where(
-        and_(
-            ActiveToken.token == token,
-            ActiveToken.expires_at > utcnow()
-        )
-    )
-    result = await db.execute(stmt)
-    active_token = result.scalar_one_or_none()
-    
-    if not active_token:
+    if not lookup.is_active_token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Refresh token is no longer active"
         )
 
-    email: Optional[str] = payload.get("sub")
-    if email is None:
-        raise credentials_exception
-
     # Check if token is blacklisted
-    stmt = select(BlacklistedToken).where(BlacklistedToken.token == token)
-    result = await db.execute(stmt)
-    blacklisted = result.scalar_one_or_none()
-    if blacklisted:
+    if lookup.is_blacklisted:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Refresh token has been revoked",
         )
 
-    # Get user
-    stmt = select(User).where(User.email == email)
-    result = await db.execute(stmt)
-    user = result.scalar_one_or_none()
-
-    if user is None:
-        raise credentials_exception
+    user = lookup.user
 
     return user, token
\ No newline at end of file
@@ -0,0 +1,261 @@
+# app/authentication/jwt_backend.py
+"""
+JWT encoding and verification.
+
+Every token first goes through `JwtBackend.parse`, a structural pre-check with no
+crypto: wrong shape, oversized, undecodable, a different `alg`, a missing `kid`
+for the key ring or an `exp` in the past are rejected before a signature is
+ever computed. Only what survives reaches the backend:
+
+- "jose" (default): python-jose, as before.
+- "cryptography": signs and verifies the pre-parsed segments directly with the
+  `cryptography` / hmac primitives python-jose itself ends up calling, without
+  its per-call key handling, re-parsing and claim plumbing. Tokens are
+  byte-compatible with the jose backend in both directions.
+
+Keys are prepared once per key by `prepare_keys` (see KeyRing.load), so no
+backend parses a secret or PEM on the request path.
+"""
+
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+from app.monitoring.metrics import register_metrics
+from abc import ABC, abstractmethod
+from app.core.config import settings
+from calendar import timegm
+from datetime import datetime
+import binascii
+import base64
+import hmac
+import json
+import time
+
+# Far above any token we issue, so junk is dropped before base64/JSON decoding
+MAX_TOKEN_LENGTH = 8192
+TIME_CLAIMS = ("exp", "iat", "nbf")
+HMAC_HASHES = {"HS256": "sha256", "HS384": "sha384", "HS512": "sha512"}
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+# ============================================================
+# ✅ Pre-Parse (no crypto)
+# ============================================================
+class ParsedToken(NamedTuple):
+    token: str
+    signing_input: bytes  # "<header>.<payload>" as signed
+    signature: bytes
+    header: Dict[str, Any]
+    claims: Dict[str, Any]
+
+    @property
+    def kid(self) -> Optional[str]:
+        return self.header.get("kid")
+
+
+class JwtBackend(ABC):
+    """Shared pre-parse and counters; subclasses prepare keys, encode and verify."""
+
+    name = "base"
+
+    def __init__(self):
+        self._stats = {"encoded": 0, "verified": 0, "rejected_malformed": 0, "rejected_expired": 0, "rejected_signature": 0}
+
+    def _reject(self, reason: str) -> None:
+        self._stats[f"rejected_{reason}"] += 1
+        return None
+
+    def parse(self, token: str, algorithm: str, require_kid: bool) -> Optional[ParsedToken]:
+        """Split and decode a compact JWT and check it could be valid. None means reject."""
+        if len(token) > MAX_TOKEN_LENGTH or token.count(".") != 2:
+            return self._reject("malformed")
+        header_segment, payload_segment, signature_segment = token.split(".")
+        # Cheapest checks first: the signature is only decoded for a plausible token
+        try:
+            header = json.loads(_b64decode(header_segment))
+            if not isinstance(header, dict) or header.get("alg") != algorithm:
+                return self._reject("malformed")
+            if require_kid and not isinstance(header.get("kid"), str):
+                return self._reject("malformed")
+            claims = json.loads(_b64decode(payload_segment))
+            if not isinstance(claims, dict):
+                return self._reject("malformed")
+            exp = claims.get("exp")
+            if exp is not None:
+                if not isinstance(exp, int) or isinstance(exp, bool):
+                    return self._reject("malformed")
+                if exp < time.time():
+                    return self._reject("expired")
+            signature = _b64decode(signature_segment)
+        except (ValueError, binascii.Error):  # Includes UnicodeDecodeError and JSONDecodeError
+            return self._reject("malformed")
+        return ParsedToken(token, f"{header_segment}.{payload_segment}".encode(), signature, header, claims)
+
+    @abstractmethod
+    def prepare_keys(self, algorithm: str, material: str) -> Tuple[Any, Any]:
+        """(signing key, verification key) from a secret or a private key PEM, parsed once."""
+
+    @abstractmethod
+    def _encode(self, claims: Dict[str, Any], key: Any, algorithm: str, kid: Optional[str]) -> str:
+        """Compact JWT for `claims`, with `kid` in the header when given."""
+
+    @abstractmethod
+    def _verify(self, parsed: ParsedToken, key: Any, algorithm: str) -> Optional[Dict[str, Any]]:
+        """The claims if the signature and the claims check out, else None (counted as rejected)."""
+
+    def encode(self, claims: Dict[str, Any], key: Any, algorithm: str, kid: Optional[str]) -> str:
+        self._stats["encoded"] += 1
+        return self._encode(claims, key, algorithm, kid)
+
+    def verify(self, parsed: ParsedToken, key: Any, algorithm: str) -> Optional[Dict[str, Any]]:
+        """The claims of a parsed token if its signature and claims check out, else None."""
+        claims = self._verify(parsed, key, algorithm)
+        if claims is None:
+            return self._reject("signature")
+        self._stats["verified"] += 1
+        return claims
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, **self._stats}
+
+
+# ============================================================
+# ✅ python-jose Backend
+# ============================================================
+class JoseBackend(JwtBackend):
+    """python-jose with Key objects prepared once (the reference implementation)."""
+
+    name = "jose"
+
+    def __init__(self):
+        super().__init__()
+        from jose import JWTError, jwk, jwt
+
+        self._jwk = jwk
+        self._jwt = jwt
+        self._error = JWTError
+
+    def prepare_keys(self, algorithm: str, material: str) -> Tuple[Any, Any]:
+        key = self._jwk.construct(material, algorithm)
+        return key, key if algorithm in HMAC_HASHES else key.public_key()
+
+    def _encode(self, claims: Dict[str, Any], key: Any, algorithm: str, kid: Optional[str]) -> str:
+        return self._jwt.encode(claims, key, algorithm=algorithm, headers={"kid": kid} if kid else None)
+
+    def _verify(self, parsed: ParsedToken, key: Any, algorithm: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self._jwt.decode(parsed.token, key, algorithms=[algorithm])
+        except self._error:
+            return None
+
+
+# ============================================================
+# ✅ cryptography Backend
+# ============================================================
+class CryptographyBackend(JwtBackend):
+    """Signs and verifies with `cryptography` / hmac directly on the pre-parsed token."""
+
+    name = "cryptography"
+
+    def __init__(self):
+        super().__init__()
+        from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature, encode_dss_signature
+        from cryptography.hazmat.primitives.asymmetric import ec, padding
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.exceptions import InvalidSignature
+
+        self._serialization = serialization
+        self._invalid_signature = InvalidSignature
+        self._decode_dss = decode_dss_signature
+        self._encode_dss = encode_dss_signature
+        self._ecdsa = ec.ECDSA(hashes.SHA256())
+        self._pkcs1 = padding.PKCS1v15()
+        self._sha256 = hashes.SHA256()
+        self._headers: Dict[Tuple[str, Optional[str]], bytes] = {}  # Encoded header segment per (alg, kid)
+
+    def prepare_keys(self, algorithm: str, material: str) -> Tuple[Any, Any]:
+        if algorithm in HMAC_HASHES:
+            secret = material.encode()
+            return secret, secret
+        if algorithm not in ("ES256", "RS256"):
+            raise RuntimeError(f"JWT_BACKEND=cryptography does not support ALGORITHM={algorithm}")
+        private = self._serialization.load_pem_private_key(material.encode(), password=None)
+        return private, private.public_key()
+
+    def _header_segment(self, algorithm: str, kid: Optional[str]) -> bytes:
+        segment = self._headers.get((algorithm, kid))
+        if segment is None:
+            header = {"alg": algorithm, "typ": "JWT", **({"kid": kid} if kid else {})}
+            segment = _b64encode(json.dumps(header, separators=(",", ":"), sort_keys=True).encode())
+            self._headers[(algorithm, kid)] = segment
+        return segment
+
+    def _sign(self, signing_input: bytes, key: Any, algorithm: str) -> bytes:
+        if algorithm in HMAC_HASHES:
+            return hmac.digest(key, signing_input, HMAC_HASHES[algorithm])
+        if algorithm == "ES256":
+            r, s = self._decode_dss(key.sign(signing_input, self._ecdsa))
+            return r.to_bytes(32, "big") + s.to_bytes(32, "big")  # JWS wants raw r||s, not DER
+        return key.sign(signing_input, self._pkcs1, self._sha256)
+
+    def _encode(self, claims: Dict[str, Any], key: Any, algorithm: str, kid: Optional[str]) -> str:
+        claims = {
+            name: timegm(value.utctimetuple()) if name in TIME_CLAIMS and isinstance(value, datetime) else value
+            for name, value in claims.items()
+        }
+        signing_input = self._header_segment(algorithm, kid) + b"." + _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+        return (signing_input + b"." + _b64encode(self._sign(signing_input, key, algorithm))).decode()
+
+    def _signature_valid(self, parsed: ParsedToken, key: Any, algorithm: str) -> bool:
+        if algorithm in HMAC_HASHES:
+            return hmac.compare_digest(hmac.digest(key, parsed.signing_input, HMAC_HASHES[algorithm]), parsed.signature)
+        try:
+            if algorithm == "ES256":
+                if len(parsed.signature) != 64:
+                    return False
+                der = self._encode_dss(int.from_bytes(parsed.signature[:32], "big"), int.from_bytes(parsed.signature[32:], "big"))
+                key.verify(der, parsed.signing_input, self._ecdsa)
+            else:
+                key.verify(parsed.signature, parsed.signing_input, self._pkcs1, self._sha256)
+        except self._invalid_signature:
+            return False
+        return True
+
+    def _verify(self, parsed: ParsedToken, key: Any, algorithm: str) -> Optional[Dict[str, Any]]:
+        if not self._signature_valid(parsed, key, algorithm):
+            return None
+        claims = parsed.claims
+        # The claim checks jose.jwt.decode applies by default (exp was checked in parse)
+        nbf = claims.get("nbf")
+        if nbf is not None and (not isinstance(nbf, int) or nbf > time.time()):
+            return None
+        if "aud" in claims:
+            return None  # We never set an audience, so jose rejects any token that has one
+        if any(name in claims and not isinstance(claims[name], str) for name in ("sub", "jti")):
+            return None
+        return claims
+
+
+# ============================================================
+# ✅ Backend Selection
+# ============================================================
+JWT_BACKENDS: Dict[str, Callable[[], JwtBackend]] = {
+    JoseBackend.name: JoseBackend,
+    CryptographyBackend.name: CryptographyBackend,
+}
+
+
+def build_jwt_backend(name: str) -> JwtBackend:
+    if name not in JWT_BACKENDS:
+        raise ValueError(f"Invalid JWT_BACKEND: {name} (expected one of {', '.join(JWT_BACKENDS)})")
+    return JWT_BACKENDS[name]()
+
+
+# Per-process instance
+jwt_backend = build_jwt_backend(settings.JWT_BACKEND)
+register_metrics("jwt", jwt_backend.stats)
@@ -0,0 +1,279 @@
+# app/authentication/keys.py
+"""
+JWT signing keys.
+
+With ALGORITHM=HS256 (the default) tokens are signed with SECRET_KEY, as before.
+With ALGORITHM=ES256 or RS256 they are signed with a private key from the key
+ring in JWT_KEYS_DIR and carry its `kid`; other services verify them with the
+public keys served at /.well-known/jwks.json, without the secret and without
+calling this API.
+
+Every key is a PEM file named `<kid>.pem`, where the kid starts with the UTC
+minute it starts signing (`YYYYMMDDHHMM-<random>`). Each worker re-reads
+JWT_KEYS_DIR every JWT_KEYS_RELOAD_INTERVAL seconds (see KeyRing.start).
+Rotation is scheduled by deploying the next key ahead of its activation time.
+It is published in the JWKS at the next reload, so verifiers already know it
+when the first token signed with it arrives if it is deployed at least
+JWT_KEYS_RELOAD_INTERVAL + JWKS_MAX_AGE ahead. Every worker then switches to it
+at that minute without a restart.
+A key is dropped from the JWKS once its successor has been signing for longer
+than any token lives; `prune` then deletes the file. Deleting a key file
+(retired or compromised) stops its tokens from verifying at the next reload.
+
+    python -m app.authentication.keys generate --activate-in-hours 24
+    python -m app.authentication.keys list
+    python -m app.authentication.keys prune
+"""
+
+from app.authentication.jwt_backend import jwt_backend
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.monitoring.metrics import register_metrics
+from app.core.config import settings
+from app.helpers.time import utcnow
+from pathlib import Path
+from jose import jwk
+import argparse
+import asyncio
+import secrets
+import json
+import os
+
+# Asymmetric algorithms served through the JWKS (EdDSA is not supported by python-jose)
+ASYMMETRIC_ALGORITHMS = ("ES256", "RS256")
+KID_TIME_FORMAT = "%Y%m%d%H%M"
+
+
+def is_asymmetric(algorithm: str) -> bool:
+    return algorithm in ASYMMETRIC_ALGORITHMS
+
+
+# ============================================================
+# ✅ Signing Key
+# ============================================================
+class SigningKey:
+    """One key of the ring: parsed once (by the JWT backend), used for every sign/verify."""
+
+    def __init__(self, kid: str, algorithm: str, pem: str):
+        self.kid = kid
+        self.algorithm = algorithm
+        self.activates_at = datetime.strptime(kid.split("-", 1)[0], KID_TIME_FORMAT).replace(tzinfo=timezone.utc)
+        self.private, self.public = jwt_backend.prepare_keys(algorithm, pem)
+        self.jwk: Dict[str, Any] = {**jwk.construct(pem, algorithm).public_key().to_dict(), "kid": kid, "use": "sig"}
+
+
+# ============================================================
+# ✅ Key Ring
+# ============================================================
+class KeyRing:
+    """
+    Signing and verification keys for the configured ALGORITHM.
+
+    Asymmetric rings are re-read from `keys_dir` every `reload_interval` seconds
+    once started, in every worker (not a maintenance job: those run on the leader
+    only). A reload that fails keeps the current keys.
+    """
+
+    def __init__(self, algorithm: str, secret: str, keys_dir: Optional[str], reload_interval: float = 0):
+        self.algorithm = algorithm
+        self.secret = secret
+        self.keys_dir = Path(keys_dir) if keys_dir else None
+        self.reload_interval = reload_interval
+        self._symmetric: Optional[Any] = None  # Prepared secret (same key signs and verifies)
+        self._keys: List[SigningKey] = []  # Sorted by activation
+        self._by_kid: Dict[str, SigningKey] = {}
+        self._jwks_json = b'{"keys":[]}'
+        self._loaded = False
+        self._files: Tuple[Tuple[str, int], ...] = ()  # (name, mtime) of the loaded PEM files
+        self._on_keys_removed: List[Callable[[], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"reloads": 0, "last_reload_at": None, "last_error": None}
+
+    def _scan(self) -> List[Path]:
+        return sorted(self.keys_dir.glob("*.pem"))
+
+    def load(self) -> int:
+        """Parse every key (called at startup, otherwise on first use). Returns how many were loaded."""
+        if not is_asymmetric(self.algorithm):
+            self._symmetric, _ = jwt_backend.prepare_keys(self.algorithm, self.secret)
+            self._loaded = True
+            return 1
+        if self.keys_dir is None:
+            raise RuntimeError(f"ALGORITHM={self.algorithm} requires JWT_KEYS_DIR")
+        paths = self._scan()
+        keys = [SigningKey(path.stem, self.algorithm, path.read_text()) for path in paths]
+        if not any(key.activates_at <= utcnow() for key in keys):
+            raise RuntimeError(f"No active signing key in {self.keys_dir} (generate one with `python -m app.authentication.keys generate`)")
+        self._keys = sorted(keys, key=lambda key: key.activates_at)
+        self._by_kid = {key.kid: key for key in self._keys}
+        self._files = tuple((path.name, path.stat().st_mtime_ns) for path in paths)
+        self._jwks_json = self._build_jwks()
+        self._loaded = True
+        return len(self._keys)
+
+    def _build_jwks(self) -> bytes:
+        return json.dumps({"keys": [key.jwk for key in self.published_keys()]}).encode()
+
+    def on_keys_removed(self, handler: Callable[[], None]) -> None:
+        """Call `handler` when a reload drops a key, e.g. to forget tokens it verified."""
+        self._on_keys_removed.append(handler)
+
+    def reload(self) -> bool:
+        """
+        Pick up added, changed and deleted key files, and republish the JWKS
+        (keys age out of it over time). Returns True when the keys changed.
+        Raises, keeping the current keys, when the directory no longer loads.
+        """
+        if not is_asymmetric(self.algorithm):
+            return False
+        self._stats["reloads"] += 1
+        self._stats["last_reload_at"] = utcnow().isoformat()
+        paths = self._scan()
+        if tuple((path.name, path.stat().st_mtime_ns) for path in paths) == self._files:
+            self._jwks_json = self._build_jwks()
+            return False
+        before = dict(self._by_kid)
+        self.load()
+        removed = [kid for kid, key in before.items() if self._by_kid.get(kid) is None or self._by_kid[kid].jwk != key.jwk]
+        if removed:
+            print(f"🔑 JWT keys removed: {', '.join(removed)}")
+            for handler in self._on_keys_removed:
+                handler()
+        return True
+
+    async def start(self) -> None:
+        if is_asymmetric(self.algorithm) and self.reload_interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                if self.reload():
+                    print(f"🔑 JWT keys reloaded: {len(self._keys)}")
+            except Exception as e:
+                self._stats["last_error"] = str(e)
+                print(f"❌ JWT key reload failed, keeping the current keys: {e}")
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.load()
+
+    def signing_key(self) -> Tuple[Optional[str], Any]:
+        """(kid, key) to sign new tokens with: the newest key whose activation time has passed."""
+        self._ensure_loaded()
+        if self._symmetric is not None:
+            return None, self._symmetric
+        now = utcnow()
+        for key in reversed(self._keys):
+            if key.activates_at <= now:
+                return key.kid, key.private
+        raise RuntimeError("No active JWT signing key")
+
+    def verification_key(self, kid: Optional[str]) -> Optional[Any]:
+        """Key for a token's `kid` header, or None when it is not ours."""
+        self._ensure_loaded()
+        if self._symmetric is not None:
+            return self._symmetric
+        key = self._by_kid.get(kid) if kid else None
+        return key.public if key is not None else None
+
+    def published_keys(self) -> List[SigningKey]:
+        """Keys that may still have valid tokens, plus the ones scheduled to sign next."""
+        now = utcnow()
+        longest = max(timedelta(days=settings.REFRESH_TOKEN_EXPIRY), timedelta(minutes=settings.ACCESS_TOKEN_EXPIRY))
+        published = []
+        for key, successor in zip(self._keys, self._keys[1:] + [None]):
+            if successor is not None and successor.activates_at + longest <= now:
+                continue  # Every token it signed has expired
+            published.append(key)
+        return published
+
+    def jwks_json(self) -> bytes:
+        """The JWKS document, serialized at load and reload time."""
+        self._ensure_loaded()
+        return self._jwks_json
+
+    def stats(self) -> Dict[str, Any]:
+        if not is_asymmetric(self.algorithm):
+            return {"algorithm": self.algorithm}
+        now = utcnow()
+        upcoming = [key for key in self._keys if key.activates_at > now]
+        return {
+            "algorithm": self.algorithm,
+            "keys": len(self._keys),
+            "signing_kid": self.signing_key()[0] if self._loaded else None,
+            "next_kid": upcoming[0].kid if upcoming else None,  # None: no rotation scheduled
+            "next_activates_at": upcoming[0].activates_at.isoformat() if upcoming else None,
+            **self._stats,
+        }
+
+
+# Per-process instance, loaded and started in the app lifespan
+key_ring = KeyRing(settings.ALGORITHM, settings.SECRET_KEY, settings.JWT_KEYS_DIR, settings.JWT_KEYS_RELOAD_INTERVAL)
+register_metrics("jwt_keys", key_ring.stats)
+
+
+# ============================================================
+# ✅ Key Management CLI
+# ============================================================
+def generate_private_key_pem(algorithm: str) -> bytes:
+    from cryptography.hazmat.primitives.asymmetric import ec, rsa
+    from cryptography.hazmat.primitives import serialization
+
+    if algorithm == "ES256":
+        private_key = ec.generate_private_key(ec.SECP256R1())
+    elif algorithm == "RS256":
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    else:
+        raise ValueError(f"Cannot generate keys for {algorithm} (expected one of {', '.join(ASYMMETRIC_ALGORITHMS)})")
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+def generate_key(keys_dir: Path, algorithm: str, activates_at: datetime) -> Path:
+    keys_dir.mkdir(parents=True, exist_ok=True)
+    kid = f"{activates_at:{KID_TIME_FORMAT}}-{secrets.token_hex(4)}"
+    path = keys_dir / f"{kid}.pem"
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(generate_private_key_pem(algorithm))
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("action", choices=["generate", "list", "prune"])
+    parser.add_argument("--activate-in-hours", type=float, default=0, help="generate: delay before the key starts signing")
+    args = parser.parse_args()
+
+    if not is_asymmetric(settings.ALGORITHM) or not settings.JWT_KEYS_DIR:
+        raise SystemExit(f"Set ALGORITHM to one of {', '.join(ASYMMETRIC_ALGORITHMS)} and JWT_KEYS_DIR first")
+    keys_dir = Path(settings.JWT_KEYS_DIR)
+
+    if args.action == "generate":
+        activates_at = utcnow() + timedelta(hours=args.activate_in_hours)
+        print(f"✅ Generated {generate_key(keys_dir, settings.ALGORITHM, activates_at)} (signs from {activates_at:%Y-%m-%d %H:%M} UTC)")
+    else:
+        key_ring.load()
+        published = {key.kid for key in key_ring.published_keys()}
+        signing_kid, _ = key_ring.signing_key()
+        for key in key_ring._keys:
+            state = "signing" if key.kid == signing_kid else "published" if key.kid in published else "retired"
+            if args.action == "list":
+                print(f"{key.kid}  {key.activates_at:%Y-%m-%d %H:%M} UTC  {state}")
+            elif state == "retired":
+                (keys_dir / f"{key.kid}.pem").unlink()
+                print(f"🗑️ Deleted retired key {key.kid}")
@@ -1,34 +1,43 @@
 # app/authentication/models.py
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, LargeBinary
 from app.database.connection import Base
 from sqlalchemy.orm import relationship
+from app.core.config import settings
 from app.helpers.time import utcnow
 from datetime import timedelta
 
+# Token tables can be range-partitioned by expires_at (see app/authentication/partitions.py).
+# Postgres requires the partition key in the primary key and in every unique index.
+PARTITIONED = settings.TOKEN_PARTITION_INTERVAL is not None
+TOKEN_TABLE_ARGS = ({"postgresql_partition_by": "RANGE (expires_at)"},) if PARTITIONED else ()
+
 # ✅ Token Blacklist
 class ActiveToken(Base):
     __tablename__ = "active_tokens"
     
-    id = Column(Integer, primary_key=True, index=True)
-    token = Column(String, unique=True, index=True, nullable=False)
+    __table_args__ = TOKEN_TABLE_ARGS
+    
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    jti_hash = Column(LargeBinary(16), unique=not PARTITIONED, index=True, nullable=False)  # sha256(jti)[:16], see security.hash_jti
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     token_type = Column(String, nullable=False)  # 'access' or 'refresh'
     created_at = Column(DateTime(timezone=True), default=utcnow)
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), primary_key=PARTITIONED, index=True, nullable=False)  # Indexed for expiry cleanup
     
     user = relationship("User")
 
 #  ✅ Token Blacklist
 class BlacklistedToken(Base):
     __tablename__ = "blacklisted_token"
+    __table_args__ = TOKEN_TABLE_ARGS
 
-    id = Column(Integer, primary_key=True, index=True)
-    token = Column(String, unique=True, index=True, nullable=False)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    jti_hash = Column(LargeBinary(16), unique=not PARTITIONED, index=True, nullable=False)  # sha256(jti)[:16], see security.hash_jti
     token_type = Column(String, nullable=False)  # 'access' or 'refresh' # i added this column
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False) 
     blacklisted_at = Column(DateTime(timezone=True), default=utcnow)
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), primary_key=PARTITIONED, index=True, nullable=False)  # Indexed for expiry cleanup
     reason = Column(String, nullable=True)  # 'logout', 'password_change', 'account_deletion', 'token_expiration', 'revoked', 'password_reset'
 
     user = relationship("User", back_populates="blacklisted_tokens")
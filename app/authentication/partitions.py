@@ -0,0 +1,277 @@
+# app/authentication/partitions.py
+"""
+Optional range partitioning of the token tables by `expires_at`.
+
+With TOKEN_PARTITION_INTERVAL set ("day" or "hour"), active_tokens and
+blacklisted_token are partitioned into one child table per interval.
+Expiry is then a DETACH ... CONCURRENTLY and a DROP of every partition whose
+upper bound has passed, which costs the same regardless of how many rows it
+held and never blocks token reads or inserts (Postgres 14+). Partitions are
+created ahead of time up to the longest token lifetime plus a safety margin,
+and on demand before an insert that would otherwise find none. There is no
+DEFAULT partition: Postgres does not allow a concurrent detach with one.
+
+Existing databases are converted by the `partition_token_tables` migration when
+the setting is present at `alembic upgrade` time, or at any later point with:
+
+    python -m app.authentication.partitions convert   # or: revert
+"""
+
+from app.database.connection import AsyncSessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta
+from app.core.config import settings
+from app.helpers.time import utcnow
+from typing import Any, Dict, List, Optional
+from sqlalchemy import text, create_engine
+from sqlalchemy.engine import Connection
+import argparse
+import asyncio
+
+TOKEN_TABLES = ("active_tokens", "blacklisted_token")
+
+INTERVALS = {
+    "day": (timedelta(days=1), "%Y%m%d"),
+    "hour": (timedelta(hours=1), "%Y%m%d%H"),
+}
+
+
+# ============================================================
+# ✅ Partitioning Helpers
+# ============================================================
+def partitioning_enabled() -> bool:
+    return settings.TOKEN_PARTITION_INTERVAL is not None
+
+
+def _interval(interval: Optional[str] = None):
+    interval = interval or settings.TOKEN_PARTITION_INTERVAL
+    if interval not in INTERVALS:
+        raise ValueError(f"Invalid TOKEN_PARTITION_INTERVAL: {interval!r} (expected 'day' or 'hour')")
+    return INTERVALS[interval]
+
+
+def bucket_start(moment: datetime, interval: Optional[str] = None) -> datetime:
+    """Start of the partition that holds `moment` (UTC)."""
+    step, _ = _interval(interval)
+    if step >= timedelta(days=1):
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def partition_name(table: str, start: datetime, interval: Optional[str] = None) -> str:
+    _, fmt = _interval(interval)
+    return f"{table}_p{start:{fmt}}"
+
+
+def create_partition_sql(table: str, start: datetime, interval: Optional[str] = None) -> str:
+    step, _ = _interval(interval)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, start, interval)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{(start + step).isoformat()}')"
+    )
+
+
+def partition_horizon(interval: Optional[str] = None) -> datetime:
+    """Latest `expires_at` a new row can get, plus TOKEN_PARTITION_PREMAKE spare intervals."""
+    step, _ = _interval(interval)
+    longest = max(timedelta(days=settings.REFRESH_TOKEN_EXPIRY), timedelta(minutes=settings.ACCESS_TOKEN_EXPIRY))
+    return utcnow() + longest + step * settings.TOKEN_PARTITION_PREMAKE
+
+
+def partition_starts(first: datetime, last: datetime, interval: Optional[str] = None) -> List[datetime]:
+    """Starts of every partition needed to cover [first, last]."""
+    step, _ = _interval(interval)
+    start, starts = bucket_start(first, interval), []
+    while start <= last:
+        starts.append(start)
+        start += step
+    return starts
+
+
+# ============================================================
+# ✅ Table Conversion SQL (used by the Alembic migration)
+# ============================================================
+def partition_table_sql(table: str, interval: str, starts: List[datetime]) -> List[str]:
+    """Statements converting a plain token table into a partitioned one, keeping unexpired rows."""
+    legacy = f"{table}_unpartitioned"
+    return [
+        f"ALTER TABLE {table} RENAME TO {legacy}",
+        f"ALTER TABLE {legacy} RENAME CONSTRAINT {table}_pkey TO {legacy}_pkey",
+        f"DROP INDEX ix_{table}_id, ix_{table}_jti_hash, ix_{table}_expires_at",
+        f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS) PARTITION BY RANGE (expires_at)",
+        f"ALTER TABLE {table} ADD PRIMARY KEY (id, expires_at)",
+        f"ALTER TABLE {table} ADD FOREIGN KEY (user_id) REFERENCES users (id)",
+        f"CREATE INDEX ix_{table}_id ON {table} (id)",
+        f"CREATE INDEX ix_{table}_jti_hash ON {table} (jti_hash)",
+        f"CREATE INDEX ix_{table}_expires_at ON {table} (expires_at)",
+        *[create_partition_sql(table, start, interval) for start in starts],
+        f"INSERT INTO {table} SELECT * FROM {legacy} WHERE expires_at > now()",
+        f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id",
+        f"DROP TABLE {legacy}",
+    ]
+
+
+def unpartition_table_sql(table: str) -> List[str]:
+    """Statements converting a partitioned token table back into a plain one."""
+    partitioned = f"{table}_partitioned"
+    return [
+        f"ALTER TABLE {table} RENAME TO {partitioned}",
+        f"ALTER TABLE {partitioned} RENAME CONSTRAINT {table}_pkey TO {partitioned}_pkey",
+        f"DROP INDEX ix_{table}_id, ix_{table}_jti_hash, ix_{table}_expires_at",
+        f"CREATE TABLE {table} (LIKE {partitioned} INCLUDING DEFAULTS)",
+        f"ALTER TABLE {table} ADD PRIMARY KEY (id)",
+        f"ALTER TABLE {table} ADD FOREIGN KEY (user_id) REFERENCES users (id)",
+        f"CREATE INDEX ix_{table}_id ON {table} (id)",
+        f"CREATE UNIQUE INDEX ix_{table}_jti_hash ON {table} (jti_hash)",
+        f"CREATE INDEX ix_{table}_expires_at ON {table} (expires_at)",
+        f"INSERT INTO {table} SELECT * FROM {partitioned} WHERE expires_at > now()",
+        f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id",
+        f"DROP TABLE {partitioned}",
+    ]
+
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    return bool(conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table JOIN pg_class ON pg_class.oid = partrelid WHERE relname = :table"),
+        {"table": table},
+    ).scalar())
+
+
+def convert_token_tables(conn: Connection, interval: str) -> None:
+    """Partition both token tables (no-op for tables already partitioned)."""
+    for table in TOKEN_TABLES:
+        if is_partitioned(conn, table):
+            continue
+        latest = conn.execute(text(f"SELECT max(expires_at) FROM {table}")).scalar()
+        last = max(filter(None, [latest, partition_horizon(interval)]))
+        for statement in partition_table_sql(table, interval, partition_starts(utcnow(), last, interval)):
+            conn.execute(text(statement))
+        print(f"✅ {table} partitioned by {interval}")
+
+
+def revert_token_tables(conn: Connection) -> None:
+    """Turn both token tables back into plain tables (no-op for plain tables)."""
+    for table in TOKEN_TABLES:
+        if not is_partitioned(conn, table):
+            continue
+        for statement in unpartition_table_sql(table):
+            conn.execute(text(statement))
+        print(f"✅ {table} is no longer partitioned")
+
+
+# ============================================================
+# ✅ Runtime Partition Maintenance
+# ============================================================
+async def _list_partitions(table: str, db: AsyncSession) -> List[str]:
+    result = await db.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :table"
+        ),
+        {"table": table},
+    )
+    return list(result.scalars())
+
+
+# Per process: partitions are known to exist for every expires_at before this
+_ready_until: Optional[datetime] = None
+_ensure_lock = asyncio.Lock()
+
+
+async def ensure_token_partitions(db: AsyncSession) -> int:
+    """Create any missing partitions from the current interval up to the horizon. Returns how many were created."""
+    global _ready_until
+    step, _ = _interval()
+    created = 0
+    starts = partition_starts(utcnow(), partition_horizon())
+    for table in TOKEN_TABLES:
+        existing = set(await _list_partitions(table, db))
+        for start in starts:
+            if partition_name(table, start) not in existing:
+                await db.execute(text(create_partition_sql(table, start)))
+                created += 1
+    await db.commit()
+    _ready_until = starts[-1] + step
+    return created
+
+
+async def ensure_partitions_for(expires_at: List[datetime]) -> None:
+    """
+    Make sure token rows expiring at these times have a partition to go to, in
+    case the maintenance job has not created it (yet). Only this process's last
+    result is checked on the hot path; the catalog is read about once every
+    TOKEN_PARTITION_PREMAKE intervals, in its own short transaction.
+    """
+    latest = max(expires_at, default=None)
+    if latest is None or (_ready_until is not None and latest < _ready_until):
+        return
+    async with _ensure_lock:
+        if _ready_until is not None and latest < _ready_until:
+            return  # Another request just did it
+        try:
+            async with AsyncSessionLocal() as db:
+                created = await ensure_token_partitions(db)
+        except Exception as e:
+            # Most likely another worker creating the same partition; the insert will tell
+            print(f"❌ Creating token partitions on demand failed: {e}")
+            return
+    if created:
+        print(f"🗂️ Token partitions created on demand: {created}")
+
+
+async def drop_expired_token_partitions(db: AsyncSession) -> Dict[str, Any]:
+    """
+    Detach and drop every partition whose whole range has expired. Returns counts;
+    rows_removed is estimated from pg_class.
+
+    DETACH PARTITION ... CONCURRENTLY only takes a SHARE UPDATE EXCLUSIVE lock on
+    the parent, so token reads and inserts go on while it waits for older
+    transactions, and the DROP then only locks the detached table. It cannot run
+    inside a transaction, hence the AUTOCOMMIT connection. A detach interrupted
+    half-way is completed with FINALIZE, and a detached table left behind is
+    dropped, on the next run.
+    """
+    step, fmt = _interval()
+    now = utcnow()
+    dropped, estimated_rows = 0, 0
+    async with db.bind.execution_options(isolation_level="AUTOCOMMIT").connect() as conn:
+        for table in TOKEN_TABLES:
+            result = await conn.execute(
+                text(
+                    "SELECT child.relname, child.relispartition, coalesce(pg_inherits.inhdetachpending, false), "
+                    "greatest(child.reltuples, 0)::bigint "
+                    "FROM pg_class child LEFT JOIN pg_inherits ON pg_inherits.inhrelid = child.oid "
+                    "WHERE child.relkind = 'r' AND child.relname LIKE :pattern AND pg_table_is_visible(child.oid)"
+                ),
+                {"pattern": f"{table}\\_p%"},
+            )
+            for name, attached, detach_pending, rows in result.all():
+                try:
+                    start = datetime.strptime(name[len(table) + 2:], fmt).replace(tzinfo=now.tzinfo)
+                except ValueError:
+                    continue  # Not one of ours
+                if start + step > now:
+                    continue
+                if attached:
+                    mode = "FINALIZE" if detach_pending else "CONCURRENTLY"
+                    await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name} {mode}"))
+                await conn.execute(text(f"DROP TABLE {name}"))
+                estimated_rows += rows
+                dropped += 1
+    return {"partitions_dropped": dropped, "rows_removed": estimated_rows}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("action", choices=["convert", "revert"])
+    args = parser.parse_args()
+
+    sync_engine = create_engine(settings.DB_URL_SYNC)
+    with sync_engine.begin() as conn:  # One transaction: all or nothing
+        if args.action == "convert":
+            convert_token_tables(conn, settings.TOKEN_PARTITION_INTERVAL or "day")
+        else:
+            revert_token_tables(conn)
+    sync_engine.dispose()
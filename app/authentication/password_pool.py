@@ -0,0 +1,109 @@
+# app/authentication/password_pool.py
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from app.monitoring.metrics import register_metrics
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+from fastapi import HTTPException, status
+from app.core.config import settings
+from collections import deque
+import asyncio
+import time
+
+
+def _run_timed(fn: Callable[..., Any], args: Tuple[Any, ...]) -> Tuple[float, Any]:
+    """Run `fn` in the worker and report when it actually started (system-wide monotonic clock)."""
+    started = time.monotonic()
+    return started, fn(*args)
+
+
+# ============================================================
+# ✅ Password Hash Pool
+# ============================================================
+class PasswordHashPool:
+    """
+    Bounded executor for argon2 work so hashing never blocks the event loop.
+
+    - "thread": argon2-cffi releases the GIL, so threads hash in parallel.
+    - "process": isolates hashing CPU from the web worker entirely.
+
+    At most `workers + max_queue` jobs are in flight; beyond that requests get a
+    503 straight away instead of queueing with unbounded latency.
+    """
+
+    def __init__(self, kind: str, workers: int, max_queue: int):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Invalid password hash executor: {kind}")
+        self.kind = kind
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._waits_ms: Deque[float] = deque(maxlen=1000)
+        self._wait_ms_max = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run `fn(*args)` on the pool, or raise 503 if the queue is full."""
+        if self._in_flight >= self.workers + self.max_queue:
+            self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please try again shortly",
+                headers={"Retry-After": "1"},
+            )
+
+        self._in_flight += 1
+        submitted = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+            started, result = await loop.run_in_executor(self._get_executor(), _run_timed, fn, args)
+        finally:
+            self._in_flight -= 1
+
+        wait_ms = max(0.0, (started - submitted) * 1000)
+        self._waits_ms.append(wait_ms)
+        self._wait_ms_max = max(self._wait_ms_max, wait_ms)
+        self._completed += 1
+        return result
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self._waits_ms)
+
+        def pct(p: float) -> float:
+            return round(waits[min(len(waits) - 1, int(len(waits) * p))], 3) if waits else 0.0
+
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queued": max(0, self._in_flight - self.workers),
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "queue_wait_ms_p50": pct(0.50),
+            "queue_wait_ms_p99": pct(0.99),
+            "queue_wait_ms_max": round(self._wait_ms_max, 3),
+        }
+
+
+# Per-process instance used by security.verify_password / get_password_hash
+password_pool = PasswordHashPool(
+    kind=settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
+register_metrics("password_hashing", password_pool.stats)
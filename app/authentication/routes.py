@@ -49,6 +49,7 @@ from app.authentication.schemas import (
     VerifyEmail,
     UserLogin,
 )
+from app.authentication.keys import key_ring
 from app.core.config import settings
 
 router = APIRouter()
@@ -307,3 +308,22 @@ async def verify_email(
     """
     await verify_email_with_code(user, payload.verification_code, db)
     return {"message": "Email verified successfully"}
+
+
+# ============================================================
+# ✅ JWKS (public keys for verifying our tokens elsewhere)
+# ============================================================
+well_known_router = APIRouter()
+
+
+@well_known_router.get("/jwks.json", include_in_schema=False)
+async def get_jwks():
+    """
+    Public keys of the JWT key ring (empty with HS256). Pre-serialized at startup,
+    and cacheable by verifiers for JWKS_MAX_AGE seconds.
+    """
+    return Response(
+        content=key_ring.jwks_json(),
+        media_type="application/json",
+        headers={"Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE}"},
+    )
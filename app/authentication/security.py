@@ -1,33 +1,74 @@
 # app/authentication/security.py
 
+from app.authentication.cache import revocation_cache, verified_token_cache, publish_user_revoked
+from app.authentication.token_store import TokenRecord, token_store
+from app.authentication.password_pool import password_pool
+from app.authentication.keys import key_ring, is_asymmetric
+from app.authentication.jwt_backend import jwt_backend
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from app.core.config import settings
 from app.helpers.time import utcnow
-from jose import JWTError, jwt
+from jose import jwt
+from sqlalchemy import update
+import hashlib
 import secrets
 import random
 
+# argon2 parameters from settings (see app/authentication/calibrate.py); unset ones keep the library defaults
+_argon2_options = {
+    f"argon2__{option}": value
+    for option, value in (
+        ("rounds", settings.ARGON2_TIME_COST),
+        ("memory_cost", settings.ARGON2_MEMORY_COST),
+        ("parallelism", settings.ARGON2_PARALLELISM),
+    )
+    if value is not None
+}
+
 # Password hashing context
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+pwd_context = CryptContext(schemes=["argon2"], deprecated="auto", **_argon2_options)
+
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _hash_password(password: str) -> str:
+    return pwd_context.hash(password)
 
 
 # ============================================================
 # ✅ Verify Password
 # ============================================================
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash (runs on the password hash pool)."""
+    return await password_pool.run(_verify_password, plain_password, hashed_password)
 
 # ============================================================
 # ✅ Get Password Hash
 # ============================================================
-def get_password_hash(password: str) -> str:
-    """Hash a password."""
-    return pwd_context.hash(password)
+async def get_password_hash(password: str) -> str:
+    """Hash a password (runs on the password hash pool)."""
+    return await password_pool.run(_hash_password, password)
+
+# ============================================================
+# ✅ Password Needs Rehash
+# ============================================================
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if the hash was made with other argon2 parameters than configured (cheap, no hashing)."""
+    return pwd_context.needs_update(hashed_password)
+
+def _sign_token(data: Dict[str, Any], token_type: str, expire: datetime) -> Tuple[str, str]:
+    """Sign a JWT with a fresh jti and the current key of the key ring. Returns (encoded_jwt, jti)."""
+    jti = secrets.token_urlsafe(16)
+    to_encode = data.copy()
+    to_encode.update({"exp": expire, "type": token_type, "jti": jti})
+    kid, key = key_ring.signing_key()
+    return jwt_backend.encode(to_encode, key, settings.ALGORITHM, kid), jti
+
 
 # ============================================================
 # ✅ Create Access Token
@@ -38,25 +79,21 @@ async def create_access_token(
     expires_delta: Optional[timedelta] = None
 ) -> str:
     """Create a JWT access token and store it as active."""
-    to_encode = data.copy()
-
     if expires_delta:
         expire = utcnow() + expires_delta
     else:
-        expire = utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRY)
+        expire = get_token_expiry("access")
+
+    encoded_jwt, jti = _sign_token(data, "access", expire)
 
-    to_encode.update({"exp": expire, "type": "access"})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    # Stateless mode: nothing to store, revocation goes through User.token_epoch
+    if settings.STATELESS_ACCESS_TOKENS:
+        return encoded_jwt
     
-    # Store as active token
-    from app.authentication.models import ActiveToken
-    active_token = ActiveToken(
-        token=encoded_jwt,
-        user_id=data.get("user_id"),
-        token_type="access",
-        expires_at=expire
-    )
-    db.add(active_token)
+    # Store as active token (only a digest of the jti, not the JWT itself)
+    await token_store.add_active(db, [
+        {"jti_hash": hash_jti(jti), "user_id": data.get("user_id"), "token_type": "access", "expires_at": expire}
+    ])
     await db.commit()
     
     return encoded_jwt
@@ -71,41 +108,100 @@ async def create_refresh_token(
     expires_delta: Optional[timedelta] = None
 ) -> str:
     """Create a JWT refresh token and store it as active."""
-    to_encode = data.copy()
-
     if expires_delta:
         expire = utcnow() + expires_delta
     else:
-        expire = utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRY)
+        expire = get_token_expiry("refresh")
 
-    to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt, jti = _sign_token(data, "refresh", expire)
     
-    # Store as active token
-    from app.authentication.models import ActiveToken
-    active_token = ActiveToken(
-        token=encoded_jwt,
-        user_id=data.get("user_id"),
-        token_type="refresh",
-        expires_at=expire
-    )
-    db.add(active_token)
+    # Store as active token (only a digest of the jti, not the JWT itself)
+    await token_store.add_active(db, [
+        {"jti_hash": hash_jti(jti), "user_id": data.get("user_id"), "token_type": "refresh", "expires_at": expire}
+    ])
     await db.commit()
     
     return encoded_jwt
 
+
+# ============================================================
+# ✅ Issue Token Pair (one transaction per login/refresh)
+# ============================================================
+async def issue_token_pair(
+    data: Dict[str, Any],
+    db: AsyncSession,
+    blacklist_entry: Optional[TokenRecord] = None,
+    commit: bool = True,
+) -> Tuple[str, str]:
+    """
+    Sign an access and a refresh token and persist everything with ONE commit:
+    both active tokens in a single multi-row write to the token store (only the
+    refresh token in stateless mode) plus, for a rotation, the old refresh token's
+    blacklist entry. With commit=False the rows join the caller's transaction instead.
+    Returns (access_token, refresh_token).
+    """
+    access_expire = get_token_expiry("access")
+    refresh_expire = get_token_expiry("refresh")
+    access_token, access_jti = _sign_token(data, "access", access_expire)
+    refresh_token, refresh_jti = _sign_token(data, "refresh", refresh_expire)
+
+    rows = [
+        {"jti_hash": hash_jti(refresh_jti), "user_id": data.get("user_id"), "token_type": "refresh", "expires_at": refresh_expire},
+    ]
+    if not settings.STATELESS_ACCESS_TOKENS:
+        rows.append(
+            {"jti_hash": hash_jti(access_jti), "user_id": data.get("user_id"), "token_type": "access", "expires_at": access_expire}
+        )
+    await token_store.add_active(db, rows)
+
+    if blacklist_entry is not None:
+        await token_store.blacklist(db, blacklist_entry)
+    if commit:
+        await db.commit()
+
+    return access_token, refresh_token
+
 # ============================================================
 # ✅ Decode Token
 # ============================================================
 def decode_token(token: str) -> Optional[Dict[str, Any]]:
-    """Decode and verify a JWT token."""
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        return payload
-    except JWTError:
+    """
+    Decode and verify a JWT token (asymmetric tokens with the key named by their `kid`).
+    Malformed and expired tokens are rejected by the pre-parse, before any crypto.
+    """
+    parsed = jwt_backend.parse(token, settings.ALGORITHM, require_kid=is_asymmetric(settings.ALGORITHM))
+    if parsed is None:
+        return None
+    key = key_ring.verification_key(parsed.kid)
+    if key is None:
         return None
+    return jwt_backend.verify(parsed, key, settings.ALGORITHM)
+
+# ============================================================
+# ✅ Decode Token (cached)
+# ============================================================
+def decode_token_cached(token: str) -> Optional[Dict[str, Any]]:
+    """decode_token for tokens clients present repeatedly: a token verified before is not verified again until its exp."""
+    return verified_token_cache.decode(token, decode_token)
+
+# ============================================================
+# ✅ Hash JTI
+# ============================================================
+def hash_jti(jti: str) -> bytes:
+    """Return the fixed-width (16 byte) digest stored in place of a token."""
+    return hashlib.sha256(jti.encode()).digest()[:16]
+
+# ============================================================
+# ✅ Get Token ID
+# ============================================================
+def get_token_id(token: str, payload: Optional[Dict[str, Any]] = None) -> bytes:
+    """
+    Return the digest identifying a token in the token tables and caches.
+    Tokens minted before the `jti` claim existed fall back to a digest of the whole token.
+    """
+    if payload is None:
+        payload = jwt.get_unverified_claims(token)
+    return hash_jti(payload.get("jti") or token)
 
 # ============================================================
 # ✅ Generate Password Reset Token
@@ -134,64 +230,47 @@ def generate_verification_code():
 # ============================================================
 # ✅ Blacklist Access and Refresh Tokens on password change, logout, password reset, or account deletion
 # ============================================================
-async def blacklist_all_user_tokens(user_id: int, db: AsyncSession, reason: str = "security_event") -> None:
+async def blacklist_all_user_tokens(user_id: int, db: AsyncSession, reason: str = "security_event") -> int:
     """
     Blacklist ALL active tokens for a user.
     This effectively logs them out from all devices.
+
+    Set-based: the token store moves every token at once (one statement in SQL),
+    so the cost does not grow with ORM objects per session.
+    Returns the number of tokens blacklisted.
     """
-    from app.authentication.models import ActiveToken, BlacklistedToken
-    
-    # 1. Get all active tokens for the user
-    stmt = select(ActiveToken).where(
-        and_(
-            ActiveToken.user_id == user_id,
-            ActiveToken.expires_at > utcnow()
-        )
+    from app.users.models import User
+
+    # 0. Bump the revocation epoch; this alone revokes stateless access tokens
+    stmt = (
+        update(User)
+        .where(User.id == user_id)
+        .values(token_epoch=User.token_epoch + 1)
+        .execution_options(synchronize_session="fetch")
     )
-    result = await db.execute(stmt)
-    active_tokens = result.scalars().all()
-    
-    # 2. Blacklist each active token
-    for active_token in active_tokens:
-        blacklist_entry = BlacklistedToken(
-            token=active_token.token,
-            token_type=active_token.token_type,  # ADD THIS
-            user_id=user_id,
-            expires_at=active_token.expires_at,
-            reason=reason
-        )
-        db.add(blacklist_entry)
-        
-        # 3. Remove from active tokens
-        await db.delete(active_token)
+    await db.execute(stmt)
     
+    # 1. Blacklist every active token that has not expired yet
+    blacklisted = await token_store.revoke_user_tokens(db, user_id, reason)
+
+    # 2. Notify every worker once the transaction commits
+    await publish_user_revoked(db, user_id)
     await db.commit()
 
+    # 3. Drop this user's tokens from the in-process revocation cache
+    revocation_cache.revoke_user(user_id)
+
+    return blacklisted
+
 
 
 # ============================================================
 # ✅ Clean up expired tokens from active_tokens and blacklisted_token tables
 # ============================================================  
-async def cleanup_expired_tokens(db: AsyncSession) -> None:
-    """Clean up expired tokens from active_tokens and  tables."""
-    from app.authentication.models import ActiveToken, BlacklistedToken
-    
-    # Clean expired active tokens
-    stmt = select(ActiveToken).where(ActiveToken.expires_at <= utcnow())
-    result = await db.execute(stmt)
-    expired_active = result.scalars().all()
-    
-    for token in expired_active:
-        await db.delete(token)
-    
-    # Clean expired blacklisted tokens (optional)
-    stmt = select(BlacklistedToken).where(BlacklistedToken.expires_at <= utcnow())
-    result = await db.execute(stmt)
-    expired_blacklisted = result.scalars().all()
-
-    print(f'Expired | Blacklisted tokens cleaned: {len(expired_blacklisted)} | {utcnow()}')
-    
-    for token in expired_blacklisted:
-        await db.delete(token)
-    
-    await db.commit()
\ No newline at end of file
+async def cleanup_expired_tokens(db: AsyncSession, batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Clean up expired tokens from active_tokens and blacklisted_token tables in short
+    batches (or drop expired partitions), see SqlTokenStore.cleanup. Key-value token
+    stores expire tokens on their own and report nothing removed. Returns run statistics.
+    """
+    return await token_store.cleanup(db, batch_size)
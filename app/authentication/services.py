@@ -1,12 +1,20 @@
 # app/authentication/services.py
 
-from app.authentication.models import BlacklistedToken, PasswordResetToken, ActiveToken
+from app.authentication.models import PasswordResetToken
+from app.authentication.token_store import token_store
 from app.authentication.helpers import formulate_reset_link
+from app.authentication.cache import (
+    publish_token_revoked,
+    publish_user_changed,
+    revocation_cache,
+)
+from app.users.cache import cache_profile, cache_settings
 from app.helpers.time import utcnow
 from app.authentication.utils import (
     send_registration_email_with_verification_code,
     send_reset_password_link_with_token_in_email,
 )
+from app.emails.outbox import email_outbox_worker
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.authentication.schemas import (
     UserLogin,
@@ -17,20 +25,23 @@ from datetime import datetime, timedelta
 from app.authentication.security import (
     generate_password_reset_token,
     generate_verification_code,
-    create_refresh_token,
-    create_access_token,
+    issue_token_pair,
     get_password_hash,
+    password_needs_rehash,
     get_token_expiry,
     verify_password,
     decode_token,
+    get_token_id,
     blacklist_all_user_tokens,
 )
 from typing import Optional, Tuple
 from app.users.models import User
-from sqlalchemy import select, and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy import select, insert, and_
 
-# Importing create_default_settings
-from app.users.services.create_default_settings import create_default_settings
+# Importing the default settings values
+from app.users.services.create_default_settings import DEFAULT_SETTINGS
+from app.user_settings.models import Settings
 
 
 # ============================================================
@@ -50,50 +61,53 @@ class RegistrationResponse:
 async def register_user(
     user_data: UserRegister, db: AsyncSession
 ) -> RegistrationResponse:
-    """Register a new user."""
-    # Check if email already exists
-    stmt = select(User).where(User.email == user_data.email)
-    result = await db.execute(stmt)
-    if result.scalar_one_or_none():
+    """
+    Register a new user in ONE transaction: the user (with its verification code)
+    and its default settings via INSERT ... RETURNING, both tokens in one INSERT,
+    and the verification email in the outbox.
+    """
+    hashed_password = await get_password_hash(user_data.password)
+    verification_code = generate_verification_code()
+
+    # Insert the user unless the email is taken (no separate SELECT, no race)
+    stmt = (
+        pg_insert(User)
+        .values(
+            email=user_data.email,
+            hashed_password=hashed_password,
+            first_name=user_data.first_name,
+            last_name=user_data.last_name,
+            is_active=True,
+            is_verified=False,
+            verification_code=verification_code,
+        )
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User)
+    )
+    new_user = (await db.scalars(stmt)).one_or_none()
+    if new_user is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, 
             detail="Email already registered"
         )
 
-    # Create new user
-    hashed_password = get_password_hash(user_data.password)
-    new_user = User(
-        email=user_data.email,
-        hashed_password=hashed_password,
-        first_name=user_data.first_name,
-        last_name=user_data.last_name,
-        is_active=True,
-        is_verified=False,
-    )
-    db.add(new_user)
-    await db.commit()
-    await db.refresh(new_user)
+    # Create default settings for the new user
+    stmt = insert(Settings).values(user_id=new_user.id, **DEFAULT_SETTINGS).returning(Settings)
+    new_settings = (await db.scalars(stmt)).one()
 
     # Include user_id in token data for active token tracking
-    token_data = {"sub": new_user.email, "user_id": new_user.id}
-    
-    # Create tokens with database storage
-    access_token = await create_access_token(data=token_data, db=db)
-    refresh_token = await create_refresh_token(data=token_data, db=db)
+    token_data = {"sub": new_user.email, "user_id": new_user.id, "epoch": new_user.token_epoch}
+    access_token, refresh_token = await issue_token_pair(data=token_data, db=db, commit=False)
 
-    # Create default settings for the new user
-    await create_default_settings(new_user, db)
-    await db.commit()
-    await db.refresh(new_user)
+    # Queue the verification email; it goes out only if the registration commits
+    await send_registration_email_with_verification_code(new_user, verification_code, new_settings.language, db)
 
-    # Generate verification code and save the code to user
-    verification_code = generate_verification_code()
-    new_user.verification_code = verification_code
     await db.commit()
-    await db.refresh(new_user)
+    email_outbox_worker.wake()
 
-    # Send registration email for verification (commented out for now)
-    # send_registration_email_with_verification_code(new_user.email, verification_code)
+    # The client usually fetches these right away; serve them from the cache
+    await cache_profile(new_user)
+    await cache_settings(new_user.id, new_settings)
 
     # Return internal response with tokens
     return RegistrationResponse(
@@ -114,9 +128,16 @@ async def authenticate_user(
     result = await db.execute(stmt)
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(password, user.hashed_password):
+    if not user or not await verify_password(password, user.hashed_password):
         return None
 
+    # Upgrade hashes made with older argon2 parameters while we know the password
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = await get_password_hash(password)
+        await publish_user_changed(db, user.id)
+        await db.commit()
+        revocation_cache.invalidate_user(user.id)
+
     return user
 
 
@@ -141,11 +162,10 @@ async def login_user(user_data: UserLogin, db: AsyncSession) -> Tuple[str, str]:
         )
 
     # Include user_id in token data for active token tracking
-    token_data = {"sub": user.email, "user_id": user.id}
+    token_data = {"sub": user.email, "user_id": user.id, "epoch": user.token_epoch}
     
-    # Create tokens with database storage
-    access_token = await create_access_token(data=token_data, db=db)
-    refresh_token = await create_refresh_token(data=token_data, db=db)
+    # Create both tokens with a single INSERT and commit
+    access_token, refresh_token = await issue_token_pair(data=token_data, db=db)
 
     return access_token, refresh_token
 
@@ -171,10 +191,9 @@ async def refresh_access_token(
             detail="Invalid token payload"
         )
 
-    # Check if refresh token is blacklisted
-    stmt = select(BlacklistedToken).where(BlacklistedToken.token == refresh_token)
-    result = await db.execute(stmt)
-    if result.scalar_one_or_none():
+    # Check if refresh token is blacklisted (in the table, not the per-worker filter, to stop replays)
+    token_id = get_token_id(refresh_token, payload)
+    if (await token_store.get_state(db, token_id, use_filter=False)).is_blacklisted:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Refresh token has been revoked",
@@ -192,22 +211,25 @@ async def refresh_access_token(
         )
 
     # Include user_id in new tokens
-    token_data = {"sub": user.email, "user_id": user.id}
+    token_data = {"sub": user.email, "user_id": user.id, "epoch": user.token_epoch}
     
-    # Create new tokens with database storage
-    new_access_token = await create_access_token(data=token_data, db=db)
-    new_refresh_token = await create_refresh_token(data=token_data, db=db)
-
     # Blacklist old refresh token with token_type
-    blacklist_entry = BlacklistedToken(
-        token=refresh_token, 
-        token_type="refresh",  # ADD THIS
-        user_id=user.id, 
-        expires_at=get_token_expiry("refresh"),
-        reason="token_refresh"
+    blacklist_entry = {
+        "jti_hash": token_id,
+        "token_type": "refresh",
+        "user_id": user.id,
+        "expires_at": get_token_expiry("refresh"),
+        "reason": "token_refresh",
+    }
+    await publish_token_revoked(db, token_id, payload["exp"])
+
+    # New tokens and the blacklist entry are stored in one transaction
+    new_access_token, new_refresh_token = await issue_token_pair(
+        data=token_data, db=db, blacklist_entry=blacklist_entry
     )
-    db.add(blacklist_entry)
-    await db.commit()
+
+    # Reject the rotated refresh token locally as well
+    revocation_cache.revoke(token_id, payload["exp"])
 
     return new_access_token, new_refresh_token
 
@@ -217,28 +239,16 @@ async def refresh_access_token(
 # ============================================================
 async def logout_user(token: str, user: User, db: AsyncSession) -> None:
     """Logout user by blacklisting the token."""
-    # Remove from active tokens and get token type
-    stmt = select(ActiveToken).where(ActiveToken.token == token)
-    result = await db.execute(stmt)
-    active_token = result.scalar_one_or_none()
-    
-    token_type = "access"  # Default to access token
-    
-    if active_token:
-        token_type = active_token.token_type
-        await db.delete(active_token)
-    
-    # Add to blacklist with token_type
-    blacklist_entry = BlacklistedToken(
-        token=token, 
-        token_type=token_type,
-        user_id=user.id, 
-        expires_at=get_token_expiry("access"),
-        reason="logout"
-    )
-    db.add(blacklist_entry)
+    # Move the token from active to blacklisted (keeping its token_type)
+    token_id = get_token_id(token)
+    expires_at = get_token_expiry("access")
+    await token_store.revoke_token(db, token_id, user.id, expires_at, reason="logout")
+    await publish_token_revoked(db, token_id, expires_at.timestamp())
     await db.commit()
 
+    # Stop trusting the cached token in this worker right away
+    revocation_cache.revoke(token_id, expires_at.timestamp())
+
 
 # ============================================================
 # ✅ CREATE PASSWORD RESET LINK WITH THE RESET TOKEN ON IT
@@ -272,12 +282,12 @@ async def create_password_reset_link(
             expires_at=utcnow() + timedelta(hours=1),
         )
         db.add(reset_entry)
-        await db.commit()
-        await db.refresh(reset_entry)
 
-        # Generate and send the reset link
+        # Queue the reset link in the same transaction as its token
         reset_link = formulate_reset_link(reset_token)
-        send_reset_password_link_with_token_in_email(email, reset_link)
+        await send_reset_password_link_with_token_in_email(user, reset_link, db)
+        await db.commit()
+        email_outbox_worker.wake()
 
         return reset_link, reset_token
 
@@ -323,7 +333,7 @@ async def resetting_password(
             detail="User not found"
         )
 
-    user.hashed_password = get_password_hash(new_password)
+    user.hashed_password = await get_password_hash(new_password)
     reset_token.used = True
     
     # Use the new blacklist function to logout from all devices
@@ -340,18 +350,19 @@ async def update_password(
     user: User, current_password: str, new_password: str, db: AsyncSession
 ) -> None:
     """Change user password (requires current password)."""
-    if not verify_password(current_password, user.hashed_password):
+    if not await verify_password(current_password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect",
         )
 
-    user.hashed_password = get_password_hash(new_password)
+    user.hashed_password = await get_password_hash(new_password)
     
     # Use the new blacklist function to logout from all devices
     await blacklist_all_user_tokens(user.id, db, reason="password_change")
     
     await db.commit()
+    await cache_profile(user)
 
 
 # ============================================================
@@ -368,4 +379,9 @@ async def verify_email_with_code(
         )
 
     user.is_verified = True
-    await db.commit()
\ No newline at end of file
+    await publish_user_changed(db, user.id)
+    await db.commit()
+
+    # The cached user row is now stale
+    revocation_cache.invalidate_user(user.id)
+    await cache_profile(user)
\ No newline at end of file
@@ -0,0 +1,452 @@
+# app/authentication/token_store.py
+"""
+Where active and blacklisted token ids live.
+
+- `sql` (default): the active_tokens / blacklisted_token tables. Writes join the
+  caller's transaction and expired rows are removed by the cleanup job.
+- `redis`: one key per token with a native TTL equal to the token's remaining
+  lifetime, so nothing needs cleaning up. Shared by every worker and node.
+- `memory`: the same key-value layout in process memory. For tests and single
+  process development only: other workers never see its tokens.
+
+Key-value writes are applied immediately, not when the caller's transaction
+commits; a rolled-back login leaves unused token ids behind until they expire.
+"""
+
+from app.authentication.partitions import partitioning_enabled, drop_expired_token_partitions, ensure_partitions_for
+from app.authentication.models import ActiveToken, BlacklistedToken
+from app.authentication.bloom import blacklist_filter
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy import select, insert, delete, exists, literal, false
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.monitoring.metrics import register_metrics
+from datetime import datetime, timedelta
+from app.core.config import settings
+from app.helpers.time import utcnow
+from app.users.models import User
+import asyncio
+import time
+
+# A token record: {"jti_hash", "user_id", "token_type", "expires_at"} (+ "reason" when blacklisting)
+TokenRecord = Dict[str, Any]
+
+
+class TokenState(NamedTuple):
+    is_active: bool
+    is_blacklisted: bool
+
+
+class TokenUserLookup(NamedTuple):
+    user: User
+    is_active_token: bool
+    is_blacklisted: bool
+
+
+# ============================================================
+# ✅ SQL Token Store
+# ============================================================
+class SqlTokenStore:
+    """Token ids in Postgres (see app/authentication/models.py)."""
+
+    name = "sql"
+    needs_cleanup = True
+
+    @staticmethod
+    def _is_active(token_id: bytes):
+        return exists().where(ActiveToken.jti_hash == token_id, ActiveToken.expires_at > utcnow())
+
+    @staticmethod
+    def _is_blacklisted(token_id: bytes, use_filter: bool = True):
+        # Most tokens are not blacklisted; the per-worker Bloom filter lets those skip the lookup.
+        # It only learns about other workers' revocations once their NOTIFY arrives, so callers
+        # that must not accept a just-rotated refresh token pass use_filter=False.
+        if use_filter and not blacklist_filter.might_contain(token_id):
+            return false()
+        return exists().where(BlacklistedToken.jti_hash == token_id)
+
+    async def add_active(self, db: AsyncSession, records: List[TokenRecord]) -> None:
+        """Store newly issued tokens (one multi-row INSERT, committed by the caller)."""
+        if partitioning_enabled():
+            await ensure_partitions_for([record["expires_at"] for record in records])
+        await db.execute(insert(ActiveToken).values(records))
+
+    async def get_state(self, db: AsyncSession, token_id: bytes, use_filter: bool = True) -> TokenState:
+        stmt = select(self._is_active(token_id), self._is_blacklisted(token_id, use_filter))
+        return TokenState(*(await db.execute(stmt)).one())
+
+    async def is_blacklisted(self, db: AsyncSession, token_id: bytes) -> bool:
+        """Blacklist check alone (stateless access tokens); no query when the Bloom filter rules the token out."""
+        if not blacklist_filter.might_contain(token_id):
+            return False
+        return bool(await db.scalar(select(exists().where(BlacklistedToken.jti_hash == token_id))))
+
+    async def load_token_user(
+        self, email: str, token_id: bytes, db: AsyncSession, use_filter: bool = True
+    ) -> Optional[TokenUserLookup]:
+        """
+        The user for `email` and the token state in ONE statement. None when the user does not exist.
+        use_filter=False always checks the blacklist table (refresh tokens, see _is_blacklisted).
+        """
+        stmt = select(
+            User,
+            self._is_active(token_id).label("is_active_token"),
+            self._is_blacklisted(token_id, use_filter).label("is_blacklisted"),
+        ).where(User.email == email)
+        row = (await db.execute(stmt)).one_or_none()
+        if row is None:
+            return None
+        return TokenUserLookup(*row)
+
+    async def blacklist(self, db: AsyncSession, record: TokenRecord) -> None:
+        """Blacklist a token (e.g. a rotated refresh token), committed by the caller."""
+        if partitioning_enabled():
+            await ensure_partitions_for([record["expires_at"]])
+        db.add(BlacklistedToken(**record))
+        blacklist_filter.add(record["jti_hash"])
+
+    async def revoke_token(self, db: AsyncSession, token_id: bytes, user_id: int, expires_at: datetime, reason: str) -> None:
+        """Move one token from active to blacklisted, committed by the caller."""
+        stmt = select(ActiveToken).where(ActiveToken.jti_hash == token_id)
+        active_token = (await db.execute(stmt)).scalar_one_or_none()
+
+        token_type = "access"  # Default to access token
+        if active_token:
+            token_type = active_token.token_type
+            await db.delete(active_token)
+
+        await self.blacklist(db, {
+            "jti_hash": token_id,
+            "token_type": token_type,
+            "user_id": user_id,
+            "expires_at": expires_at,
+            "reason": reason,
+        })
+
+    async def revoke_user_tokens(self, db: AsyncSession, user_id: int, reason: str) -> int:
+        """
+        Blacklist every unexpired active token of a user in ONE statement: a DELETE ... RETURNING
+        feeding an INSERT ... SELECT. Committed by the caller. Returns the number blacklisted.
+        """
+        now = utcnow()
+        moved = (
+            delete(ActiveToken)
+            .where(ActiveToken.user_id == user_id)
+            .returning(
+                ActiveToken.jti_hash,
+                ActiveToken.token_type,
+                ActiveToken.user_id,
+                ActiveToken.expires_at,
+            )
+            .cte("moved")
+        )
+        stmt = pg_insert(BlacklistedToken).from_select(
+            ["jti_hash", "token_type", "user_id", "blacklisted_at", "expires_at", "reason"],
+            select(
+                moved.c.jti_hash,
+                moved.c.token_type,
+                moved.c.user_id,
+                literal(now, BlacklistedToken.blacklisted_at.type),
+                moved.c.expires_at,
+                literal(reason),
+            ).where(moved.c.expires_at > now),
+        ).on_conflict_do_nothing().returning(BlacklistedToken.jti_hash)
+        blacklisted = (await db.execute(stmt)).scalars().all()
+        for token_id in blacklisted:
+            blacklist_filter.add(token_id)
+        return len(blacklisted)
+
+    async def cleanup(self, db: AsyncSession, batch_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Delete expired rows in batches of `batch_size` picked with FOR UPDATE SKIP LOCKED,
+        each batch in its own short transaction, yielding to the event loop in between,
+        so memory stays flat and locks are never held for long. Returns run statistics.
+
+        With TOKEN_PARTITION_INTERVAL set, whole expired partitions are dropped instead.
+        """
+        started = time.perf_counter()
+        if partitioning_enabled():
+            stats = await drop_expired_token_partitions(db)
+            stats["duration_seconds"] = round(time.perf_counter() - started, 3)
+            print(
+                f"Expired token partitions dropped: {stats['partitions_dropped']} "
+                f"(~{stats['rows_removed']} rows) | {stats['duration_seconds']}s | {utcnow()}"
+            )
+            return stats
+
+        batch_size = batch_size or settings.TOKEN_CLEANUP_BATCH_SIZE
+        removed: Dict[str, int] = {}
+
+        for model in (ActiveToken, BlacklistedToken):
+            removed[model.__tablename__] = 0
+            while True:
+                batch = (
+                    select(model.id)
+                    .where(model.expires_at <= utcnow())
+                    .limit(batch_size)
+                    .with_for_update(skip_locked=True)
+                    .scalar_subquery()
+                )
+                stmt = (
+                    delete(model)
+                    .where(model.id.in_(batch))
+                    .execution_options(synchronize_session=False)
+                )
+                result = await db.execute(stmt)
+                await db.commit()
+
+                removed[model.__tablename__] += result.rowcount
+                if result.rowcount < batch_size:
+                    break
+                await asyncio.sleep(settings.TOKEN_CLEANUP_BATCH_PAUSE)
+
+        elapsed = time.perf_counter() - started
+        total = sum(removed.values())
+        stats = {
+            "rows_removed": total,
+            "active_tokens": removed[ActiveToken.__tablename__],
+            "blacklisted_token": removed[BlacklistedToken.__tablename__],
+            "duration_seconds": round(elapsed, 3),
+            "rows_per_second": round(total / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+        print(
+            f"Expired tokens cleaned | active: {stats['active_tokens']} | blacklisted: {stats['blacklisted_token']} "
+            f"| {stats['duration_seconds']}s ({stats['rows_per_second']} rows/s) | {utcnow()}"
+        )
+        return stats
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+# ============================================================
+# ✅ In-Memory Key-Value Client (Redis command subset)
+# ============================================================
+class MemoryKeyValue:
+    """
+    The few Redis commands the key-value token store uses, with the same
+    signatures and millisecond TTLs, backed by a dict. Expired keys are dropped lazily.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Any, Optional[float]]] = {}
+
+    def _live(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, deadline = entry
+        if deadline is not None and deadline <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._live(key)
+
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        return [self._live(key) for key in keys]
+
+    async def set(self, key: str, value: str, px: Optional[int] = None) -> bool:
+        self._data[key] = (value, time.monotonic() + px / 1000 if px else None)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+    async def sadd(self, key: str, *members: str) -> int:
+        current: Set[str] = self._live(key) or set()
+        added = len(set(members) - current)
+        deadline = self._data[key][1] if key in self._data else None
+        self._data[key] = (current | set(members), deadline)
+        return added
+
+    async def srem(self, key: str, *members: str) -> int:
+        current: Set[str] = self._live(key) or set()
+        removed = len(current & set(members))
+        if key in self._data:
+            self._data[key] = (current - set(members), self._data[key][1])
+        return removed
+
+    async def smembers(self, key: str) -> Set[str]:
+        return set(self._live(key) or ())
+
+    async def scard(self, key: str) -> int:
+        return len(self._live(key) or ())
+
+    async def pexpire(self, key: str, ms: int) -> bool:
+        if self._live(key) is None:
+            return False
+        self._data[key] = (self._data[key][0], time.monotonic() + ms / 1000)
+        return True
+
+    def pipeline(self, transaction: bool = True) -> "MemoryPipeline":
+        return MemoryPipeline(self)
+
+    def size(self) -> int:
+        return len(self._data)
+
+
+class MemoryPipeline:
+    """Queues commands like a redis-py pipeline and runs them on execute()."""
+
+    def __init__(self, client: MemoryKeyValue):
+        self._client = client
+        self._commands: List[Tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, command: str):
+        def queue(*args, **kwargs):
+            self._commands.append((command, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self) -> List[Any]:
+        commands, self._commands = self._commands, []
+        return [await getattr(self._client, command)(*args, **kwargs) for command, args, kwargs in commands]
+
+
+# ============================================================
+# ✅ Key-Value Token Store
+# ============================================================
+class KeyValueTokenStore:
+    """
+    Token ids as keys that expire with the tokens themselves:
+
+        {prefix}a:{id}     active token      -> "user_id:token_type:exp"
+        {prefix}b:{id}     blacklisted token -> reason
+        {prefix}u:{user}   set of the user's active token ids (for revoke-all)
+
+    Works with a redis.asyncio client (decode_responses=True) or MemoryKeyValue.
+    """
+
+    needs_cleanup = False
+    # Above this many ids, a user's index is pruned of tokens that expired on their own
+    USER_INDEX_PRUNE_AT = 256
+
+    def __init__(self, client, name: str, prefix: str = "tokens:"):
+        self.client = client
+        self.name = name
+        self.prefix = prefix
+
+    def _active_key(self, token_id: bytes) -> str:
+        return f"{self.prefix}a:{token_id.hex()}"
+
+    def _blacklist_key(self, token_id: bytes) -> str:
+        return f"{self.prefix}b:{token_id.hex()}"
+
+    def _user_key(self, user_id: int) -> str:
+        return f"{self.prefix}u:{user_id}"
+
+    @staticmethod
+    def _ttl_ms(expires_at: datetime) -> int:
+        return int((expires_at - utcnow()).total_seconds() * 1000)
+
+    async def add_active(self, db: AsyncSession, records: List[TokenRecord]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for record in records:
+            ttl = self._ttl_ms(record["expires_at"])
+            if ttl <= 0:
+                continue
+            value = f"{record['user_id']}:{record['token_type']}:{record['expires_at'].timestamp()}"
+            pipe.set(self._active_key(record["jti_hash"]), value, px=ttl)
+            pipe.sadd(self._user_key(record["user_id"]), record["jti_hash"].hex())
+            pipe.pexpire(self._user_key(record["user_id"]), self._user_index_ttl_ms())
+        await pipe.execute()
+        for user_id in {record["user_id"] for record in records}:
+            if await self.client.scard(self._user_key(user_id)) > self.USER_INDEX_PRUNE_AT:
+                await self._prune_user_index(user_id)
+
+    @staticmethod
+    def _user_index_ttl_ms() -> int:
+        """Outlive every token the index can hold."""
+        longest = max(timedelta(days=settings.REFRESH_TOKEN_EXPIRY), timedelta(minutes=settings.ACCESS_TOKEN_EXPIRY))
+        return int(longest.total_seconds() * 1000)
+
+    async def _prune_user_index(self, user_id: int) -> None:
+        members = sorted(await self.client.smembers(self._user_key(user_id)))
+        values = await self.client.mget([self._active_key(bytes.fromhex(member)) for member in members])
+        expired = [member for member, value in zip(members, values) if value is None]
+        if expired:
+            await self.client.srem(self._user_key(user_id), *expired)
+
+    async def get_state(self, db: AsyncSession, token_id: bytes, use_filter: bool = True) -> TokenState:
+        # use_filter is accepted for interface parity; the shared store is always exact
+        active, blacklisted = await self.client.mget([self._active_key(token_id), self._blacklist_key(token_id)])
+        return TokenState(active is not None, blacklisted is not None)
+
+    async def is_blacklisted(self, db: AsyncSession, token_id: bytes) -> bool:
+        return await self.client.get(self._blacklist_key(token_id)) is not None
+
+    async def load_token_user(
+        self, email: str, token_id: bytes, db: AsyncSession, use_filter: bool = True
+    ) -> Optional[TokenUserLookup]:
+        """The token state from the store, the user from the database. None when the user does not exist."""
+        state = await self.get_state(db, token_id)
+        user = (await db.execute(select(User).where(User.email == email))).scalar_one_or_none()
+        if user is None:
+            return None
+        return TokenUserLookup(user, state.is_active, state.is_blacklisted)
+
+    async def blacklist(self, db: AsyncSession, record: TokenRecord) -> None:
+        ttl = self._ttl_ms(record["expires_at"])
+        if ttl > 0:
+            await self.client.set(self._blacklist_key(record["jti_hash"]), record.get("reason") or "", px=ttl)
+
+    async def revoke_token(self, db: AsyncSession, token_id: bytes, user_id: int, expires_at: datetime, reason: str) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.delete(self._active_key(token_id))
+        pipe.srem(self._user_key(user_id), token_id.hex())
+        ttl = self._ttl_ms(expires_at)
+        if ttl > 0:
+            pipe.set(self._blacklist_key(token_id), reason, px=ttl)
+        await pipe.execute()
+
+    async def revoke_user_tokens(self, db: AsyncSession, user_id: int, reason: str) -> int:
+        members = sorted(await self.client.smembers(self._user_key(user_id)))
+        if not members:
+            return 0
+        active_keys = [self._active_key(bytes.fromhex(member)) for member in members]
+        values = await self.client.mget(active_keys)
+
+        now = time.time()
+        pipe = self.client.pipeline(transaction=False)
+        blacklisted = 0
+        for member, value in zip(members, values):
+            if value is None:
+                continue  # Already expired
+            ttl = int((float(value.rsplit(":", 1)[1]) - now) * 1000)
+            if ttl > 0:
+                pipe.set(self._blacklist_key(bytes.fromhex(member)), reason, px=ttl)
+                blacklisted += 1
+        pipe.delete(*active_keys, self._user_key(user_id))
+        await pipe.execute()
+        return blacklisted
+
+    async def cleanup(self, db: AsyncSession, batch_size: Optional[int] = None) -> Dict[str, Any]:
+        """Nothing to do: keys expire on their own."""
+        return {"rows_removed": 0}
+
+    def stats(self) -> Dict[str, Any]:
+        size = getattr(self.client, "size", None)
+        return {"backend": self.name, "keys": size() if size else -1}
+
+
+def build_token_store():
+    if settings.TOKEN_STORE_BACKEND == "sql":
+        return SqlTokenStore()
+    if settings.TOKEN_STORE_BACKEND == "redis":
+        if not settings.TOKEN_STORE_REDIS_URL:
+            raise RuntimeError("TOKEN_STORE_BACKEND=redis requires TOKEN_STORE_REDIS_URL")
+        try:
+            from redis import asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError("TOKEN_STORE_BACKEND=redis requires the 'redis' package") from e
+        return KeyValueTokenStore(aioredis.from_url(settings.TOKEN_STORE_REDIS_URL, decode_responses=True), name="redis")
+    if settings.TOKEN_STORE_BACKEND == "memory":
+        return KeyValueTokenStore(MemoryKeyValue(), name="memory")
+    raise ValueError(f"Invalid TOKEN_STORE_BACKEND: {settings.TOKEN_STORE_BACKEND}")
+
+
+# Per-process instance (the redis backend itself is shared)
+token_store = build_token_store()
+register_metrics("token_store", token_store.stats)
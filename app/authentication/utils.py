@@ -1,50 +1,48 @@
 # app/authentication/utils.py
 
-from app.core.config import settings
-from fastapi import HTTPException
-import resend
-import os
+from app.user_settings.models import Settings
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.emails.outbox import enqueue_template
+from app.users.models import User
+from sqlalchemy import select
+from typing import Optional
 
 
-resend.api_key = settings.RESEND_API_KEY
+# =================================================
+# ✅ get the email locale of a user
+# =================================================
+async def get_user_locale(user_id: int, db: AsyncSession) -> Optional[str]:
+    result = await db.execute(select(Settings.language).where(Settings.user_id == user_id))
+    return result.scalar_one_or_none()
 
-# hard coded name for now
-first_name = "First Name"
 
 # =================================================
 # ✅ send registration email with verification code
 # =================================================
-def send_registration_email_with_verification_code(email, verification_code):
-    r = resend.Emails.send(
-        {
-            "from": "support@medivarse.com",
-            "to": email,
-            "subject": "Verify your email!",
-            "html": f"<p>Hello {first_name}.\
-        Welcome to Simbatec.\
-        To verify your account, use the code below when prompted to enter your verification code.\
-        This code is meant to not be shared to anyone"
-            f"<strong> {verification_code} </strong>"
-            f"<strong> Simbatec </strong>",
-        }
+# Both emails are rendered from app/emails/templates and queued in the caller's
+# transaction (see app/emails/outbox.py)
+async def send_registration_email_with_verification_code(user: User, verification_code: str, locale: Optional[str], db: AsyncSession):
+    await enqueue_template(
+        db,
+        to=user.email,
+        template="verify_email",
+        locale=locale,
+        first_name=user.first_name,
+        verification_code=verification_code,
     )
 
 
 # =================================================
 # ✅ send reset password link with token in email
 # =================================================
-def send_reset_password_link_with_token_in_email(email, reset_link):
-    r = resend.Emails.send(
-        {
-            "from": "support@medivarse.com",
-            "to": email,
-            "subject": "Reset your password!",
-            "html": f"<p> Hello [{first_name}  We are sorry to hear that you have been having trouble logging in on  our Simbatec.\
-          To resett your password, click the link below</p>"
-            f"<p>{reset_link}</p>"
-            "You can only use this link once, not to be shared to anyone"
-            f"<strong> Simbatec </strong>",
-        }
+async def send_reset_password_link_with_token_in_email(user: User, reset_link: str, db: AsyncSession):
+    await enqueue_template(
+        db,
+        to=user.email,
+        template="reset_password",
+        locale=await get_user_locale(user.id, db),
+        first_name=user.first_name,
+        reset_link=reset_link,
     )
 
 
@@ -16,12 +16,37 @@ class Settings(BaseSettings):
     DB_HOST: str = Field(default="localhost", env="DB_HOST")
     DB_PORT: str = Field(default="5432", env="DB_PORT")
     DB_NAME: str = Field(..., env="DB_NAME")
+
+    # Connection Pool Settings (per worker process)
+    DB_POOL_SIZE: int = Field(default=20, env="DB_POOL_SIZE")  # Connections kept open
+    DB_MAX_OVERFLOW: int = Field(default=10, env="DB_MAX_OVERFLOW")  # Extra connections allowed during bursts
+    DB_POOL_TIMEOUT: float = Field(default=10, env="DB_POOL_TIMEOUT")  # Seconds to wait for a free connection before erroring
+    DB_POOL_RECYCLE: int = Field(default=1800, env="DB_POOL_RECYCLE")  # Seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = Field(default=True, env="DB_POOL_PRE_PING")  # Check connections on checkout
+    DB_STATEMENT_CACHE_SIZE: int = Field(default=100, env="DB_STATEMENT_CACHE_SIZE")  # Prepared statements cached per connection
+    # Behind PgBouncer in transaction mode: no app-side pool, no prepared statement caching
+    DB_PGBOUNCER: bool = Field(default=False, env="DB_PGBOUNCER")
+    # Postgres itself (not PgBouncer) for the long-lived session connections: the event bus
+    # LISTEN and the maintenance leader's advisory lock. Unset: DB_HOST/DB_PORT.
+    DB_DIRECT_HOST: Optional[str] = Field(default=None, env="DB_DIRECT_HOST")
+    DB_DIRECT_PORT: Optional[str] = Field(default=None, env="DB_DIRECT_PORT")  # Defaults to 5432 with DB_DIRECT_HOST
+
+    # Read Replica Settings (optional; GET handlers using get_read_db are served from it)
+    DB_REPLICA_URL: Optional[str] = Field(default=None, env="DB_REPLICA_URL")  # postgresql+asyncpg://...
+    DB_REPLICA_STICKY_SECONDS: int = Field(default=10, env="DB_REPLICA_STICKY_SECONDS")  # Reads stay on primary this long after a write
     
     # JWT Settings
     SECRET_KEY: str = Field(..., env="SECRET_KEY")
-    ALGORITHM: str = Field(default="HS256", env="ALGORITHM")
+    ALGORITHM: str = Field(default="HS256", env="ALGORITHM")  # HS256 (SECRET_KEY), or ES256/RS256 (key ring, see app/authentication/keys.py)
+    JWT_KEYS_DIR: Optional[str] = Field(default=None, env="JWT_KEYS_DIR")  # <kid>.pem private keys for ES256/RS256
+    JWT_KEYS_RELOAD_INTERVAL: int = Field(default=60, env="JWT_KEYS_RELOAD_INTERVAL")  # Seconds between re-reads of JWT_KEYS_DIR (0 = startup only)
+    JWKS_MAX_AGE: int = Field(default=3600, env="JWKS_MAX_AGE")  # Seconds verifiers may cache /.well-known/jwks.json
+    JWT_BACKEND: str = Field(default="jose", env="JWT_BACKEND")  # jose or cryptography (faster, see app/authentication/jwt_backend.py)
     ACCESS_TOKEN_EXPIRY: int = Field(default=30, env="ACCESS_TOKEN_EXPIRY")
     REFRESH_TOKEN_EXPIRY: int = Field(default=60, env="REFRESH_TOKEN_EXPIRY")
+    # Stateless access tokens are not stored; they stay valid until expiry unless the
+    # user's token_epoch is bumped, so keep ACCESS_TOKEN_EXPIRY short when enabling this.
+    STATELESS_ACCESS_TOKENS: bool = Field(default=False, env="STATELESS_ACCESS_TOKENS")
     
     # URLs
     BASE_URL: str = Field(..., env="BASE_URL")
@@ -29,6 +54,21 @@ class Settings(BaseSettings):
     
     # Email Settings
     RESEND_API_KEY: str = Field(..., env="RESEND_API_KEY")
+    EMAIL_FROM: str = Field(default="support@medivarse.com", env="EMAIL_FROM")
+    EMAIL_PROVIDER: str = Field(default="resend", env="EMAIL_PROVIDER")  # 'resend' or 'fake' (keeps emails in memory)
+    EMAIL_DEFAULT_LOCALE: str = Field(default="en", env="EMAIL_DEFAULT_LOCALE")  # Used when a user's language has no templates
+
+    # Email Outbox Settings (emails are queued in the DB and delivered by a background worker)
+    EMAIL_WORKER_ENABLED: bool = Field(default=True, env="EMAIL_WORKER_ENABLED")  # Run the delivery worker in this process
+    EMAIL_WORKER_BATCH_SIZE: int = Field(default=100, env="EMAIL_WORKER_BATCH_SIZE")  # Rows claimed per round
+    EMAIL_WORKER_CONCURRENCY: int = Field(default=4, env="EMAIL_WORKER_CONCURRENCY")  # Provider requests in flight
+    EMAIL_WORKER_RATE_LIMIT: float = Field(default=2.0, env="EMAIL_WORKER_RATE_LIMIT")  # Provider requests per second per process (0 = unlimited)
+    EMAIL_WORKER_POLL_INTERVAL: float = Field(default=2.0, env="EMAIL_WORKER_POLL_INTERVAL")  # Seconds
+    EMAIL_MAX_ATTEMPTS: int = Field(default=5, env="EMAIL_MAX_ATTEMPTS")
+    EMAIL_RETRY_BACKOFF: int = Field(default=30, env="EMAIL_RETRY_BACKOFF")  # Seconds before the first retry, doubled each time
+    EMAIL_CLAIM_LEASE: int = Field(default=120, env="EMAIL_CLAIM_LEASE")  # Seconds before a claimed but unconfirmed email is retried
+    EMAIL_OUTBOX_RETENTION_DAYS: int = Field(default=7, env="EMAIL_OUTBOX_RETENTION_DAYS")  # Sent emails kept this long
+    EMAIL_OUTBOX_CLEANUP_INTERVAL: int = Field(default=3600, env="EMAIL_OUTBOX_CLEANUP_INTERVAL")  # Seconds
     
     # Cookie Settings
     COOKIE_DOMAIN: Optional[str] = Field(default=None, env="COOKIE_DOMAIN")
@@ -37,6 +77,53 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_COOKIE_NAME: str = Field(default="access_token", env="ACCESS_TOKEN_COOKIE_NAME")
     REFRESH_TOKEN_COOKIE_NAME: str = Field(default="refresh_token", env="REFRESH_TOKEN_COOKIE_NAME")
 
+    # Password Hashing Settings (argon2 runs off the event loop)
+    PASSWORD_HASH_EXECUTOR: str = Field(default="thread", env="PASSWORD_HASH_EXECUTOR")  # 'thread' or 'process'
+    PASSWORD_HASH_WORKERS: int = Field(default=4, env="PASSWORD_HASH_WORKERS")
+    PASSWORD_HASH_MAX_QUEUE: int = Field(default=64, env="PASSWORD_HASH_MAX_QUEUE")  # Jobs waiting beyond this get a 503
+    # argon2 cost, tuned per node class with `python -m app.authentication.calibrate` (unset = library defaults)
+    ARGON2_TIME_COST: Optional[int] = Field(default=None, env="ARGON2_TIME_COST")
+    ARGON2_MEMORY_COST: Optional[int] = Field(default=None, env="ARGON2_MEMORY_COST")  # KiB per hash
+    ARGON2_PARALLELISM: Optional[int] = Field(default=None, env="ARGON2_PARALLELISM")
+
+    # Token Store Settings (where active/blacklisted token ids live)
+    TOKEN_STORE_BACKEND: str = Field(default="sql", env="TOKEN_STORE_BACKEND")  # 'sql', 'redis' (TTL keys, no cleanup job) or 'memory' (tests)
+    TOKEN_STORE_REDIS_URL: Optional[str] = Field(default=None, env="TOKEN_STORE_REDIS_URL")  # e.g. redis://localhost:6379/1
+
+    # Token Cleanup Settings
+    TOKEN_CLEANUP_BATCH_SIZE: int = Field(default=1000, env="TOKEN_CLEANUP_BATCH_SIZE")  # Rows deleted per transaction
+    TOKEN_CLEANUP_BATCH_PAUSE: float = Field(default=0.0, env="TOKEN_CLEANUP_BATCH_PAUSE")  # Seconds to yield between batches
+    # Range-partition token tables by expires_at ('day' or 'hour'); expiry then drops whole partitions
+    TOKEN_PARTITION_INTERVAL: Optional[str] = Field(default=None, env="TOKEN_PARTITION_INTERVAL")
+    TOKEN_PARTITION_PREMAKE: int = Field(default=3, env="TOKEN_PARTITION_PREMAKE")  # Spare partitions kept beyond the longest token lifetime
+
+    # Maintenance Scheduler Settings (jobs run on one leader worker, elected via a Postgres advisory lock)
+    MAINTENANCE_LOCK_KEY: int = Field(default=72001, env="MAINTENANCE_LOCK_KEY")  # Advisory lock id, unique per deployment sharing a DB
+    MAINTENANCE_ELECTION_INTERVAL: int = Field(default=15, env="MAINTENANCE_ELECTION_INTERVAL")  # Seconds between leader checks
+    MAINTENANCE_JITTER: int = Field(default=60, env="MAINTENANCE_JITTER")  # Max seconds of random delay per job run
+    TOKEN_CLEANUP_INTERVAL: int = Field(default=3600, env="TOKEN_CLEANUP_INTERVAL")  # Seconds
+    TOKEN_PARTITION_MAINTENANCE_INTERVAL: int = Field(default=3600, env="TOKEN_PARTITION_MAINTENANCE_INTERVAL")  # Seconds
+
+    # Revocation Cache Settings (per worker process)
+    REVOCATION_CACHE_ENABLED: bool = Field(default=True, env="REVOCATION_CACHE_ENABLED")
+    REVOCATION_CACHE_TTL: int = Field(default=30, env="REVOCATION_CACHE_TTL")  # Seconds, upper bound for cross-worker revocation lag
+    REVOCATION_CACHE_MAX_SIZE: int = Field(default=10000, env="REVOCATION_CACHE_MAX_SIZE")
+    # Decoded claims of recently verified tokens, until their exp (per worker)
+    VERIFIED_TOKEN_CACHE_ENABLED: bool = Field(default=True, env="VERIFIED_TOKEN_CACHE_ENABLED")
+    VERIFIED_TOKEN_CACHE_MAX_SIZE: int = Field(default=10000, env="VERIFIED_TOKEN_CACHE_MAX_SIZE")  # Entries
+    REVOCATION_BUS_ENABLED: bool = Field(default=True, env="REVOCATION_BUS_ENABLED")  # Push revocations to all workers via LISTEN/NOTIFY
+    # Bloom filter over blacklisted token ids (per worker, needs the revocation bus and the sql token store)
+    BLACKLIST_FILTER_ENABLED: bool = Field(default=True, env="BLACKLIST_FILTER_ENABLED")
+    BLACKLIST_FILTER_FP_RATE: float = Field(default=0.01, env="BLACKLIST_FILTER_FP_RATE")  # Share of clean tokens still checked in the DB
+    BLACKLIST_FILTER_REBUILD_INTERVAL: int = Field(default=3600, env="BLACKLIST_FILTER_REBUILD_INTERVAL")  # Seconds, drops expired ids
+
+    # Profile/Settings Cache Settings (write-through on updates)
+    PROFILE_CACHE_ENABLED: bool = Field(default=True, env="PROFILE_CACHE_ENABLED")
+    PROFILE_CACHE_BACKEND: str = Field(default="memory", env="PROFILE_CACHE_BACKEND")  # 'memory' (per worker) or 'redis' (shared)
+    PROFILE_CACHE_REDIS_URL: Optional[str] = Field(default=None, env="PROFILE_CACHE_REDIS_URL")  # e.g. redis://localhost:6379/0
+    PROFILE_CACHE_TTL: int = Field(default=300, env="PROFILE_CACHE_TTL")  # Seconds
+    PROFILE_CACHE_MAX_SIZE: int = Field(default=10000, env="PROFILE_CACHE_MAX_SIZE")  # Entries (memory backend)
+
     @model_validator(mode='after')
     def adjust_for_environment(self):
         """Automatically adjust settings based on ENVIRONMENT variable from .env file"""
@@ -54,6 +141,16 @@ class Settings(BaseSettings):
         
         return self
 
+    @model_validator(mode='after')
+    def require_direct_host_behind_pgbouncer(self):
+        """LISTEN and session advisory locks do not survive PgBouncer transaction pooling."""
+        if self.DB_PGBOUNCER and not self.DB_DIRECT_HOST:
+            raise ValueError(
+                "DB_PGBOUNCER=True requires DB_DIRECT_HOST (and DB_DIRECT_PORT if not 5432): the event bus "
+                "and the maintenance leader lock need a session connection straight to Postgres"
+            )
+        return self
+
     @property
     def DB_URL(self) -> str:
         """Async URL for your FastAPI application"""
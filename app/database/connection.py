@@ -1,20 +1,140 @@
 # app/database/connection.py
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from contextlib import asynccontextmanager
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+from typing import Any, Callable, Deque, Dict, List, Optional
+from app.monitoring.metrics import register_metrics
 from sqlalchemy.orm import declarative_base
+from fastapi import Request
+from sqlalchemy import event, exc, text
 from app.core.config import settings
+from collections import deque
+from uuid import uuid4
+import asyncpg
+import asyncio
+import time
+import json
 
 
 
 # For async operations, use create_async_engine and make sure your DB_URL starts with postgresql+asyncpg://
 DATABASE_URL = settings.DB_URL
 
+
+# ===========================================
+# ✅ Connection Pool (instrumented)
+# ===========================================
+class PoolMetrics:
+    """Checkout counts and time spent waiting for a free pooled connection."""
+
+    def __init__(self, engine: AsyncEngine):
+        self._engine = engine
+        self.checkouts = 0
+        self.connects = 0
+        self.timeouts = 0
+        self._waits_ms: Deque[float] = deque(maxlen=1000)
+        self._wait_ms_max = 0.0
+
+    def record_wait(self, wait_ms: float) -> None:
+        self._waits_ms.append(wait_ms)
+        self._wait_ms_max = max(self._wait_ms_max, wait_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        pool = self._engine.sync_engine.pool
+        waits = sorted(self._waits_ms)
+
+        def pct(p: float) -> float:
+            return round(waits[min(len(waits) - 1, int(len(waits) * p))], 3) if waits else 0.0
+
+        stats = {
+            "pool": type(pool).__name__,
+            "checkouts": self.checkouts,
+            "connects": self.connects,
+            "timeouts": self.timeouts,
+            "wait_ms_p50": pct(0.50),
+            "wait_ms_p99": pct(0.99),
+            "wait_ms_max": round(self._wait_ms_max, 3),
+        }
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            stats.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+        return stats
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that times how long each checkout waits for a connection."""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.timeouts += 1
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.record_wait((time.perf_counter() - started) * 1000)
+
+    def recreate(self):
+        pool = super().recreate()  # engine.dispose() swaps in a fresh pool
+        pool.metrics = self.metrics
+        return pool
+
+
+def engine_options() -> Dict[str, Any]:
+    """create_async_engine() keyword arguments from settings."""
+    if settings.DB_PGBOUNCER:
+        # PgBouncer (transaction mode) does the pooling and cannot keep prepared statements
+        # across transactions, so disable both asyncpg statement caches and use unique names.
+        return {
+            "poolclass": NullPool,
+            "connect_args": {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            },
+        }
+    return {
+        "poolclass": InstrumentedAsyncPool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+    }
+
+
+def instrument_engine(engine: AsyncEngine) -> PoolMetrics:
+    """Attach checkout/connect counters and, for InstrumentedAsyncPool, wait timing."""
+    metrics = PoolMetrics(engine)
+    pool = engine.sync_engine.pool
+    if isinstance(pool, InstrumentedAsyncPool):
+        pool.metrics = metrics
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.checkouts += 1
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        metrics.connects += 1
+
+    return metrics
+
+
 # Create async engine
 engine = create_async_engine(
     DATABASE_URL,
     future=True,
+    **engine_options(),
     # echo=True,
 )
+pool_metrics = instrument_engine(engine)
+register_metrics("db_pool", pool_metrics.stats)
 
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
@@ -25,21 +145,232 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+# Same pool, but connections run in AUTOCOMMIT: no BEGIN/COMMIT/ROLLBACK round trips for read-only requests
+read_only_engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+ReadOnlySessionLocal = async_sessionmaker(
+    read_only_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+)
+
+READ_ONLY_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Optional read replica (DB_REPLICA_URL): same pool settings, always AUTOCOMMIT
+replica_engine: Optional[AsyncEngine] = None
+ReplicaSessionLocal: Optional[async_sessionmaker] = None
+if settings.DB_REPLICA_URL:
+    replica_engine = create_async_engine(settings.DB_REPLICA_URL, future=True, **engine_options())
+    ReplicaSessionLocal = async_sessionmaker(
+        replica_engine.execution_options(isolation_level="AUTOCOMMIT"),
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+        info={"replica": True},
+    )
+    register_metrics("db_replica_pool", instrument_engine(replica_engine).stats)
+
+# Set on responses to writes; while present the client's reads stay on the primary
+PRIMARY_STICKY_COOKIE = "db_primary_until"
+
 # Base class for models
 Base = declarative_base()
 
 print(f"✅ Successfully Connected to database: {settings.DB_NAME}")
 
-# Dependency to get database session
-async def get_db() -> AsyncSession:
-    async with AsyncSessionLocal() as session:
+
+@asynccontextmanager
+async def _request_session(request: Optional[Request], read_only: bool, replica: bool = False):
+    """Open (or reuse, via request.state) the request's primary or replica session."""
+    key = "read_db" if replica else "db"
+    if request is not None and getattr(request.state, key, None) is not None:
+        yield getattr(request.state, key)
+        return
+
+    if replica:
+        factory = ReplicaSessionLocal
+    else:
+        factory = ReadOnlySessionLocal if read_only else AsyncSessionLocal
+    async with factory() as session:
+        if request is not None:
+            setattr(request.state, key, session)
+            # Flagged up front: FastAPI runs this cleanup only after the response has started
+            request.state.db_wrote = not read_only  # See main.read_your_writes
         try:
             yield session
-            await session.commit()
+            if not read_only:
+                await session.commit()
+            elif session.new or session.dirty or session.deleted:
+                await session.flush()  # A read-only route that still changed something (autocommitted)
             # print("Session committed successfully")
         except Exception as e:
             print(f"Error committing session in get_db: {e}")
             raise
         finally:
+            if request is not None:
+                setattr(request.state, key, None)
             await session.close()
 
+
+# Dependency to get database session
+async def get_db(request: Request = None) -> AsyncSession:
+    """
+    One session (and so one pooled connection) per request.
+
+    FastAPI's dependency cache already hands the same session to get_current_user
+    and the route; the request.state guard keeps that true for
+    Depends(get_db, use_cache=False) too. Only the outermost dependency commits,
+    once. GET/HEAD/OPTIONS requests use an AUTOCOMMIT session and skip the commit.
+    Called without a request (background jobs), it behaves like a plain session.
+    """
+    read_only = request is not None and request.method in READ_ONLY_METHODS
+    async with _request_session(request, read_only) as session:
+        yield session
+
+
+def prefers_primary(request: Request) -> bool:
+    """True while the client is inside the read-your-writes window of its last write."""
+    try:
+        return float(request.cookies.get(PRIMARY_STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+# Dependency to get a session for read-only handlers
+async def get_read_db(request: Request) -> AsyncSession:
+    """
+    Replica session for GET/HEAD/OPTIONS when DB_REPLICA_URL is set.
+    Everything else, including clients that wrote within DB_REPLICA_STICKY_SECONDS,
+    gets exactly what get_db would (and shares its session).
+    """
+    read_only = request.method in READ_ONLY_METHODS
+    replica = ReplicaSessionLocal is not None and read_only and not prefers_primary(request)
+    async with _request_session(request, read_only, replica=replica) as session:
+        yield session
+
+
+def is_replica_session(db: AsyncSession) -> bool:
+    return bool(db.info.get("replica"))
+
+
+# ===========================================
+# ✅ Publish Event (Postgres NOTIFY)
+# ===========================================
+async def publish_event(db: AsyncSession, channel: str, payload: Dict[str, Any]) -> None:
+    """
+    Queue a NOTIFY on the caller's transaction.
+    Postgres delivers it to every listener only once that transaction commits.
+    """
+    await db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": channel, "payload": json.dumps(payload)},
+    )
+
+
+# ===========================================
+# ✅ Event Bus (Postgres LISTEN)
+# ===========================================
+class PgEventBus:
+    """
+    Cross-worker event bus on Postgres LISTEN/NOTIFY.
+
+    Each worker holds one dedicated asyncpg connection, opened from the engine's
+    URL but kept outside the SQLAlchemy pool, and dispatches every notification
+    to the handlers subscribed to its channel. The connection is health-checked
+    and re-opened on failure; `on_reconnect` handlers run every time listening
+    (re)starts, since events sent while disconnected are lost.
+    """
+
+    def __init__(self, connect_kwargs: Dict[str, Any], health_check_interval: float = 30.0, max_reconnect_delay: float = 30.0):
+        self._connect_kwargs = connect_kwargs
+        self._health_check_interval = health_check_interval
+        self._max_reconnect_delay = max_reconnect_delay
+        self._handlers: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {}
+        self._reconnect_handlers: List[Callable[[], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self.connected = False
+
+    def subscribe(self, channel: str, handler: Callable[[Dict[str, Any]], None]) -> None:
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def on_reconnect(self, handler: Callable[[], None]) -> None:
+        self._reconnect_handlers.append(handler)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        delay = 1.0
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(**self._connect_kwargs)
+                lost = asyncio.Event()
+                conn.add_termination_listener(lambda _conn: lost.set())
+                for channel in self._handlers:
+                    await conn.add_listener(channel, self._dispatch)
+
+                self.connected = True
+                delay = 1.0
+                for handler in self._reconnect_handlers:
+                    handler()
+                print(f"✅ Event bus listening on: {', '.join(self._handlers)}")
+
+                # Wait until the connection drops, pinging it so silent failures are noticed
+                while not lost.is_set():
+                    try:
+                        await asyncio.wait_for(lost.wait(), timeout=self._health_check_interval)
+                    except asyncio.TimeoutError:
+                        await asyncio.wait_for(conn.execute("SELECT 1"), timeout=self._health_check_interval)
+                print("❌ Event bus connection lost")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Event bus connection failed: {e}")
+            finally:
+                self.connected = False
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self._max_reconnect_delay)
+
+    def _dispatch(self, connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            print(f"❌ Event bus ignored malformed payload on {channel}: {payload!r}")
+            return
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(event)
+            except Exception as e:
+                print(f"❌ Event bus handler failed on {channel}: {e}")
+
+
+# asyncpg.connect() arguments for dedicated connections kept outside the SQLAlchemy pool.
+# They hold session state (LISTEN, advisory locks), so behind PgBouncer they go to
+# Postgres directly (DB_DIRECT_HOST, required with DB_PGBOUNCER).
+DIRECT_CONNECT_KWARGS: Dict[str, Any] = {
+    "user": engine.url.username,
+    "password": engine.url.password,
+    "host": settings.DB_DIRECT_HOST or engine.url.host,
+    "port": int(settings.DB_DIRECT_PORT or 5432) if settings.DB_DIRECT_HOST else engine.url.port,
+    "database": engine.url.database,
+}
+
+# Dedicated asyncpg connection to the same database the engine points at
+event_bus = PgEventBus(DIRECT_CONNECT_KWARGS)
@@ -0,0 +1,31 @@
+# app/emails/models.py
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, CheckConstraint, text
+from app.database.connection import Base
+from app.helpers.time import utcnow
+
+
+# ✅ Email Outbox
+class EmailOutbox(Base):
+    """
+    Outgoing emails, inserted in the same transaction as the change that triggers them
+    and delivered afterwards by the outbox worker (see app/emails/outbox.py).
+    """
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        CheckConstraint("status IN ('pending', 'sent', 'failed')", name="check_email_status_values"),
+        # Only undelivered rows are ever scanned by the worker
+        Index("ix_email_outbox_pending", "next_attempt_at", postgresql_where=text("status = 'pending'")),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    to_address = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    html = Column(Text, nullable=False)
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)  # Incremented when a worker claims the row
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)  # Also the claim lease expiry
+    last_error = Column(Text, nullable=True)
+    provider_message_id = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=utcnow)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,267 @@
+# app/emails/outbox.py
+
+from app.emails.providers import EmailMessage, build_provider
+from app.emails.templates import email_templates
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.connection import AsyncSessionLocal
+from app.monitoring.metrics import register_metrics
+from sqlalchemy import select, insert, update, delete, and_
+from typing import Any, Dict, List, Optional
+from app.emails.models import EmailOutbox
+from app.core.config import settings
+from app.helpers.time import utcnow
+from datetime import timedelta
+import asyncio
+import time
+
+
+# ============================================================
+# ✅ Enqueue Email
+# ============================================================
+async def enqueue_email(db: AsyncSession, to: str, subject: str, html: str) -> None:
+    """
+    Add an email to the outbox in the caller's transaction: it is sent only if that
+    transaction commits. Call email_outbox_worker.wake() after the commit to skip the poll delay.
+    """
+    db.add(EmailOutbox(to_address=to, subject=subject, html=html))
+
+
+async def enqueue_template(db: AsyncSession, to: str, template: str, locale: Optional[str] = None, **context: Any) -> None:
+    """Render an email template (see app/emails/templates.py) and queue the result."""
+    subject, html = email_templates.render(template, locale, **context)
+    await enqueue_email(db, to=to, subject=subject, html=html)
+
+
+async def enqueue_template_batch(db: AsyncSession, template: str, recipients: List[Dict[str, Any]]) -> int:
+    """
+    Queue one template for many recipients in a single INSERT. Each recipient is
+    the template context plus "to" and an optional "locale". Returns how many were queued.
+    """
+    if not recipients:
+        return 0
+    contexts = [{key: value for key, value in recipient.items() if key != "to"} for recipient in recipients]
+    rendered = email_templates.render_batch(template, contexts)
+    rows = [
+        {"to_address": recipient["to"], "subject": subject, "html": html}
+        for recipient, (subject, html) in zip(recipients, rendered)
+    ]
+    await db.execute(insert(EmailOutbox), rows)
+    return len(rows)
+
+
+# ============================================================
+# ✅ Rate Limiter
+# ============================================================
+class RateLimiter:
+    """Spaces provider requests at most `rate` per second (0 = unlimited)."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._next_slot = 0.0
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        wait = self._next_slot - now
+        self._next_slot = max(now, self._next_slot) + 1 / self.rate
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+# ============================================================
+# ✅ Outbox Delivery Worker
+# ============================================================
+class EmailOutboxWorker:
+    """
+    Delivers pending outbox rows in the background of every app worker.
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED, so concurrent workers never
+    pick the same email. Claiming moves next_attempt_at forward by `claim_lease`
+    seconds and commits before anything is sent, so no lock is held during the
+    HTTP call and rows of a worker that died mid-send are retried after the lease.
+    Claimed rows are split into provider-sized batches sent `concurrency` at a
+    time, at most `rate_limit` requests per second. Failed batches are retried
+    with exponential backoff until `max_attempts`, then marked 'failed'.
+    """
+
+    def __init__(
+        self,
+        provider,
+        batch_size: int,
+        concurrency: int,
+        rate_limit: float,
+        poll_interval: float,
+        max_attempts: int,
+        retry_backoff: int,
+        claim_lease: int,
+    ):
+        self.provider = provider
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.claim_lease = claim_lease
+        self.poll_interval = poll_interval
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._limiter = RateLimiter(rate_limit)
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"claimed": 0, "sent": 0, "retried": 0, "failed": 0, "requests": 0, "request_errors": 0, "last_error": None}
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+        print(f"✅ Email outbox worker started ({self.provider.name})")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self) -> None:
+        """Look for new emails now instead of at the next poll."""
+        self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                claimed = await self.deliver_once()
+            except Exception as e:
+                claimed = 0
+                self._stats["last_error"] = str(e)
+                print(f"❌ Email outbox delivery failed: {e}")
+            if claimed < self.batch_size:  # A full batch means more may be waiting
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+
+    async def deliver_once(self) -> int:
+        """Claim up to `batch_size` due emails and send them. Returns how many were claimed."""
+        rows = await self._claim()
+        if not rows:
+            return 0
+        size = self.provider.max_batch_size
+        await asyncio.gather(*(self._send_batch(rows[i:i + size]) for i in range(0, len(rows), size)))
+        return len(rows)
+
+    async def _claim(self) -> List[Any]:
+        now = utcnow()
+        due = (
+            select(EmailOutbox.id)
+            .where(and_(
+                EmailOutbox.status == "pending",
+                EmailOutbox.next_attempt_at <= now,
+                EmailOutbox.attempts < self.max_attempts,  # Exhausted rows whose lease expired are failed by the cleanup job
+            ))
+            .order_by(EmailOutbox.next_attempt_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(due.scalar_subquery()))
+            .values(attempts=EmailOutbox.attempts + 1, next_attempt_at=now + timedelta(seconds=self.claim_lease))
+            .returning(EmailOutbox.id, EmailOutbox.to_address, EmailOutbox.subject, EmailOutbox.html, EmailOutbox.attempts)
+            .execution_options(synchronize_session=False)
+        )
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(stmt)).all()
+            await db.commit()
+        self._stats["claimed"] += len(rows)
+        return rows
+
+    async def _send_batch(self, rows: List[Any]) -> None:
+        messages: List[EmailMessage] = [
+            {"from": settings.EMAIL_FROM, "to": row.to_address, "subject": row.subject, "html": row.html}
+            for row in rows
+        ]
+        async with self._semaphore:
+            await self._limiter.acquire()
+            self._stats["requests"] += 1
+            try:
+                message_ids = await self.provider.send(messages)
+            except Exception as e:
+                self._stats["request_errors"] += 1
+                self._stats["last_error"] = str(e)
+                print(f"❌ Email batch of {len(rows)} failed: {e}")
+                await self._mark_failed(rows, str(e))
+                return
+        await self._mark_sent(rows, message_ids)
+
+    async def _mark_sent(self, rows: List[Any], message_ids: List[str]) -> None:
+        sent_at = utcnow()
+        values = [
+            {"id": row.id, "status": "sent", "sent_at": sent_at, "provider_message_id": message_id, "last_error": None}
+            for row, message_id in zip(rows, message_ids)
+        ]
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(EmailOutbox), values)  # Bulk UPDATE by primary key
+            await db.commit()
+        self._stats["sent"] += len(values)
+
+    async def _mark_failed(self, rows: List[Any], error: str) -> None:
+        now = utcnow()
+        values = []
+        for row in rows:
+            if row.attempts >= self.max_attempts:
+                values.append({"id": row.id, "status": "failed", "last_error": error})
+                self._stats["failed"] += 1
+            else:
+                delay = self.retry_backoff * 2 ** (row.attempts - 1)
+                values.append({"id": row.id, "next_attempt_at": now + timedelta(seconds=delay), "last_error": error})
+                self._stats["retried"] += 1
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(EmailOutbox), values)
+            await db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"provider": self.provider.name, "running": self._task is not None, **self._stats}
+
+
+# ============================================================
+# ✅ Purge Delivered Emails
+# ============================================================
+async def purge_sent_emails(db: AsyncSession) -> Dict[str, Any]:
+    """
+    Delete sent emails older than EMAIL_OUTBOX_RETENTION_DAYS (failed ones are kept for inspection),
+    and mark as failed the pending rows that used up EMAIL_MAX_ATTEMPTS without a verdict
+    (the worker holding their lease crashed or hung mid-send, so it expired unanswered).
+    """
+    now = utcnow()
+    exhausted = await db.execute(
+        update(EmailOutbox)
+        .where(and_(
+            EmailOutbox.status == "pending",
+            EmailOutbox.attempts >= settings.EMAIL_MAX_ATTEMPTS,
+            EmailOutbox.next_attempt_at <= now,
+        ))
+        .values(status="failed", last_error="Claim lease expired on the last attempt")
+        .execution_options(synchronize_session=False)
+    )
+    cutoff = now - timedelta(days=settings.EMAIL_OUTBOX_RETENTION_DAYS)
+    result = await db.execute(
+        delete(EmailOutbox).where(and_(EmailOutbox.status == "sent", EmailOutbox.sent_at < cutoff))
+    )
+    await db.commit()
+    if exhausted.rowcount:
+        print(f"❌ {exhausted.rowcount} emails failed after {settings.EMAIL_MAX_ATTEMPTS} unanswered attempts")
+    return {"rows_removed": result.rowcount, "rows_failed": exhausted.rowcount}
+
+
+# Per-process instance; SKIP LOCKED lets every worker process deliver side by side
+email_outbox_worker = EmailOutboxWorker(
+    build_provider(),
+    batch_size=settings.EMAIL_WORKER_BATCH_SIZE,
+    concurrency=settings.EMAIL_WORKER_CONCURRENCY,
+    rate_limit=settings.EMAIL_WORKER_RATE_LIMIT,
+    poll_interval=settings.EMAIL_WORKER_POLL_INTERVAL,
+    max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+    retry_backoff=settings.EMAIL_RETRY_BACKOFF,
+    claim_lease=settings.EMAIL_CLAIM_LEASE,
+)
+register_metrics("email_outbox", email_outbox_worker.stats)
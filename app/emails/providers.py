@@ -0,0 +1,63 @@
+# app/emails/providers.py
+
+from typing import Any, Dict, List
+from app.core.config import settings
+import asyncio
+
+# A message is Resend's send params: {"from", "to", "subject", "html"}
+EmailMessage = Dict[str, Any]
+
+
+# ============================================================
+# ✅ Email Providers
+# ============================================================
+class ResendProvider:
+    """Resend, using the batch endpoint (one request, up to 100 emails) when there is more than one message."""
+
+    name = "resend"
+    max_batch_size = 100
+
+    def __init__(self, api_key: str):
+        import resend
+
+        resend.api_key = api_key
+        self._resend = resend
+
+    async def send(self, messages: List[EmailMessage]) -> List[str]:
+        """Send every message or raise; returns the provider ids in order."""
+        # The SDK is synchronous, keep its HTTP call off the event loop
+        if len(messages) == 1:
+            response = await asyncio.to_thread(self._resend.Emails.send, messages[0])
+            return [response["id"]]
+        response = await asyncio.to_thread(self._resend.Batch.send, messages)
+        return [item["id"] for item in response["data"]]
+
+
+class FakeEmailProvider:
+    """Keeps messages in memory instead of sending them (local development and tests)."""
+
+    name = "fake"
+
+    def __init__(self, max_batch_size: int = 100, latency: float = 0.0):
+        self.max_batch_size = max_batch_size
+        self.latency = latency
+        self.sent: List[EmailMessage] = []
+        self.fail_next = 0  # Number of upcoming send() calls to fail
+
+    async def send(self, messages: List[EmailMessage]) -> List[str]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_next > 0:
+            self.fail_next -= 1
+            raise RuntimeError("Fake provider failure")
+        ids = [f"fake-{len(self.sent) + i + 1}" for i in range(len(messages))]
+        self.sent.extend(messages)
+        return ids
+
+
+def build_provider():
+    if settings.EMAIL_PROVIDER == "resend":
+        return ResendProvider(settings.RESEND_API_KEY)
+    if settings.EMAIL_PROVIDER == "fake":
+        return FakeEmailProvider()
+    raise ValueError(f"Invalid EMAIL_PROVIDER: {settings.EMAIL_PROVIDER}")
@@ -0,0 +1,91 @@
+# app/emails/templates.py
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.monitoring.metrics import register_metrics
+from mako.template import Template
+from app.core.config import settings
+from pathlib import Path
+import time
+
+# One directory per locale (templates/<locale>/<name>.html), "en" is always present
+TEMPLATE_DIR = Path(__file__).parent / "templates"
+
+
+# ============================================================
+# ✅ Email Templates
+# ============================================================
+class EmailTemplates:
+    """
+    Mako email templates, compiled once and kept in memory.
+
+    Each template defines a `subject()` def next to its HTML body. Expressions
+    are HTML-escaped by default, so user data (names, links) cannot break the
+    markup. Lookups fall back from "pt-BR" to "pt" to the default locale.
+    """
+
+    def __init__(self, directory: Path, default_locale: str):
+        self.directory = directory
+        self.default_locale = default_locale
+        self._templates: Dict[Tuple[str, str], Template] = {}
+        self._loaded = False
+        self._renders = 0
+        self._render_seconds = 0.0
+
+    def load(self) -> int:
+        """Compile every template (called at startup, otherwise on first use). Returns how many were compiled."""
+        templates = {}
+        for path in sorted(self.directory.glob("*/*.html")):
+            templates[(path.parent.name, path.stem)] = Template(
+                path.read_text(encoding="utf-8"),
+                strict_undefined=True,  # A missing variable is an error, not an empty string
+                default_filters=["h"],
+            )
+        self._templates = templates
+        self._loaded = True
+        return len(templates)
+
+    def get(self, name: str, locale: Optional[str] = None) -> Template:
+        if not self._loaded:
+            self.load()
+        candidates = [locale, locale.replace("_", "-").split("-")[0]] if locale else []
+        for candidate in [*candidates, self.default_locale]:
+            template = self._templates.get((candidate, name))
+            if template is not None:
+                return template
+        raise KeyError(f"No email template named {name!r}")
+
+    def render(self, name: str, locale: Optional[str] = None, **context: Any) -> Tuple[str, str]:
+        """Render one email. Returns (subject, html)."""
+        return self._render(self.get(name, locale), context)
+
+    def render_batch(self, name: str, recipients: Iterable[Dict[str, Any]]) -> List[Tuple[str, str]]:
+        """Render one template for many recipients (each a context dict, optionally with a "locale")."""
+        resolved: Dict[Optional[str], Template] = {}
+        rendered = []
+        for context in recipients:
+            context = dict(context)
+            locale = context.pop("locale", None)
+            if locale not in resolved:
+                resolved[locale] = self.get(name, locale)
+            rendered.append(self._render(resolved[locale], context))
+        return rendered
+
+    def _render(self, template: Template, context: Dict[str, Any]) -> Tuple[str, str]:
+        started = time.perf_counter()
+        subject = template.get_def("subject").render(**context).strip()
+        html = template.render(**context)
+        self._render_seconds += time.perf_counter() - started
+        self._renders += 1
+        return subject, html
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "templates": len(self._templates),
+            "renders": self._renders,
+            "avg_render_ms": round(self._render_seconds * 1000 / self._renders, 4) if self._renders else 0.0,
+        }
+
+
+# Per-process instance, compiled in the app lifespan
+email_templates = EmailTemplates(TEMPLATE_DIR, default_locale=settings.EMAIL_DEFAULT_LOCALE)
+register_metrics("email_templates", email_templates.stats)
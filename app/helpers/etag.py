@@ -0,0 +1,24 @@
+# app/helpers/etag.py
+
+from typing import Optional
+
+
+def settings_etag(user_id: int, version: int) -> str:
+    """Strong ETag of a user's settings, from the Settings.version counter."""
+    return f'"s{user_id}.{version}"'
+
+
+def profile_etag(user) -> str:
+    """Strong ETag of a user's profile, from User.updated_at."""
+    stamp = int(user.updated_at.timestamp() * 1_000_000) if user.updated_at else 0
+    return f'"u{user.id}.{stamp}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for GET)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
@@ -1,63 +1,77 @@
 # app/main.py
 from app.user_settings.routes import router as user_settings_router
-from app.authentication.routes import router as auth_router
-from app.authentication.security import cleanup_expired_tokens
-from app.database.connection import get_db, engine, Base
+from app.authentication.routes import router as auth_router, well_known_router
+from app.authentication.keys import key_ring
+from app.monitoring.routes import router as monitoring_router
+from app.authentication.password_pool import password_pool
+from app.authentication.partitions import partitioning_enabled, ensure_token_partitions
+from app.maintenance.scheduler import maintenance_scheduler
+from app.maintenance.jobs import register_maintenance_jobs
+from app.emails.outbox import email_outbox_worker
+from app.emails.templates import email_templates
+from app.authentication.cache import REVOCATION_CHANNEL, handle_revocation_event, revocation_cache, verified_token_cache
+from app.authentication.bloom import blacklist_filter
+from app.database.connection import get_db, engine, replica_engine, event_bus, Base, PRIMARY_STICKY_COOKIE
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.core.config import settings
-from app.helpers.time import utcnow
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 import uvicorn
-import asyncio
-
-
-async def scheduled_token_cleanup():
-    """Run one token cleanup cycle."""
-    try:
-        print(f"\n🔄 Starting token cleanup at {utcnow()}")
-        async for db in get_db():
-            await cleanup_expired_tokens(db)
-        print(f"✅ Token cleanup completed at {utcnow()}")
-    except Exception as e:
-        print(f"❌ Token cleanup failed: {e}")
-
-
-async def periodic_cleanup():
-    """Run cleanup every 24 hours, delay first run slightly."""
-    await asyncio.sleep(120)  # Give the DB a few seconds to settle and allow aut tables creation or migrations
-    while True:
-        await scheduled_token_cleanup()
-        # run cleanup every 24 hours
-        # await asyncio.sleep(60 * 60 * 24)
-
-        # run cleanup every 10 Seconds
-        await asyncio.sleep(10)
+import time
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     import app.model_registry  # ensure models are registered
 
+    # Parse JWT keys once (fails fast on a missing or invalid key ring)
+    print(f"🔑 JWT keys loaded ({settings.ALGORITHM}): {key_ring.load()}")
+    # Re-read the key directory periodically; tokens verified with a dropped key must be checked again
+    key_ring.on_keys_removed(verified_token_cache.clear)
+    await key_ring.start()
+
     # Create tables only in development
     if settings.ENVIRONMENT == "development":
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
         print(f"🚀 Tables auto-created ({settings.ENVIRONMENT} mode)")
 
-    # Start background cleanup
-    cleanup_task = asyncio.create_task(periodic_cleanup())
-    print(f"✅ Background token cleanup started in {settings.ENVIRONMENT} mode")
+        # Partitioned token tables need partitions in place before the first insert
+        if partitioning_enabled():
+            async for db in get_db():
+                await ensure_token_partitions(db)
+
+    # Token cleanup and other fleet-wide jobs (only the elected leader runs them)
+    register_maintenance_jobs(maintenance_scheduler)
+    await maintenance_scheduler.start()
+
+    # Compile email templates once, not on the first request that sends an email
+    print(f"✉️ Email templates compiled: {email_templates.load()}")
+
+    # Deliver queued emails (every process may run one, rows are claimed with SKIP LOCKED)
+    if settings.EMAIL_WORKER_ENABLED:
+        await email_outbox_worker.start()
+
+    # Listen for token revocations made by other workers
+    if settings.REVOCATION_BUS_ENABLED:
+        event_bus.subscribe(REVOCATION_CHANNEL, handle_revocation_event)
+        event_bus.on_reconnect(revocation_cache.clear)  # Events may have been missed while disconnected
+        event_bus.on_reconnect(blacklist_filter.invalidate)  # Rebuilt once listening, then periodically
+        await blacklist_filter.start()
+        await event_bus.start()
 
     yield  # App runs here
 
     # Shutdown
-    cleanup_task.cancel()
-    try:
-        await cleanup_task
-    except asyncio.CancelledError:
-        pass
+    await event_bus.stop()
+    await key_ring.stop()
+    await blacklist_filter.stop()
+    await maintenance_scheduler.stop()
+    await email_outbox_worker.stop()
+    password_pool.shutdown()
     await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
     print("👋 App shutdown complete")
 
 
@@ -71,8 +85,27 @@ app.add_middleware(
     allow_headers=["Authorization", "Content-Type"],
 )
 
+# Read-your-writes: after a committed write, keep this client's reads on the primary for a while
+if replica_engine is not None:
+    @app.middleware("http")
+    async def read_your_writes(request: Request, call_next):
+        response = await call_next(request)
+        if getattr(request.state, "db_wrote", False):
+            response.set_cookie(
+                PRIMARY_STICKY_COOKIE,
+                str(time.time() + settings.DB_REPLICA_STICKY_SECONDS),
+                max_age=settings.DB_REPLICA_STICKY_SECONDS,
+                httponly=True,
+                secure=settings.COOKIE_SECURE,
+                samesite=settings.COOKIE_SAMESITE,
+                domain=settings.COOKIE_DOMAIN,
+            )
+        return response
+
 app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(user_settings_router, prefix="/api/settings", tags=["User Settings"])
+app.include_router(monitoring_router, prefix="/api/monitoring", tags=["Monitoring"])
+app.include_router(well_known_router, prefix="/.well-known")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,58 @@
+# app/maintenance/jobs.py
+
+from app.authentication.partitions import partitioning_enabled, ensure_token_partitions
+from app.authentication.security import cleanup_expired_tokens
+from app.authentication.token_store import token_store
+from app.maintenance.scheduler import MaintenanceScheduler
+from app.emails.outbox import purge_sent_emails
+from app.database.connection import AsyncSessionLocal
+from typing import Any, Dict
+from app.core.config import settings
+
+
+# ============================================================
+# ✅ Maintenance Jobs
+# ============================================================
+async def token_cleanup_job() -> Dict[str, Any]:
+    """Remove expired active/blacklisted tokens (rows or whole partitions)."""
+    async with AsyncSessionLocal() as db:
+        return await cleanup_expired_tokens(db)
+
+
+async def token_partition_job() -> Dict[str, Any]:
+    """Create token table partitions ahead of the longest token lifetime."""
+    async with AsyncSessionLocal() as db:
+        created = await ensure_token_partitions(db)
+    print(f"🗂️ Token partitions created ahead: {created}")
+    return {"partitions_created": created}
+
+
+async def email_outbox_cleanup_job() -> Dict[str, Any]:
+    """Remove delivered emails past their retention period and fail abandoned, exhausted ones."""
+    async with AsyncSessionLocal() as db:
+        return await purge_sent_emails(db)
+
+
+def register_maintenance_jobs(scheduler: MaintenanceScheduler) -> None:
+    if token_store.needs_cleanup:  # Key-value stores expire tokens on their own
+        scheduler.add_job(
+            "token_cleanup",
+            token_cleanup_job,
+            interval=settings.TOKEN_CLEANUP_INTERVAL,
+            jitter=settings.MAINTENANCE_JITTER,
+        )
+    scheduler.add_job(
+        "email_outbox_cleanup",
+        email_outbox_cleanup_job,
+        interval=settings.EMAIL_OUTBOX_CLEANUP_INTERVAL,
+        jitter=settings.MAINTENANCE_JITTER,
+    )
+    if partitioning_enabled():
+        # First run straight away: partitioned tables reject inserts until partitions exist
+        scheduler.add_job(
+            "token_partitions",
+            token_partition_job,
+            interval=settings.TOKEN_PARTITION_MAINTENANCE_INTERVAL,
+            jitter=settings.MAINTENANCE_JITTER,
+            run_at_start=True,
+        )
@@ -0,0 +1,137 @@
+# app/maintenance/scheduler.py
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+from typing import Any, Awaitable, Callable, Dict, Optional
+from app.database.connection import DIRECT_CONNECT_KWARGS
+from app.monitoring.metrics import register_metrics
+from app.core.config import settings
+from app.helpers.time import utcnow
+from datetime import timezone
+import asyncpg
+import time
+
+MaintenanceJob = Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+
+
+# ============================================================
+# ✅ Maintenance Scheduler (leader-elected)
+# ============================================================
+class MaintenanceScheduler:
+    """
+    Fleet-wide maintenance jobs that must run on one worker only.
+
+    Every worker runs an APScheduler AsyncIOScheduler, but jobs only execute on
+    the leader: the worker holding a session-level Postgres advisory lock on a
+    dedicated asyncpg connection. If the leader dies or its connection drops,
+    Postgres releases the lock and another worker wins the next election round.
+    Jobs may return a dict with `rows_removed`; the last run of each is recorded.
+    """
+
+    def __init__(self, connect_kwargs: Dict[str, Any], lock_key: int, election_interval: int):
+        self._connect_kwargs = connect_kwargs
+        self._lock_key = lock_key
+        self._election_interval = election_interval
+        self._scheduler = AsyncIOScheduler(timezone=timezone.utc)
+        self._conn: Optional[asyncpg.Connection] = None
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self.is_leader = False
+
+    def add_job(self, name: str, fn: MaintenanceJob, interval: int, jitter: int = 0, run_at_start: bool = False) -> None:
+        """Run `fn` every `interval` seconds (± `jitter`) on the leader."""
+        self._jobs[name] = {
+            "interval_seconds": interval,
+            "jitter_seconds": jitter,
+            "runs": 0,
+            "failures": 0,
+            "skipped_not_leader": 0,
+            "last_started_at": None,
+            "last_duration_seconds": None,
+            "last_rows_removed": None,
+            "last_status": None,
+            "last_error": None,
+        }
+        # An explicit next_run_time=None would add the job paused; leave it out so the trigger picks the first run
+        first_run = {"next_run_time": utcnow()} if run_at_start else {}
+        self._scheduler.add_job(
+            self._run_job,
+            IntervalTrigger(seconds=interval, jitter=jitter or None),
+            args=[name, fn],
+            id=name,
+            max_instances=1,
+            coalesce=True,
+            **first_run,
+        )
+
+    async def start(self) -> None:
+        await self._elect()  # Know who leads before any job fires
+        self._scheduler.add_job(
+            self._elect,
+            IntervalTrigger(seconds=self._election_interval),
+            id="leader_election",
+            max_instances=1,
+            coalesce=True,
+        )
+        self._scheduler.start()
+        print(f"✅ Maintenance scheduler started ({'leader' if self.is_leader else 'standby'})")
+
+    async def stop(self) -> None:
+        if self._scheduler.running:
+            self._scheduler.shutdown(wait=False)
+        if self._conn is not None and not self._conn.is_closed():
+            await self._conn.close()  # Releases the lock for the next leader
+        self._conn = None
+        self.is_leader = False
+
+    async def _elect(self) -> None:
+        try:
+            if self._conn is None or self._conn.is_closed():
+                self.is_leader = False
+                self._conn = await asyncpg.connect(**self._connect_kwargs)
+            if self.is_leader:
+                await self._conn.execute("SELECT 1")  # Lock lives as long as this connection
+            else:
+                self.is_leader = await self._conn.fetchval("SELECT pg_try_advisory_lock($1)", self._lock_key)
+                if self.is_leader:
+                    print("👑 This worker is now the maintenance leader")
+        except Exception as e:
+            if self.is_leader:
+                print(f"❌ Maintenance leadership lost: {e}")
+            self.is_leader = False
+            if self._conn is not None and not self._conn.is_closed():
+                self._conn.terminate()
+            self._conn = None
+
+    async def _run_job(self, name: str, fn: MaintenanceJob) -> None:
+        job = self._jobs[name]
+        if not self.is_leader:
+            job["skipped_not_leader"] += 1
+            return
+
+        job["last_started_at"] = utcnow().isoformat()
+        started = time.perf_counter()
+        try:
+            result = await fn() or {}
+            job["last_rows_removed"] = result.get("rows_removed")
+            job["last_status"] = "ok"
+            job["last_error"] = None
+        except Exception as e:
+            job["failures"] += 1
+            job["last_status"] = "failed"
+            job["last_error"] = str(e)
+            print(f"❌ Maintenance job {name} failed: {e}")
+        finally:
+            job["runs"] += 1
+            job["last_duration_seconds"] = round(time.perf_counter() - started, 3)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"is_leader": self.is_leader, "jobs": self._jobs}
+
+
+# Per-process instance; only the leader's jobs do any work
+maintenance_scheduler = MaintenanceScheduler(
+    DIRECT_CONNECT_KWARGS,
+    lock_key=settings.MAINTENANCE_LOCK_KEY,
+    election_interval=settings.MAINTENANCE_ELECTION_INTERVAL,
+)
+register_metrics("maintenance", maintenance_scheduler.stats)
@@ -6,3 +6,4 @@
 from app.users.models import User
 from app.user_settings.models import Settings
 from app.authentication.models import BlacklistedToken, PasswordResetToken
+from app.emails.models import EmailOutbox
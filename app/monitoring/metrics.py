@@ -0,0 +1,22 @@
+# app/monitoring/metrics.py
+
+from typing import Any, Callable, Dict
+
+# Name -> callable returning a JSON-serialisable dict of current values
+_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+# ============================================================
+# ✅ Register Metrics Provider
+# ============================================================
+def register_metrics(name: str, provider: Callable[[], Dict[str, Any]]) -> None:
+    """Expose a component's stats under `name` on the metrics endpoint."""
+    _providers[name] = provider
+
+
+# ============================================================
+# ✅ Collect Metrics
+# ============================================================
+def collect_metrics() -> Dict[str, Dict[str, Any]]:
+    """Snapshot every registered provider (per worker process)."""
+    return {name: provider() for name, provider in _providers.items()}
@@ -0,0 +1,24 @@
+# app/monitoring/routes.py
+
+from app.authentication.dependencies import get_current_admin_user
+from app.monitoring.metrics import collect_metrics
+from fastapi import APIRouter, Depends
+from app.users.models import User
+from typing import Any, Dict
+import os
+
+router = APIRouter()
+
+
+# ✅ GET METRICS (values are per worker process)
+@router.get("/metrics")
+async def get_metrics_route(
+    user: User = Depends(get_current_admin_user),
+) -> Dict[str, Any]:
+    """
+    Admins only: the snapshot is operational detail no client needs and that
+    helps an attacker. Pool saturation and password-hash queue depth show when
+    a flood is working, signing key ids and the next rotation time are listed,
+    and `last_error` fields carry raw database and provider error messages.
+    """
+    return {"pid": os.getpid(), "metrics": collect_metrics()}
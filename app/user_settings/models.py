@@ -17,5 +17,6 @@ class Settings(Base):
     theme=Column(String, default="light", nullable=False)
     notifications = Column(Boolean, default=True)
     language = Column(String, default="en")
+    version = Column(Integer, default=1, server_default="1", nullable=False)  # Bumped by the update/reset services, used for ETags
 
     user = relationship("User", back_populates="settings")
\ No newline at end of file
@@ -16,14 +16,20 @@ from app.user_settings.schemas import (
     SettingsUpdate,
 )
 from app.users.schemas import UserResponse
-from app.database.connection import get_db
-from fastapi import APIRouter, Depends
+from app.database.connection import get_db, get_read_db
+from app.helpers.etag import etag_matches, profile_etag
+from fastapi import APIRouter, Depends, Request, Response, status
 from app.users.models import User
 
 # router = APIRouter(prefix="/settings", tags=["User Settings"])
 router = APIRouter()
 
 
+def _cache_headers(etag: str) -> dict:
+    # Clients may keep the body but must revalidate it on every use
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
 # # ✅ CREATE SETTINGS (automatically created when user registers for now)
 # @router.post("/", response_model=SettingsRead)
 # async def create_settings_route(
@@ -36,20 +42,36 @@ router = APIRouter()
 #     return await create_settings(settings_data, user, db)
 
 
-# ✅ GET SETTINGS
+# ✅ GET SETTINGS (conditional: If-None-Match -> 304)
 @router.get("", response_model=SettingsRead)
 async def get_settings_route(
-    user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    request: Request,
+    response: Response,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    return await get_settings(user, db)
+    entry = await get_settings(user, db)
+    if etag_matches(request.headers.get("If-None-Match"), entry["etag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_cache_headers(entry["etag"]))
+    response.headers.update(_cache_headers(entry["etag"]))
+    return entry["data"]
 
 
-# ✅ GET PROFILE
+# ✅ GET PROFILE (conditional: If-None-Match -> 304)
 @router.get("/profile", response_model=UserResponse)
 async def get_profile_route(
-    user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    request: Request,
+    response: Response,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    return await get_profile(user, db)
+    # The ETag comes from the already-loaded user, so a match needs no lookup at all
+    etag = profile_etag(user)
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_cache_headers(etag))
+    entry = await get_profile(user, db)
+    response.headers.update(_cache_headers(entry["etag"]))
+    return entry["data"]
 
 
 # ✅ UPDATE SETTINGS
@@ -1,6 +1,8 @@
 # app/user_settings/services/services.py
 
 from app.users.services.create_default_settings import create_default_settings
+from app.users.cache import profile_cache, cache_profile, cache_settings, PROFILE, SETTINGS
+from app.authentication.cache import publish_user_changed
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.user_settings.models import Settings
 from fastapi import HTTPException, status
@@ -9,6 +11,8 @@ from app.user_settings.schemas import (
     SettingsUpdate,
     SettingsRead,
 )
+from app.helpers.etag import profile_etag
+from typing import Any, Dict
 from app.users.models import User
 from sqlalchemy import select
 
@@ -47,23 +51,26 @@ from sqlalchemy import select
 # ============================================================
 # ✅ GET PROFILE
 # ============================================================
-async def get_profile(user: User, db: AsyncSession):
-    stmt = select(User).where(User.id == user.id)
-    result = await db.execute(stmt)
-    user_obj = result.scalar_one_or_none()
+async def get_profile(user: User, db: AsyncSession) -> Dict[str, Any]:
+    """Profile entry ({"etag", "data"}) for the current user."""
+    cached = await profile_cache.get(PROFILE, user.id)
+    if cached is not None and cached["etag"] == profile_etag(user):
+        return cached
 
-    if not user_obj:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
-        )
-
-    return user_obj
+    # get_current_user has just loaded this user, no need to SELECT it again
+    return await cache_profile(user)
 
 
 # ============================================================
 # ✅ GET SETTINGS
 # ============================================================
-async def get_settings(user: User, db: AsyncSession) -> SettingsRead:
+async def get_settings(user: User, db: AsyncSession) -> Dict[str, Any]:
+    """Settings entry ({"etag", "data"}) for the current user, from the cache when warm."""
+    checked_at = profile_cache.now()  # A write or invalidation after this makes our read stale
+    cached = await profile_cache.get(SETTINGS, user.id)
+    if cached is not None:
+        return cached
+
     stmt = select(Settings).where(Settings.user_id == user.id)
     result = await db.execute(stmt)
     settings = result.scalar_one_or_none()
@@ -73,7 +80,7 @@ async def get_settings(user: User, db: AsyncSession) -> SettingsRead:
             status_code=status.HTTP_404_NOT_FOUND, detail="Settings not found"
         )
 
-    return SettingsRead.model_validate(settings)
+    return await cache_settings(user.id, settings, checked_at)
 
 
 # ============================================================
@@ -93,11 +100,14 @@ async def update_settings(
 
     for field, value in settings_data.model_dump(exclude_unset=True).items():
         setattr(settings, field, value)
+    settings.version = Settings.version + 1  # New ETag; incremented in SQL so concurrent writes never share one
 
+    await publish_user_changed(db, user.id)  # Other workers drop their cached copy
     await db.commit()
     await db.refresh(settings)
 
-    return SettingsRead.model_validate(settings)
+    entry = await cache_settings(user.id, settings)
+    return SettingsRead.model_validate(entry["data"])
 
 
 # ============================================================
@@ -125,8 +135,11 @@ async def reset_settings_to_default(user: User, db: AsyncSession) -> SettingsRea
 
     # using the create_default_settings function to reset all settings to default values
     await create_default_settings(user, db)
+    settings.version = Settings.version + 1  # New ETag (same row object, see update_settings)
 
+    await publish_user_changed(db, user.id)  # Other workers drop their cached copy
     await db.commit()
     await db.refresh(settings)
 
-    return SettingsRead.model_validate(settings)
+    entry = await cache_settings(user.id, settings)
+    return SettingsRead.model_validate(entry["data"])
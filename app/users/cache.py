@@ -0,0 +1,236 @@
+# app/users/cache.py
+
+from app.user_settings.schemas import SettingsRead
+from app.monitoring.metrics import register_metrics
+from app.helpers.etag import profile_etag, settings_etag
+from app.users.schemas import UserResponse
+from typing import Any, Dict, Optional, Tuple
+from app.core.config import settings
+from collections import OrderedDict
+import json
+import time
+
+# Snapshot kinds, keyed by user id (see the write-through helpers for the entry format)
+PROFILE = "profile"
+SETTINGS = "settings"
+KINDS = (PROFILE, SETTINGS)
+
+
+# ============================================================
+# ✅ Cache Backends
+# ============================================================
+class MemoryCacheBackend:
+    """Per-process LRU with a TTL per entry."""
+
+    name = "memory"
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, deadline = entry
+        if deadline <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: int) -> None:
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def discard_local(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """Shared across workers and hosts; eviction is left to Redis (TTL + maxmemory-policy)."""
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "profile_cache:"):
+        try:
+            from redis import asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError("PROFILE_CACHE_BACKEND=redis requires the 'redis' package") from e
+        self._client = aioredis.from_url(url)
+        self._prefix = prefix
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = await self._client.get(self._prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: int) -> None:
+        await self._client.set(self._prefix + key, json.dumps(value), ex=ttl)
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(self._prefix + key)
+
+    def discard_local(self, key: str) -> None:
+        pass  # Nothing held in-process
+
+    def size(self) -> int:
+        return -1  # Unknown without a round-trip
+
+
+# ============================================================
+# ✅ Profile Cache
+# ============================================================
+class ProfileCache:
+    """
+    User profile and settings snapshots keyed by user id.
+
+    Writers store the fresh snapshot right after their commit (write-through).
+    Other workers drop their in-process copy when the revocation bus reports the
+    user changed, so a memory backend is stale for at most one bus round-trip,
+    or `ttl` seconds when the bus is off. Backend errors count as misses.
+
+    Snapshots read on a miss are stored with `checked_at` (the `now()` taken
+    before the read) and skipped when this process wrote or dropped the entry
+    since, the way RevocationCache.set_user does. Versioned entries (settings)
+    never replace a newer version, which also covers a replica read lagging
+    behind a write-through. On the redis backend that version check is a read
+    then a write, so it narrows the race with other hosts rather than closing it.
+    """
+
+    # Above this many change stamps, those older than `ttl` are dropped
+    CHANGED_AT_PRUNE_AT = 10000
+
+    def __init__(self, backend, ttl: int, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self._hits = {kind: 0 for kind in KINDS}
+        self._misses = {kind: 0 for kind in KINDS}
+        self._errors = 0
+        self._changed_at: Dict[str, float] = {}
+
+    @staticmethod
+    def now() -> float:
+        """Monotonic clock for `checked_at`."""
+        return time.monotonic()
+
+    async def get(self, kind: str, user_id: int) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        try:
+            value = await self.backend.get(f"{kind}:{user_id}")
+        except Exception as e:
+            self._errors += 1
+            print(f"❌ Profile cache read failed: {e}")
+            value = None
+        if value is None:
+            self._misses[kind] += 1
+        else:
+            self._hits[kind] += 1
+        return value
+
+    async def set(self, kind: str, user_id: int, value: Dict[str, Any], checked_at: Optional[float] = None) -> None:
+        """
+        Store a snapshot: a write-through after a commit, or, with `checked_at`,
+        one read from the database on a miss (skipped if it may be stale).
+        """
+        if not self.enabled:
+            return
+        key = f"{kind}:{user_id}"
+        if checked_at is not None and self._changed_at.get(key, float("-inf")) >= checked_at:
+            return  # Written or dropped while we were reading
+        try:
+            if "version" in value:
+                current = await self.backend.get(key)
+                if current is not None and current.get("version", -1) > value["version"]:
+                    return
+            await self.backend.set(key, value, self.ttl)
+        except Exception as e:
+            self._errors += 1
+            print(f"❌ Profile cache write failed: {e}")
+        if checked_at is None:
+            self._mark_changed(key)
+
+    async def invalidate(self, user_id: int) -> None:
+        for kind in KINDS:
+            self._mark_changed(f"{kind}:{user_id}")
+            try:
+                await self.backend.delete(f"{kind}:{user_id}")
+            except Exception as e:
+                self._errors += 1
+                print(f"❌ Profile cache delete failed: {e}")
+
+    def discard_local(self, user_id: int) -> None:
+        """Synchronously drop in-process copies (called from the event bus)."""
+        for kind in KINDS:
+            self._mark_changed(f"{kind}:{user_id}")
+            self.backend.discard_local(f"{kind}:{user_id}")
+
+    def _mark_changed(self, key: str) -> None:
+        self._changed_at[key] = self.now()
+        if len(self._changed_at) > self.CHANGED_AT_PRUNE_AT:
+            cutoff = self.now() - self.ttl
+            self._changed_at = {key: stamp for key, stamp in self._changed_at.items() if stamp > cutoff}
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {"backend": self.backend.name, "entries": self.backend.size(), "errors": self._errors}
+        for kind in KINDS:
+            lookups = self._hits[kind] + self._misses[kind]
+            stats[f"{kind}_hits"] = self._hits[kind]
+            stats[f"{kind}_misses"] = self._misses[kind]
+            stats[f"{kind}_hit_rate"] = round(self._hits[kind] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+def _build_backend():
+    if settings.PROFILE_CACHE_BACKEND == "redis":
+        if not settings.PROFILE_CACHE_REDIS_URL:
+            raise RuntimeError("PROFILE_CACHE_BACKEND=redis requires PROFILE_CACHE_REDIS_URL")
+        return RedisCacheBackend(settings.PROFILE_CACHE_REDIS_URL)
+    if settings.PROFILE_CACHE_BACKEND != "memory":
+        raise ValueError(f"Invalid PROFILE_CACHE_BACKEND: {settings.PROFILE_CACHE_BACKEND}")
+    return MemoryCacheBackend(max_size=settings.PROFILE_CACHE_MAX_SIZE)
+
+
+# Per-process instance (the backend itself may be shared)
+profile_cache = ProfileCache(
+    _build_backend(),
+    ttl=settings.PROFILE_CACHE_TTL,
+    enabled=settings.PROFILE_CACHE_ENABLED,
+)
+register_metrics("profile_cache", profile_cache.stats)
+
+
+# ============================================================
+# ✅ Write-Through Helpers
+# ============================================================
+# Entries are {"etag": <strong ETag>, "data": <response payload>}, so a warm
+# cache answers conditional GETs without the database or any serialization.
+# Settings entries also carry the row's "version", so an older one never replaces a newer one.
+async def cache_profile(user) -> Dict[str, Any]:
+    """Store (and return) the profile entry of a freshly loaded or committed user."""
+    entry = {"etag": profile_etag(user), "data": UserResponse.model_validate(user).model_dump(mode="json")}
+    await profile_cache.set(PROFILE, user.id, entry)
+    return entry
+
+
+async def cache_settings(user_id: int, settings_row, checked_at: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Store (and return) the settings entry of a user from their Settings row.
+    Pass `checked_at` (profile_cache.now() before the SELECT) when filling a miss.
+    """
+    entry = {
+        "etag": settings_etag(user_id, settings_row.version),
+        "version": settings_row.version,
+        "data": SettingsRead.model_validate(settings_row).model_dump(mode="json"),
+    }
+    await profile_cache.set(SETTINGS, user_id, entry, checked_at)
+    return entry
@@ -21,6 +21,7 @@ class User(Base):
     verification_code = Column(String, nullable=True)
     role = Column(String, default="user", nullable=False)
     gender = Column(String, default="unset", nullable=False)
+    token_epoch = Column(Integer, default=0, server_default="0", nullable=False)  # Bumped to revoke all access tokens
     
     
     # Optional: Add more fields as needed
@@ -8,6 +8,18 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 
+# Values every new (or reset) settings row starts with
+DEFAULT_SETTINGS = {
+    "display_name": "default display name",
+    "profile_picture": "default profile picture",
+    "cover_picture": "default cover picture",
+    "bio": "default bio",
+    "theme": "light",
+    "notifications": True,
+    "language": "en",
+}
+
+
 # ============================================================
 # ✅ CREATE DEFAULT SETTINGS
 # ============================================================
@@ -18,25 +30,11 @@ async def create_default_settings(user: User, db: AsyncSession) -> SettingsRead:
 
     if existing_settings:
         existing_settings.user_id=user.id
-        existing_settings.display_name="default display name"
-        existing_settings.profile_picture="default profile picture"
-        existing_settings.cover_picture="default cover picture"
-        existing_settings.bio="default bio"
-        existing_settings.theme="light"
-        existing_settings.notifications=True
-        existing_settings.language="en"
+        for field, value in DEFAULT_SETTINGS.items():
+            setattr(existing_settings, field, value)
         return SettingsRead.model_validate(existing_settings)
 
-    new_settings = Settings(
-        user_id=user.id,
-        display_name="default display name",
-        profile_picture="default profile picture",
-        cover_picture="default cover picture",
-        bio="default bio",
-        theme="light",
-        notifications=True,
-        language="en",
-    )
+    new_settings = Settings(user_id=user.id, **DEFAULT_SETTINGS)
 
     db.add(new_settings)
     await db.commit()
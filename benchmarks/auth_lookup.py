@@ -0,0 +1,81 @@
+# benchmarks/auth_lookup.py
+"""
+Auth lookup latency: the former three sequential SELECTs vs load_token_user.
+
+Runs against the database configured in .env (point it at a local Postgres):
+
+    python -m benchmarks.auth_lookup --iterations 2000
+"""
+
+from app.authentication.dependencies import load_token_user
+from app.authentication.models import ActiveToken, BlacklistedToken
+from app.database.connection import AsyncSessionLocal, engine, Base
+from app.authentication.security import hash_jti
+from benchmarks.common import measure, report
+from app.helpers.time import utcnow
+from app.users.models import User
+from sqlalchemy import select, delete, and_
+from datetime import timedelta
+import app.model_registry  # noqa: F401
+import argparse
+import asyncio
+import secrets
+
+
+async def three_queries(db, email: str, token_id: bytes) -> User:
+    """The former sequence: active token, blacklist, then user."""
+    stmt = select(ActiveToken).where(
+        and_(ActiveToken.jti_hash == token_id, ActiveToken.expires_at > utcnow())
+    )
+    assert (await db.execute(stmt)).scalar_one_or_none() is not None
+    stmt = select(BlacklistedToken).where(BlacklistedToken.jti_hash == token_id)
+    assert (await db.execute(stmt)).scalar_one_or_none() is None
+    stmt = select(User).where(User.email == email)
+    return (await db.execute(stmt)).scalar_one()
+
+
+async def main(iterations: int) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    email = f"bench-{secrets.token_hex(6)}@example.com"
+    token_id = hash_jti(secrets.token_urlsafe(16))
+    async with AsyncSessionLocal() as db:
+        user = User(email=email, hashed_password="x")
+        db.add(user)
+        await db.flush()
+        db.add(ActiveToken(
+            jti_hash=token_id,
+            user_id=user.id,
+            token_type="access",
+            expires_at=utcnow() + timedelta(hours=1),
+        ))
+        await db.commit()
+        user_id = user.id
+
+    try:
+        async with AsyncSessionLocal() as db:
+            async def before():
+                db.expunge_all()
+                await three_queries(db, email, token_id)
+
+            async def after():
+                db.expunge_all()
+                lookup = await load_token_user(email, token_id, db)
+                assert lookup.is_active_token and not lookup.is_blacklisted
+
+            report("three SELECTs (before)", await measure(before, iterations))
+            report("load_token_user (after)", await measure(after, iterations))
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(ActiveToken).where(ActiveToken.user_id == user_id))
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
@@ -0,0 +1,94 @@
+# benchmarks/bulk_revocation.py
+"""
+Revoke-all-sessions cost: per-row ORM loop vs set-based blacklist_all_user_tokens.
+
+Runs against the database configured in .env (point it at a local Postgres):
+
+    python -m benchmarks.bulk_revocation --sessions 10 1000 10000
+"""
+
+from app.authentication.models import ActiveToken, BlacklistedToken
+from app.authentication.security import blacklist_all_user_tokens
+from app.database.connection import AsyncSessionLocal, engine, Base
+from app.helpers.time import utcnow
+from app.users.models import User
+from sqlalchemy import select, insert, delete, and_
+from datetime import timedelta
+import app.model_registry  # noqa: F401
+import argparse
+import asyncio
+import secrets
+import time
+
+
+async def orm_loop(user_id: int, db) -> None:
+    """The former implementation: load every token, then add/delete row by row."""
+    stmt = select(ActiveToken).where(
+        and_(ActiveToken.user_id == user_id, ActiveToken.expires_at > utcnow())
+    )
+    for active_token in (await db.execute(stmt)).scalars().all():
+        db.add(BlacklistedToken(
+            jti_hash=active_token.jti_hash,
+            token_type=active_token.token_type,
+            user_id=user_id,
+            expires_at=active_token.expires_at,
+            reason="benchmark",
+        ))
+        await db.delete(active_token)
+    await db.commit()
+
+
+async def seed_user(sessions: int) -> int:
+    """Create a throwaway user holding `sessions` access/refresh token pairs."""
+    async with AsyncSessionLocal() as db:
+        user = User(email=f"bench-{secrets.token_hex(6)}@example.com", hashed_password="x")
+        db.add(user)
+        await db.flush()
+        expires_at = utcnow() + timedelta(hours=1)
+        rows = [
+            {"jti_hash": secrets.token_bytes(16), "user_id": user.id, "token_type": token_type, "expires_at": expires_at}
+            for _ in range(sessions)
+            for token_type in ("access", "refresh")
+        ]
+        for start in range(0, len(rows), 5000):
+            await db.execute(insert(ActiveToken).values(rows[start:start + 5000]))
+        await db.commit()
+        return user.id
+
+
+async def drop_user(user_id: int) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(BlacklistedToken).where(BlacklistedToken.user_id == user_id))
+        await db.execute(delete(ActiveToken).where(ActiveToken.user_id == user_id))
+        await db.execute(delete(User).where(User.id == user_id))
+        await db.commit()
+
+
+async def run(label: str, sessions: int, revoke) -> None:
+    user_id = await seed_user(sessions)
+    try:
+        async with AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            await revoke(user_id, db)
+            elapsed = (time.perf_counter() - start) * 1000
+        print(f"{label:<24} sessions={sessions:<6} {elapsed:10.1f} ms")
+    finally:
+        await drop_user(user_id)
+
+
+async def main(session_counts) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        for sessions in session_counts:
+            await run("ORM loop (before)", sessions, orm_loop)
+            await run("set-based (after)", sessions, lambda user_id, db: blacklist_all_user_tokens(user_id, db, reason="benchmark"))
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 1000, 10000])
+    args = parser.parse_args()
+    asyncio.run(main(args.sessions))
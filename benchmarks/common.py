@@ -0,0 +1,57 @@
+# benchmarks/common.py
+
+from typing import Awaitable, Callable, List
+import statistics
+import time
+
+
+# ============================================================
+# ✅ Percentile
+# ============================================================
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+# ============================================================
+# ✅ Report Latencies
+# ============================================================
+def report(label: str, samples_ms: List[float]) -> None:
+    """Print p50/p99/mean for latency samples given in milliseconds."""
+    print(
+        f"{label:<32} n={len(samples_ms):<6} "
+        f"p50={percentile(samples_ms, 50):8.3f} ms  "
+        f"p99={percentile(samples_ms, 99):8.3f} ms  "
+        f"mean={statistics.fmean(samples_ms):8.3f} ms"
+    )
+
+
+# ============================================================
+# ✅ Time An Async Callable
+# ============================================================
+async def measure(fn: Callable[[], Awaitable[object]], iterations: int, warmup: int = 50) -> List[float]:
+    """Run `fn` repeatedly and return per-call latencies in milliseconds."""
+    for _ in range(warmup):
+        await fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+# ============================================================
+# ✅ Throughput
+# ============================================================
+def throughput(label: str, fn: Callable[[], object], iterations: int) -> float:
+    """Run a sync callable `iterations` times and print operations per second."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    rate = iterations / elapsed
+    print(f"{label:<32} {rate:12,.0f} ops/s  ({elapsed * 1e6 / iterations:8.2f} µs/op)")
+    return rate
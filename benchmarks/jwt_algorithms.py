@@ -0,0 +1,43 @@
+# benchmarks/jwt_algorithms.py
+"""
+JWT sign/verify throughput per algorithm: HS256 (shared secret) vs ES256 and
+RS256 (key ring), with keys parsed once vs parsed on every call.
+
+Pure CPU, no database needed (EdDSA is not available in python-jose):
+
+    python -m benchmarks.jwt_algorithms --iterations 5000
+"""
+
+from app.authentication.keys import generate_private_key_pem
+from benchmarks.common import throughput
+from datetime import timedelta
+from app.helpers.time import utcnow
+from jose import jwk, jwt
+import argparse
+import secrets
+
+CLAIMS = {"sub": "bench@example.com", "user_id": 1, "epoch": 0, "type": "access", "jti": secrets.token_urlsafe(16)}
+
+
+def main(iterations: int) -> None:
+    claims = {**CLAIMS, "exp": utcnow() + timedelta(hours=1)}
+    for algorithm in ("HS256", "ES256", "RS256"):
+        if algorithm == "HS256":
+            signing_material = verify_material = secrets.token_urlsafe(32)
+        else:
+            signing_material = generate_private_key_pem(algorithm).decode()
+            verify_material = jwk.construct(signing_material, algorithm).public_key().to_pem().decode()
+        private, public = jwk.construct(signing_material, algorithm), jwk.construct(verify_material, algorithm)
+        token = jwt.encode(claims, private, algorithm=algorithm)
+
+        throughput(f"{algorithm} sign (parsed key)", lambda: jwt.encode(claims, private, algorithm=algorithm), iterations)
+        throughput(f"{algorithm} verify (parsed key)", lambda: jwt.decode(token, public, algorithms=[algorithm]), iterations)
+        throughput(f"{algorithm} verify (key parsed per call)", lambda: jwt.decode(token, verify_material, algorithms=[algorithm]), iterations)
+        print(f"{algorithm} token size: {len(token)} bytes\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+    main(args.iterations)
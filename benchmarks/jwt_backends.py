@@ -0,0 +1,76 @@
+# benchmarks/jwt_backends.py
+"""
+JWT encode/decode throughput per backend (see app/authentication/jwt_backend.py),
+against the previous decode_token path (jose.jwt.decode on every token), and how
+fast expired or malformed tokens are rejected by the pre-parse.
+
+Pure CPU, no database needed:
+
+    python -m benchmarks.jwt_backends --iterations 5000
+"""
+
+from app.authentication.jwt_backend import JWT_BACKENDS
+from app.authentication.keys import generate_private_key_pem
+from benchmarks.common import throughput
+from datetime import timedelta
+from app.helpers.time import utcnow
+from jose import jwt
+import argparse
+import secrets
+
+CLAIMS = {"sub": "bench@example.com", "user_id": 1, "epoch": 0, "type": "access", "jti": secrets.token_urlsafe(16)}
+
+
+def main(iterations: int, algorithms) -> None:
+    claims = {**CLAIMS, "exp": utcnow() + timedelta(hours=1)}
+    expired_claims = {**CLAIMS, "exp": utcnow() - timedelta(minutes=1)}
+    backends = {name: factory() for name, factory in JWT_BACKENDS.items()}
+
+    for algorithm in algorithms:
+        material = secrets.token_urlsafe(32) if algorithm.startswith("HS") else generate_private_key_pem(algorithm).decode()
+        kid = None if algorithm.startswith("HS") else "bench"
+        headers = {"kid": kid} if kid else None
+        rates = {}
+
+        for name, backend in backends.items():
+            signing_key, verification_key = backend.prepare_keys(algorithm, material)
+            token = backend.encode(claims, signing_key, algorithm, kid)
+
+            def decode():
+                parsed = backend.parse(token, algorithm, require_kid=kid is not None)
+                return backend.verify(parsed, verification_key, algorithm)
+
+            assert decode() is not None
+            rates[f"{name} encode"] = throughput(f"{algorithm} {name} encode", lambda: backend.encode(claims, signing_key, algorithm, kid), iterations)
+            rates[f"{name} decode"] = throughput(f"{algorithm} {name} decode", decode, iterations)
+
+        # The previous decode_token: header + full jose decode, also for tokens that cannot be valid
+        jose_signing, jose_verification = backends["jose"].prepare_keys(algorithm, material)
+        token = jwt.encode(claims, jose_signing, algorithm=algorithm, headers=headers)
+        expired = jwt.encode(expired_claims, jose_signing, algorithm=algorithm, headers=headers)
+        malformed = token[: len(token) // 2]
+
+        def previous_decode(candidate: str):
+            try:
+                jwt.get_unverified_header(candidate)
+                return jwt.decode(candidate, jose_verification, algorithms=[algorithm])
+            except jwt.JWTError:
+                return None
+
+        rates["previous decode"] = throughput(f"{algorithm} previous decode", lambda: previous_decode(token), iterations)
+        throughput(f"{algorithm} previous reject expired", lambda: previous_decode(expired), iterations)
+        throughput(f"{algorithm} pre-parse reject expired", lambda: backends["jose"].parse(expired, algorithm, kid is not None), iterations)
+        throughput(f"{algorithm} previous reject malformed", lambda: previous_decode(malformed), iterations)
+        throughput(f"{algorithm} pre-parse reject malformed", lambda: backends["jose"].parse(malformed, algorithm, kid is not None), iterations)
+
+        for name in backends:
+            print(f"{algorithm} {name}: decode {rates[f'{name} decode'] / rates['previous decode']:.1f}x the previous path")
+        print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--algorithms", nargs="+", default=["HS256", "ES256", "RS256"])
+    args = parser.parse_args()
+    main(args.iterations, args.algorithms)
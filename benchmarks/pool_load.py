@@ -0,0 +1,64 @@
+# benchmarks/pool_load.py
+"""
+Burst load against the connection pool: SQLAlchemy defaults vs the configured pool.
+
+Each simulated request checks out a connection and holds it for one query of
+--hold-ms (pg_sleep), with --concurrency requests in flight at once. Runs
+against the database configured in .env (point it at a local Postgres):
+
+    python -m benchmarks.pool_load --requests 2000 --concurrency 100 --hold-ms 5
+"""
+
+from app.database.connection import DATABASE_URL, engine_options, instrument_engine, InstrumentedAsyncPool
+from sqlalchemy.ext.asyncio import create_async_engine
+from benchmarks.common import report
+from app.core.config import settings
+from sqlalchemy import text
+import argparse
+import asyncio
+import time
+
+
+async def run(label: str, options: dict, requests: int, concurrency: int, hold_ms: float) -> None:
+    engine = create_async_engine(DATABASE_URL, **options)
+    metrics = instrument_engine(engine)
+    gate = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def one_request():
+        async with gate:
+            start = time.perf_counter()
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": hold_ms / 1000})
+            samples.append((time.perf_counter() - start) * 1000)
+
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(one_request() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+    finally:
+        await engine.dispose()
+
+    stats = metrics.stats()
+    report(label, samples)
+    print(
+        f"{'':<32} {requests / elapsed:8.0f} req/s  pool wait p50={stats['wait_ms_p50']} ms "
+        f"p99={stats['wait_ms_p99']} ms max={stats['wait_ms_max']} ms  connects={stats['connects']} timeouts={stats['timeouts']}"
+    )
+
+
+async def main(requests: int, concurrency: int, hold_ms: float) -> None:
+    # pool_timeout raised so the undersized pool queues rather than erroring out
+    defaults = {"poolclass": InstrumentedAsyncPool, "pool_timeout": 300}
+    await run("defaults (5 + 10 overflow)", defaults, requests, concurrency, hold_ms)
+    label = "pgbouncer (NullPool)" if settings.DB_PGBOUNCER else f"configured ({settings.DB_POOL_SIZE} + {settings.DB_MAX_OVERFLOW} overflow)"
+    await run(label, engine_options(), requests, concurrency, hold_ms)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--hold-ms", type=float, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.hold_ms))
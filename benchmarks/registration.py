@@ -0,0 +1,95 @@
+# benchmarks/registration.py
+"""
+Registrations per second: the former multi-commit flow vs register_user.
+
+Password hashing is replaced by a constant so the numbers show database cost
+only (argon2 dominates otherwise; see app/authentication/calibrate.py).
+Runs against the database configured in .env (point it at a local Postgres):
+
+    python -m benchmarks.registration --registrations 500 --concurrency 20
+"""
+
+from app.database.connection import AsyncSessionLocal, engine, Base
+from app.users.services.create_default_settings import create_default_settings
+from app.authentication.models import ActiveToken
+from app.authentication.security import issue_token_pair, generate_verification_code
+from app.user_settings.models import Settings
+from app.users.schemas import UserRegister
+from app.users.models import User
+from sqlalchemy import select, delete
+import app.authentication.services as services
+import app.model_registry  # noqa: F401
+import argparse
+import asyncio
+import secrets
+import time
+
+EMAIL_PREFIX = "bench-reg-"
+
+
+async def register_before(user_data: UserRegister, db) -> None:
+    """The former flow: SELECT, then a commit (and refresh) per step."""
+    stmt = select(User).where(User.email == user_data.email)
+    assert (await db.execute(stmt)).scalar_one_or_none() is None
+    new_user = User(email=user_data.email, hashed_password="x", first_name=user_data.first_name, last_name=user_data.last_name)
+    db.add(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+    await issue_token_pair({"sub": new_user.email, "user_id": new_user.id, "epoch": new_user.token_epoch}, db)
+    await create_default_settings(new_user, db)
+    await db.commit()
+    await db.refresh(new_user)
+    new_user.verification_code = generate_verification_code()
+    await db.commit()
+    await db.refresh(new_user)
+
+
+async def run(label: str, register, registrations: int, concurrency: int) -> None:
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        user_data = UserRegister(
+            email=f"{EMAIL_PREFIX}{secrets.token_hex(8)}@example.com",
+            password="Benchmark-pass1",
+            first_name="Bench",
+            last_name="Mark",
+        )
+        async with gate, AsyncSessionLocal() as db:
+            await register(user_data, db)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(registrations)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {registrations / elapsed:10.1f} registrations/s  ({elapsed * 1000 / registrations:7.2f} ms each)")
+
+
+async def cleanup() -> None:
+    async with AsyncSessionLocal() as db:
+        user_ids = select(User.id).where(User.email.like(f"{EMAIL_PREFIX}%")).scalar_subquery()
+        await db.execute(delete(ActiveToken).where(ActiveToken.user_id.in_(user_ids)))
+        await db.execute(delete(Settings).where(Settings.user_id.in_(user_ids)))
+        await db.execute(delete(User).where(User.email.like(f"{EMAIL_PREFIX}%")))
+        await db.commit()
+
+
+async def main(registrations: int, concurrency: int) -> None:
+    async def fixed_hash(password: str) -> str:
+        return "x"
+
+    services.get_password_hash = fixed_hash
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        await run("multi-commit (before)", register_before, registrations, concurrency)
+        await run("one transaction (after)", services.register_user, registrations, concurrency)
+    finally:
+        await cleanup()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--registrations", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.registrations, args.concurrency))
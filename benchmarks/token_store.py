@@ -0,0 +1,97 @@
+# benchmarks/token_store.py
+"""
+Token store backends: issuing a token pair, checking a token, and revoking all
+of a user's sessions, per backend.
+
+'sql' uses the database configured in .env (point it at a local Postgres),
+'redis' needs --redis-url (and `pip install redis`), 'memory' needs nothing:
+
+    python -m benchmarks.token_store --backends sql memory redis --redis-url redis://localhost:6379/15
+"""
+
+from app.authentication.token_store import SqlTokenStore, KeyValueTokenStore, MemoryKeyValue
+from app.authentication.models import ActiveToken, BlacklistedToken
+from app.database.connection import AsyncSessionLocal, engine, Base
+from app.authentication.security import get_token_expiry, hash_jti
+from benchmarks.common import measure, report
+from app.users.models import User
+from sqlalchemy import delete
+import app.model_registry  # noqa: F401
+import argparse
+import asyncio
+import secrets
+
+
+def build(backend: str, redis_url: str):
+    if backend == "sql":
+        return SqlTokenStore()
+    if backend == "memory":
+        return KeyValueTokenStore(MemoryKeyValue(), name="memory")
+    from redis import asyncio as aioredis
+
+    return KeyValueTokenStore(aioredis.from_url(redis_url, decode_responses=True), name="redis", prefix="bench-tokens:")
+
+
+def token_pair(user_id: int):
+    return [
+        {"jti_hash": hash_jti(secrets.token_urlsafe(16)), "user_id": user_id, "token_type": token_type, "expires_at": get_token_expiry(token_type)}
+        for token_type in ("access", "refresh")
+    ]
+
+
+async def run(backend: str, store, user_id: int, iterations: int, sessions: int) -> None:
+    async with AsyncSessionLocal() as db:
+        issued = []
+
+        async def issue():
+            pair = token_pair(user_id)
+            await store.add_active(db, pair)
+            await db.commit()
+            issued.append(pair[0]["jti_hash"])
+
+        async def check():
+            state = await store.get_state(db, issued[0])
+            assert state.is_active and not state.is_blacklisted
+
+        report(f"{backend}: issue pair", await measure(issue, iterations))
+        report(f"{backend}: check token", await measure(check, iterations))
+
+        async def revoke_all():
+            for _ in range(sessions):
+                await store.add_active(db, token_pair(user_id))
+            await db.commit()
+            await store.revoke_user_tokens(db, user_id, reason="benchmark")
+            await db.commit()
+
+        report(f"{backend}: revoke {sessions} sessions", await measure(revoke_all, max(iterations // 100, 5), warmup=1))
+
+
+async def main(backends, redis_url: str, iterations: int, sessions: int) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as db:
+        user = User(email=f"bench-{secrets.token_hex(6)}@example.com", hashed_password="x")
+        db.add(user)
+        await db.commit()
+        user_id = user.id
+
+    try:
+        for backend in backends:
+            await run(backend, build(backend, redis_url), user_id, iterations, sessions)
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(BlacklistedToken).where(BlacklistedToken.user_id == user_id))
+            await db.execute(delete(ActiveToken).where(ActiveToken.user_id == user_id))
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", choices=["sql", "memory", "redis"], default=["sql", "memory"])
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.backends, args.redis_url, args.iterations, args.sessions))
@@ -0,0 +1,71 @@
+# tests/conftest.py
+"""
+Shared fixtures. Settings are read when app modules are imported, so the
+required ones get placeholder values here first. No test needs Postgres: each
+one gets its own in-memory SQLite database bound to the session factories.
+"""
+
+import os
+
+for name, value in {
+    "DB_USER": "test",
+    "DB_PASSWORD": "test",
+    "DB_NAME": "test",
+    "SECRET_KEY": "test-secret-key",
+    "BASE_URL": "http://testserver",
+    "FRONTEND_URL": "http://frontend.test",
+    "RESEND_API_KEY": "test",
+}.items():
+    os.environ.setdefault(name, value)
+# Nothing may leave the process: no LISTEN connection, no real emails
+os.environ["REVOCATION_BUS_ENABLED"] = "false"
+os.environ["EMAIL_PROVIDER"] = "fake"
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.pool import StaticPool
+import app.database.connection as connection
+import app.model_registry  # noqa: F401 (registers every table on Base.metadata)
+import pytest
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    """Per-process caches start empty, so no test sees another's users or tokens."""
+    from app.authentication.cache import revocation_cache, verified_token_cache
+    from app.users.cache import MemoryCacheBackend, profile_cache
+
+    revocation_cache.clear()
+    verified_token_cache.clear()
+    monkeypatch.setattr(profile_cache, "backend", MemoryCacheBackend(max_size=1000))
+
+
+@pytest.fixture
+async def db_engine(anyio_backend, monkeypatch):
+    """
+    In-memory SQLite with every table, bound to AsyncSessionLocal and
+    ReadOnlySessionLocal for the duration of the test. Postgres-only
+    INSERT ... ON CONFLICT is swapped for SQLite's equivalent.
+    """
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(connection.Base.metadata.create_all)
+
+    import app.authentication.token_store as token_store
+    import app.authentication.services as auth_services
+
+    monkeypatch.setattr(auth_services, "pg_insert", sqlite.insert)
+    monkeypatch.setattr(token_store, "pg_insert", sqlite.insert)
+    connection.AsyncSessionLocal.configure(bind=engine)
+    connection.ReadOnlySessionLocal.configure(bind=engine.execution_options(isolation_level="AUTOCOMMIT"))
+    try:
+        yield engine
+    finally:
+        connection.AsyncSessionLocal.configure(bind=connection.engine)
+        connection.ReadOnlySessionLocal.configure(bind=connection.read_only_engine)
+        await engine.dispose()
@@ -0,0 +1,143 @@
+# tests/test_db_sessions.py
+"""
+The request-scoped session in app/database/connection.py: one pooled
+connection per request however many dependencies ask for a session, and a
+COMMIT only for requests that can write.
+"""
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from httpx import ASGITransport, AsyncClient
+from fastapi import Depends, FastAPI
+from sqlalchemy.pool import StaticPool
+from sqlalchemy import event, text
+import app.database.connection as connection
+import pytest
+import time
+
+pytestmark = pytest.mark.anyio
+
+
+class EngineCounters:
+    """Pool checkouts (via PoolMetrics) and COMMITs seen by one engine."""
+
+    def __init__(self, engine):
+        self.pool = connection.instrument_engine(engine)
+        self.commits = 0
+        event.listen(engine.sync_engine, "commit", self._on_commit)
+
+    def _on_commit(self, conn):
+        self.commits += 1
+
+
+async def nested_user(db=Depends(connection.get_db)):
+    """Stands in for get_current_user: a dependency that itself needs the session."""
+    await db.execute(text("SELECT 1"))
+    return db
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    async def sessions(
+        user_db=Depends(nested_user),
+        db=Depends(connection.get_db),
+        uncached_db=Depends(connection.get_db, use_cache=False),
+        read_db=Depends(connection.get_read_db),
+    ):
+        await db.execute(text("SELECT 2"))
+        return {
+            "same_session": user_db is db is uncached_db is read_db,
+            "replica": connection.is_replica_session(read_db),
+        }
+
+    app.get("/sessions")(sessions)
+    app.post("/sessions")(sessions)
+
+    @app.get("/read")
+    async def read(db=Depends(connection.get_read_db)):
+        await db.execute(text("SELECT 3"))
+        return {"replica": connection.is_replica_session(db)}
+
+    return app
+
+
+@pytest.fixture
+def counters(db_engine):
+    return EngineCounters(db_engine)
+
+
+@pytest.fixture
+async def client():
+    async with AsyncClient(transport=ASGITransport(app=build_app()), base_url="http://testserver") as client:
+        yield client
+
+
+async def test_get_uses_one_connection_and_never_commits(client, counters):
+    response = await client.get("/sessions")
+
+    assert response.json() == {"same_session": True, "replica": False}
+    assert counters.pool.checkouts == 1
+    assert counters.commits == 0
+
+
+async def test_post_uses_one_connection_and_commits_once(client, counters):
+    response = await client.post("/sessions")
+
+    assert response.json() == {"same_session": True, "replica": False}
+    assert counters.pool.checkouts == 1
+    assert counters.commits == 1
+
+
+async def test_each_request_gets_its_own_session(client, counters):
+    await client.get("/sessions")
+    await client.post("/sessions")
+
+    assert counters.pool.checkouts == 2
+    assert counters.commits == 1
+
+
+async def test_get_db_without_request_is_a_plain_committing_session(counters):
+    dependency = connection.get_db()
+    db = await anext(dependency)
+    await db.execute(text("SELECT 1"))
+    await anext(dependency, None)
+
+    assert counters.pool.checkouts == 1
+    assert counters.commits == 1
+
+
+@pytest.fixture
+async def replica(db_engine, monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    factory = async_sessionmaker(engine.execution_options(isolation_level="AUTOCOMMIT"), info={"replica": True})
+    monkeypatch.setattr(connection, "ReplicaSessionLocal", factory)
+    yield EngineCounters(engine)
+    await engine.dispose()
+
+
+async def test_get_read_db_sends_gets_to_the_replica(client, counters, replica):
+    response = await client.get("/read")
+
+    assert response.json() == {"replica": True}
+    assert replica.pool.checkouts == 1
+    assert counters.pool.checkouts == 0
+    assert replica.commits == counters.commits == 0
+
+
+async def test_get_read_db_stays_on_the_primary_after_a_write(client, counters, replica):
+    client.cookies.set(connection.PRIMARY_STICKY_COOKIE, str(time.time() + 60))
+
+    response = await client.get("/read")
+
+    assert response.json() == {"replica": False}
+    assert counters.pool.checkouts == 1
+    assert replica.pool.checkouts == 0
+
+
+async def test_get_read_db_shares_the_primary_session_on_writes(client, counters, replica):
+    response = await client.post("/sessions")
+
+    assert response.json() == {"same_session": True, "replica": False}
+    assert counters.pool.checkouts == 1
+    assert counters.commits == 1
+    assert replica.pool.checkouts == 0
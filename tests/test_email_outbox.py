@@ -0,0 +1,186 @@
+# tests/test_email_outbox.py
+"""
+Outbox delivery (app/emails/outbox.py) with FakeEmailProvider: batching,
+retries with backoff, the attempt cap, and the cleanup of abandoned rows.
+"""
+
+from app.emails.outbox import EmailOutboxWorker, enqueue_email, purge_sent_emails
+from app.database.connection import AsyncSessionLocal
+from app.emails.providers import FakeEmailProvider
+from datetime import datetime, timedelta, timezone
+from app.emails.models import EmailOutbox
+from app.core.config import settings
+from app.helpers.time import utcnow
+from sqlalchemy import insert, select
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 30
+
+
+class RecordingProvider(FakeEmailProvider):
+    """FakeEmailProvider that also remembers the size of every request."""
+
+    def __init__(self, max_batch_size: int):
+        super().__init__(max_batch_size=max_batch_size)
+        self.batches = []
+
+    async def send(self, messages):
+        self.batches.append(len(messages))
+        return await super().send(messages)
+
+
+@pytest.fixture
+def provider():
+    return RecordingProvider(max_batch_size=3)
+
+
+@pytest.fixture
+def worker(db_engine, provider):
+    return EmailOutboxWorker(
+        provider,
+        batch_size=10,
+        concurrency=2,
+        rate_limit=0,
+        poll_interval=1,
+        max_attempts=MAX_ATTEMPTS,
+        retry_backoff=RETRY_BACKOFF,
+        claim_lease=120,
+    )
+
+
+async def enqueue(count: int) -> None:
+    async with AsyncSessionLocal() as db:
+        for i in range(count):
+            await enqueue_email(db, to=f"user{i}@example.com", subject="Subject", html="<p>Hello</p>")
+        await db.commit()
+
+
+async def insert_rows(*rows: dict) -> None:
+    defaults = {"to_address": "user@example.com", "subject": "Subject", "html": "<p>Hello</p>"}
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(EmailOutbox), [{**defaults, **row} for row in rows])
+        await db.commit()
+
+
+async def outbox_rows():
+    async with AsyncSessionLocal() as db:
+        return (await db.scalars(select(EmailOutbox).order_by(EmailOutbox.id))).all()
+
+
+async def make_due() -> None:
+    """Skip the backoff: every pending row becomes due now."""
+    async with AsyncSessionLocal() as db:
+        for row in (await db.scalars(select(EmailOutbox).where(EmailOutbox.status == "pending"))).all():
+            row.next_attempt_at = utcnow()
+        await db.commit()
+
+
+def seconds_until(moment: datetime) -> float:
+    # SQLite hands back naive datetimes; they were stored in UTC
+    return (moment.replace(tzinfo=timezone.utc) - utcnow()).total_seconds()
+
+
+async def test_claimed_rows_are_split_at_max_batch_size(worker, provider):
+    await enqueue(7)
+
+    assert await worker.deliver_once() == 7
+
+    assert sorted(provider.batches) == [1, 3, 3]
+    assert worker.stats()["requests"] == 3
+    rows = await outbox_rows()
+    assert {row.status for row in rows} == {"sent"}
+    assert len({row.provider_message_id for row in rows}) == 7
+    assert all(row.attempts == 1 for row in rows)
+
+
+async def test_claim_takes_at_most_batch_size(worker, provider):
+    await enqueue(12)
+
+    assert await worker.deliver_once() == 10
+    assert await worker.deliver_once() == 2
+    assert await worker.deliver_once() == 0
+    assert len(provider.sent) == 12
+
+
+async def test_failed_batch_is_retried_with_exponential_backoff(worker, provider):
+    await enqueue(1)
+    provider.fail_next = 2
+
+    assert await worker.deliver_once() == 1
+    (row,) = await outbox_rows()
+    assert (row.status, row.attempts, row.last_error) == ("pending", 1, "Fake provider failure")
+    assert RETRY_BACKOFF - 5 < seconds_until(row.next_attempt_at) <= RETRY_BACKOFF
+    assert await worker.deliver_once() == 0  # Not due yet
+
+    await make_due()
+    assert await worker.deliver_once() == 1
+    (row,) = await outbox_rows()
+    assert (row.status, row.attempts) == ("pending", 2)
+    assert 2 * RETRY_BACKOFF - 5 < seconds_until(row.next_attempt_at) <= 2 * RETRY_BACKOFF
+
+    await make_due()
+    assert await worker.deliver_once() == 1
+    (row,) = await outbox_rows()
+    assert (row.status, row.attempts, row.provider_message_id) == ("sent", 3, "fake-1")
+    assert worker.stats()["retried"] == 2
+
+
+async def test_last_failed_attempt_marks_the_row_failed(worker, provider):
+    await enqueue(1)
+    provider.fail_next = MAX_ATTEMPTS
+
+    for _ in range(MAX_ATTEMPTS):
+        await make_due()
+        assert await worker.deliver_once() == 1
+
+    (row,) = await outbox_rows()
+    assert (row.status, row.attempts) == ("failed", MAX_ATTEMPTS)
+    assert provider.sent == []
+
+
+async def test_claim_skips_rows_that_used_up_their_attempts(worker, provider):
+    due = utcnow() - timedelta(seconds=1)
+    await insert_rows(
+        {"to_address": "exhausted@example.com", "attempts": MAX_ATTEMPTS, "next_attempt_at": due},
+        {"to_address": "last-try@example.com", "attempts": MAX_ATTEMPTS - 1, "next_attempt_at": due},
+    )
+
+    assert await worker.deliver_once() == 1
+
+    assert [message["to"] for message in provider.sent] == ["last-try@example.com"]
+    exhausted, last_try = await outbox_rows()
+    assert (exhausted.status, exhausted.attempts) == ("pending", MAX_ATTEMPTS)
+    assert (last_try.status, last_try.attempts) == ("sent", MAX_ATTEMPTS)
+
+
+async def test_purge_fails_exhausted_rows_and_removes_old_sent_ones(db_engine):
+    now = utcnow()
+    max_attempts = settings.EMAIL_MAX_ATTEMPTS
+    await insert_rows(
+        # Lease expired on the last attempt: the worker died before a verdict
+        {"to_address": "abandoned@example.com", "attempts": max_attempts, "next_attempt_at": now - timedelta(seconds=1)},
+        # Last attempt still in flight
+        {"to_address": "in-flight@example.com", "attempts": max_attempts, "next_attempt_at": now + timedelta(minutes=1)},
+        # Will be retried
+        {"to_address": "retry@example.com", "attempts": 1, "next_attempt_at": now - timedelta(seconds=1)},
+        {
+            "to_address": "old@example.com",
+            "status": "sent",
+            "attempts": 1,
+            "sent_at": now - timedelta(days=settings.EMAIL_OUTBOX_RETENTION_DAYS + 1),
+        },
+        {"to_address": "recent@example.com", "status": "sent", "attempts": 1, "sent_at": now},
+    )
+
+    async with AsyncSessionLocal() as db:
+        assert await purge_sent_emails(db) == {"rows_removed": 1, "rows_failed": 1}
+
+    rows = {row.to_address: row for row in await outbox_rows()}
+    assert set(rows) == {"abandoned@example.com", "in-flight@example.com", "retry@example.com", "recent@example.com"}
+    assert rows["abandoned@example.com"].status == "failed"
+    assert rows["abandoned@example.com"].last_error == "Claim lease expired on the last attempt"
+    assert rows["in-flight@example.com"].status == "pending"
+    assert rows["retry@example.com"].status == "pending"
@@ -0,0 +1,81 @@
+# tests/test_jwt_backend.py
+"""
+JWT backends (app/authentication/jwt_backend.py): tokens from one backend
+verify with the other, and the pre-parse rejects what cannot be valid.
+"""
+
+from app.authentication.jwt_backend import JWT_BACKENDS, CryptographyBackend, JoseBackend, JwtBackend
+from app.authentication.keys import generate_private_key_pem
+from datetime import timedelta
+from app.helpers.time import utcnow
+import itertools
+import secrets
+import pytest
+
+ALGORITHMS = ("HS256", "ES256", "RS256")
+
+
+def claims(**overrides):
+    return {"sub": "user@example.com", "user_id": 1, "type": "access", "jti": secrets.token_urlsafe(16),
+            "exp": utcnow() + timedelta(minutes=5), **overrides}
+
+
+@pytest.fixture(scope="module", params=ALGORITHMS)
+def algorithm_material(request):
+    algorithm = request.param
+    material = secrets.token_urlsafe(32) if algorithm == "HS256" else generate_private_key_pem(algorithm).decode()
+    return algorithm, material
+
+
+def test_backend_without_its_primitives_cannot_be_built():
+    class Incomplete(JwtBackend):
+        def prepare_keys(self, algorithm, material):
+            return material, material
+
+    with pytest.raises(TypeError):
+        Incomplete()
+    with pytest.raises(TypeError):
+        JwtBackend()
+
+
+@pytest.mark.parametrize("signer,verifier", list(itertools.product(JWT_BACKENDS, repeat=2)))
+def test_tokens_verify_across_backends(algorithm_material, signer, verifier):
+    algorithm, material = algorithm_material
+    signing = JWT_BACKENDS[signer]()
+    verifying = JWT_BACKENDS[verifier]()
+    kid = None if algorithm == "HS256" else "test-kid"
+    signing_key, _ = signing.prepare_keys(algorithm, material)
+    _, verification_key = verifying.prepare_keys(algorithm, material)
+
+    token = signing.encode(claims(), signing_key, algorithm, kid)
+    parsed = verifying.parse(token, algorithm, require_kid=kid is not None)
+
+    assert parsed is not None and parsed.kid == kid
+    assert verifying.verify(parsed, verification_key, algorithm)["sub"] == "user@example.com"
+
+
+@pytest.mark.parametrize("backend_class", [JoseBackend, CryptographyBackend])
+def test_tampered_signature_is_rejected(backend_class):
+    backend = backend_class()
+    key, _ = backend.prepare_keys("HS256", "secret")
+    _, other_key = backend.prepare_keys("HS256", "other-secret")
+    parsed = backend.parse(backend.encode(claims(), key, "HS256", None), "HS256", require_kid=False)
+
+    assert backend.verify(parsed, other_key, "HS256") is None
+    assert backend.stats()["rejected_signature"] == 1
+
+
+def test_pre_parse_rejects_without_verifying():
+    backend = CryptographyBackend()
+    key, _ = backend.prepare_keys("HS256", "secret")
+    token = backend.encode(claims(), key, "HS256", None)
+    expired = backend.encode(claims(exp=utcnow() - timedelta(seconds=5)), key, "HS256", None)
+
+    assert backend.parse(token[: len(token) // 2], "HS256", require_kid=False) is None
+    assert backend.parse(token, "ES256", require_kid=False) is None  # Other algorithm
+    assert backend.parse(token, "HS256", require_kid=True) is None  # No kid
+    assert backend.parse("x" * 9000, "HS256", require_kid=False) is None
+    assert backend.parse(expired, "HS256", require_kid=False) is None
+
+    stats = backend.stats()
+    assert (stats["rejected_malformed"], stats["rejected_expired"], stats["verified"]) == (4, 1, 0)
@@ -0,0 +1,79 @@
+# tests/test_key_ring.py
+"""
+KeyRing reloads (app/authentication/keys.py): keys deployed, replaced or
+deleted after startup are picked up without a restart.
+"""
+
+from app.authentication.keys import KeyRing, generate_key
+from datetime import timedelta
+from app.helpers.time import utcnow
+import pytest
+import json
+import os
+
+ALGORITHM = "ES256"
+
+
+@pytest.fixture
+def keys_dir(tmp_path):
+    generate_key(tmp_path, ALGORITHM, utcnow() - timedelta(minutes=1))
+    return tmp_path
+
+
+@pytest.fixture
+def ring(keys_dir):
+    ring = KeyRing(ALGORITHM, secret="unused", keys_dir=str(keys_dir))
+    ring.load()
+    return ring
+
+
+def published_kids(ring) -> set:
+    return {key["kid"] for key in json.loads(ring.jwks_json())["keys"]}
+
+
+def test_reload_without_changes_keeps_the_keys(ring):
+    assert ring.reload() is False
+    assert ring.stats()["reloads"] == 1
+
+
+def test_key_deployed_after_startup_is_published_and_signs_once_active(ring, keys_dir):
+    current_kid, _ = ring.signing_key()
+    next_kid = generate_key(keys_dir, ALGORITHM, utcnow() + timedelta(hours=1)).stem
+
+    assert ring.reload() is True
+
+    assert published_kids(ring) == {current_kid, next_kid}
+    assert ring.verification_key(next_kid) is not None
+    assert ring.signing_key()[0] == current_kid  # Not active yet
+
+
+def test_deleted_key_stops_verifying_and_notifies(ring, keys_dir):
+    removed = []
+    ring.on_keys_removed(lambda: removed.append(True))
+    old_kid, _ = ring.signing_key()
+    new_kid = generate_key(keys_dir, ALGORITHM, utcnow() - timedelta(seconds=1)).stem
+    ring.reload()
+    assert removed == []
+
+    (keys_dir / f"{old_kid}.pem").unlink()
+    assert ring.reload() is True
+
+    assert removed == [True]
+    assert ring.verification_key(old_kid) is None
+    assert ring.signing_key()[0] == new_kid
+    assert published_kids(ring) == {new_kid}
+
+
+def test_failed_reload_keeps_the_current_keys(ring, keys_dir):
+    kid, _ = ring.signing_key()
+    broken = keys_dir / f"{(utcnow() + timedelta(hours=1)):%Y%m%d%H%M}-broken.pem"
+    broken.write_text("not a key")
+
+    with pytest.raises(Exception):
+        ring.reload()
+
+    assert ring.signing_key()[0] == kid
+    assert ring.verification_key(kid) is not None
+
+    os.remove(broken)
+    assert ring.reload() is False  # Back to the files that were loaded
@@ -0,0 +1,60 @@
+# tests/test_monitoring.py
+"""The metrics endpoint (app/monitoring/routes.py) is for admins only."""
+
+from app.authentication.cache import revocation_cache
+from app.database.connection import AsyncSessionLocal
+from httpx import ASGITransport, AsyncClient
+from app.users.models import User
+from sqlalchemy import update
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+METRICS = "/api/monitoring/metrics"
+
+
+@pytest.fixture
+async def client(db_engine):
+    from app.main import app
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://testserver", headers={"X-Client-Type": "mobile"}) as client:
+        yield client
+
+
+@pytest.fixture
+async def user(client):
+    response = await client.post(
+        "/api/auth/register",
+        json={"email": "user@example.com", "password": "Passw0rd!x", "first_name": "Test", "last_name": "User"},
+    )
+    assert response.status_code == 201, response.text
+    body = response.json()
+    return {"id": body["user"]["id"], "headers": {"Authorization": f"Bearer {body['access_token']}"}}
+
+
+async def set_role(user_id: int, role: str) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(User).where(User.id == user_id).values(role=role))
+        await db.commit()
+    revocation_cache.invalidate_user(user_id)
+
+
+async def test_anonymous_requests_are_rejected(client):
+    assert (await client.get(METRICS)).status_code == 401
+
+
+async def test_users_without_the_admin_role_get_403(client, user):
+    response = await client.get(METRICS, headers=user["headers"])
+
+    assert response.status_code == 403
+    assert "metrics" not in response.json()
+
+
+async def test_admins_get_the_metrics(client, user):
+    await set_role(user["id"], "admin")
+
+    response = await client.get(METRICS, headers=user["headers"])
+
+    assert response.status_code == 200, response.text
+    assert {"password_hashing", "db_pool", "jwt_keys"} <= set(response.json()["metrics"])
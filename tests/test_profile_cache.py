@@ -0,0 +1,68 @@
+# tests/test_profile_cache.py
+"""
+Filling the profile cache on a miss (app/users/cache.py) must never replace
+what a concurrent writer, an invalidation or a newer version put there.
+"""
+
+from app.users.cache import SETTINGS, MemoryCacheBackend, ProfileCache
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+USER_ID = 1
+
+
+def settings_entry(version: int) -> dict:
+    return {"etag": f'"s{USER_ID}.{version}"', "version": version, "data": {"theme": f"theme-{version}"}}
+
+
+@pytest.fixture
+def cache():
+    return ProfileCache(MemoryCacheBackend(max_size=100), ttl=300)
+
+
+async def cached_version(cache):
+    entry = await cache.get(SETTINGS, USER_ID)
+    return entry and entry["version"]
+
+
+async def test_miss_is_filled(cache):
+    checked_at = cache.now()
+
+    await cache.set(SETTINGS, USER_ID, settings_entry(1), checked_at)
+
+    assert await cached_version(cache) == 1
+
+
+async def test_fill_does_not_replace_a_write_made_during_the_read(cache):
+    checked_at = cache.now()
+    await cache.set(SETTINGS, USER_ID, settings_entry(2))  # Concurrent update_settings
+
+    await cache.set(SETTINGS, USER_ID, settings_entry(1), checked_at)
+
+    assert await cached_version(cache) == 2
+
+
+async def test_fill_is_skipped_after_an_invalidation_during_the_read(cache):
+    checked_at = cache.now()
+    cache.discard_local(USER_ID)  # Another worker's write, reported by the bus
+
+    await cache.set(SETTINGS, USER_ID, settings_entry(1), checked_at)
+
+    assert await cached_version(cache) is None
+
+
+async def test_lagging_read_does_not_replace_a_newer_version(cache):
+    await cache.set(SETTINGS, USER_ID, settings_entry(3))
+
+    # Started after the write-through, but read from a replica still at version 2
+    await cache.set(SETTINGS, USER_ID, settings_entry(2), cache.now())
+
+    assert await cached_version(cache) == 3
+
+
+async def test_out_of_order_write_throughs_keep_the_newest_version(cache):
+    await cache.set(SETTINGS, USER_ID, settings_entry(5))
+    await cache.set(SETTINGS, USER_ID, settings_entry(4))
+
+    assert await cached_version(cache) == 5
@@ -0,0 +1,144 @@
+# tests/test_token_partitions.py
+"""
+Partition maintenance (app/authentication/partitions.py) without Postgres: the
+statements issued to drop expired partitions, and when partitions are created
+on demand.
+"""
+
+from app.authentication import partitions
+from app.core.config import settings
+from contextlib import asynccontextmanager
+from app.helpers.time import utcnow
+from datetime import timedelta
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+class RecordingConnection:
+    """Answers the partition listing with `partitions` and records every statement."""
+
+    def __init__(self, partitions_by_table):
+        self.partitions_by_table = partitions_by_table
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        if sql.startswith("SELECT"):
+            table = params["pattern"].split("\\")[0]
+            return type("Result", (), {"all": lambda _: self.partitions_by_table.get(table, [])})()
+        self.statements.append(sql)
+
+
+class FakeSession:
+    def __init__(self, conn):
+        self.conn = conn
+        self.isolation_levels = []
+        self.bind = self
+
+    def execution_options(self, isolation_level):
+        self.isolation_levels.append(isolation_level)
+        return self
+
+    @asynccontextmanager
+    async def connect(self):
+        yield self.conn
+
+
+@pytest.fixture(autouse=True)
+def daily_partitions(monkeypatch):
+    monkeypatch.setattr(settings, "TOKEN_PARTITION_INTERVAL", "day")
+    monkeypatch.setattr(partitions, "_ready_until", None)
+
+
+def day(offset: int) -> str:
+    return f"{utcnow() + timedelta(days=offset):%Y%m%d}"
+
+
+async def test_expired_partitions_are_detached_concurrently_then_dropped():
+    conn = RecordingConnection({
+        "active_tokens": [
+            (f"active_tokens_p{day(-2)}", True, False, 120),
+            (f"active_tokens_p{day(0)}", True, False, 50),  # Still has live tokens
+            (f"active_tokens_p{day(1)}", True, False, 0),
+        ],
+        "blacklisted_token": [(f"blacklisted_token_p{day(-3)}", True, False, 7)],
+    })
+    db = FakeSession(conn)
+
+    stats = await partitions.drop_expired_token_partitions(db)
+
+    assert db.isolation_levels == ["AUTOCOMMIT"]  # CONCURRENTLY cannot run in a transaction block
+    assert conn.statements == [
+        f"ALTER TABLE active_tokens DETACH PARTITION active_tokens_p{day(-2)} CONCURRENTLY",
+        f"DROP TABLE active_tokens_p{day(-2)}",
+        f"ALTER TABLE blacklisted_token DETACH PARTITION blacklisted_token_p{day(-3)} CONCURRENTLY",
+        f"DROP TABLE blacklisted_token_p{day(-3)}",
+    ]
+    assert stats == {"partitions_dropped": 2, "rows_removed": 127}
+
+
+async def test_interrupted_detaches_are_finished_on_the_next_run():
+    conn = RecordingConnection({
+        "active_tokens": [
+            (f"active_tokens_p{day(-2)}", True, True, 0),  # Detach pending
+            (f"active_tokens_p{day(-3)}", False, False, 0),  # Detached, never dropped
+            ("active_tokens_unpartitioned", False, False, 0),  # Not a partition name
+        ],
+    })
+
+    await partitions.drop_expired_token_partitions(FakeSession(conn))
+
+    assert conn.statements == [
+        f"ALTER TABLE active_tokens DETACH PARTITION active_tokens_p{day(-2)} FINALIZE",
+        f"DROP TABLE active_tokens_p{day(-2)}",
+        f"DROP TABLE active_tokens_p{day(-3)}",
+    ]
+
+
+@pytest.fixture
+def ensure_calls(monkeypatch):
+    """Replaces the catalog work with a counter that covers the usual horizon."""
+    calls = []
+
+    async def ensure_token_partitions(db):
+        calls.append(db)
+        monkeypatch.setattr(partitions, "_ready_until", partitions.partition_horizon())
+        return 1
+
+    @asynccontextmanager
+    async def session():
+        yield "session"
+
+    monkeypatch.setattr(partitions, "ensure_token_partitions", ensure_token_partitions)
+    monkeypatch.setattr(partitions, "AsyncSessionLocal", session)
+    return calls
+
+
+async def test_partitions_are_ensured_once_then_trusted(ensure_calls):
+    soon = utcnow() + timedelta(minutes=15)
+
+    await partitions.ensure_partitions_for([soon])
+    await partitions.ensure_partitions_for([soon, utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRY)])
+
+    assert ensure_calls == ["session"]
+
+
+async def test_rows_past_the_known_range_ensure_again(ensure_calls):
+    await partitions.ensure_partitions_for([utcnow()])
+    await partitions.ensure_partitions_for([partitions.partition_horizon() + timedelta(days=1)])
+
+    assert len(ensure_calls) == 2
+
+
+async def test_failed_ensure_lets_the_insert_go_ahead(monkeypatch):
+    @asynccontextmanager
+    async def broken_session():
+        raise RuntimeError("relation already exists")
+        yield
+
+    monkeypatch.setattr(partitions, "AsyncSessionLocal", broken_session)
+
+    await partitions.ensure_partitions_for([utcnow()])
+
+    assert partitions._ready_until is None  # Checked again on the next insert
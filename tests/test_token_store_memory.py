@@ -0,0 +1,222 @@
+# tests/test_token_store_memory.py
+"""
+The key-value token store (app/authentication/token_store.py) on its
+in-process `memory` client, first through the auth routes, then directly for
+expiry. Before each checked request the per-process caches are cleared, as if
+it had landed on another worker, so only the store can reject a token.
+"""
+
+from app.authentication.token_store import KeyValueTokenStore, MemoryKeyValue
+from app.authentication.cache import revocation_cache, verified_token_cache
+from app.authentication.security import blacklist_all_user_tokens, hash_jti
+from app.authentication import token_store as token_store_module
+from httpx import ASGITransport, AsyncClient
+from app.helpers.time import utcnow
+from datetime import timedelta
+from types import SimpleNamespace
+import pytest
+import time
+
+pytestmark = pytest.mark.anyio
+
+PASSWORD = "Passw0rd!x"
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = KeyValueTokenStore(MemoryKeyValue(), name="memory")
+    for module in (
+        "app.authentication.security",
+        "app.authentication.services",
+        "app.authentication.dependencies",
+        "app.maintenance.jobs",
+    ):
+        monkeypatch.setattr(f"{module}.token_store", store)
+    return store
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Drives MemoryKeyValue expiry without touching the event loop's clock."""
+    clock = SimpleNamespace(offset=0.0)
+    monkeypatch.setattr(
+        token_store_module,
+        "time",
+        SimpleNamespace(monotonic=lambda: time.monotonic() + clock.offset, time=lambda: time.time() + clock.offset),
+    )
+    return clock
+
+
+@pytest.fixture
+async def client(db_engine, store):
+    from app.main import app
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://testserver", headers={"X-Client-Type": "mobile"}) as client:
+        yield client
+
+
+def other_worker() -> None:
+    revocation_cache.clear()
+    verified_token_cache.clear()
+
+
+def bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def register(client, email: str = "user@example.com") -> dict:
+    response = await client.post(
+        "/api/auth/register",
+        json={"email": email, "password": PASSWORD, "first_name": "Test", "last_name": "User"},
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+async def login(client, email: str = "user@example.com") -> dict:
+    response = await client.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def refresh(client, refresh_token: str):
+    other_worker()
+    return await client.post("/api/auth/refresh", headers=bearer(refresh_token))
+
+
+async def fetch_settings(client, access_token: str):
+    other_worker()
+    return await client.get("/api/settings", headers=bearer(access_token))
+
+
+def jti_hash(token: str) -> bytes:
+    from jose import jwt
+
+    return hash_jti(jwt.get_unverified_claims(token)["jti"])
+
+
+# ============================================================
+# ✅ Through the routes
+# ============================================================
+async def test_register_issues_an_active_pair(client, store):
+    tokens = await register(client)
+
+    for token in (tokens["access_token"], tokens["refresh_token"]):
+        state = await store.get_state(None, jti_hash(token))
+        assert state.is_active and not state.is_blacklisted
+    assert await store.client.scard(store._user_key(tokens["user"]["id"])) == 2
+    assert (await fetch_settings(client, tokens["access_token"])).status_code == 200
+
+
+async def test_refresh_rotates_the_pair(client, store):
+    tokens = await register(client)
+
+    response = await refresh(client, tokens["refresh_token"])
+
+    assert response.status_code == 200, response.text
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    assert (await store.get_state(None, jti_hash(tokens["refresh_token"]))).is_blacklisted
+    assert (await store.get_state(None, jti_hash(rotated["refresh_token"]))).is_active
+    assert (await fetch_settings(client, rotated["access_token"])).status_code == 200
+
+
+async def test_replayed_refresh_token_is_rejected(client):
+    tokens = await register(client)
+    assert (await refresh(client, tokens["refresh_token"])).status_code == 200
+
+    response = await refresh(client, tokens["refresh_token"])
+
+    assert response.status_code == 401
+
+
+async def test_logout_revokes_the_access_token(client, store):
+    tokens = await register(client)
+
+    other_worker()
+    response = await client.post("/api/auth/logout", headers=bearer(tokens["access_token"]))
+
+    assert response.status_code == 200, response.text
+    state = await store.get_state(None, jti_hash(tokens["access_token"]))
+    assert not state.is_active and state.is_blacklisted
+    assert (await fetch_settings(client, tokens["access_token"])).status_code == 401
+
+
+async def test_revoke_user_tokens_logs_out_every_device(client, db_engine, store):
+    first = await register(client)
+    second = await login(client)
+    user_id = first["user"]["id"]
+
+    from app.database.connection import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        assert await blacklist_all_user_tokens(user_id, db, reason="password_change") == 4
+
+    assert await store.client.scard(store._user_key(user_id)) == 0
+    for tokens in (first, second):
+        assert (await fetch_settings(client, tokens["access_token"])).status_code == 401
+        assert (await refresh(client, tokens["refresh_token"])).status_code == 401
+
+
+# ============================================================
+# ✅ Expiry
+# ============================================================
+def record(user_id: int, seconds: int, token_type: str = "access") -> dict:
+    return {
+        "jti_hash": hash_jti(f"{user_id}-{seconds}-{time.perf_counter_ns()}"),
+        "token_type": token_type,
+        "user_id": user_id,
+        "expires_at": utcnow() + timedelta(seconds=seconds),
+    }
+
+
+async def test_tokens_expire_with_their_ttl(store, clock):
+    short, long = record(1, 60), record(1, 3600)
+    await store.add_active(None, [short, long])
+
+    clock.offset = 61
+
+    assert not (await store.get_state(None, short["jti_hash"])).is_active
+    assert (await store.get_state(None, long["jti_hash"])).is_active
+
+
+async def test_blacklist_entries_expire_with_the_token(store, clock):
+    revoked = record(1, 60)
+    await store.add_active(None, [revoked])
+    await store.revoke_token(None, revoked["jti_hash"], 1, revoked["expires_at"], reason="logout")
+    assert await store.is_blacklisted(None, revoked["jti_hash"])
+
+    clock.offset = 61
+
+    assert not await store.is_blacklisted(None, revoked["jti_hash"])
+
+
+async def test_already_expired_tokens_are_not_stored(store):
+    await store.add_active(None, [record(1, -1)])
+
+    assert await store.client.scard(store._user_key(1)) == 0
+
+
+async def test_revoke_user_tokens_skips_expired_tokens(store, clock):
+    expiring, live = record(1, 60), record(1, 3600)
+    await store.add_active(None, [expiring, live])
+
+    clock.offset = 61
+
+    assert await store.revoke_user_tokens(None, 1, reason="security_event") == 1
+    assert await store.is_blacklisted(None, live["jti_hash"])
+    assert not await store.is_blacklisted(None, expiring["jti_hash"])
+
+
+async def test_user_index_is_pruned_of_expired_tokens(store, clock, monkeypatch):
+    monkeypatch.setattr(store, "USER_INDEX_PRUNE_AT", 3)
+    expired = [record(1, 60) for _ in range(3)]
+    await store.add_active(None, expired)
+    assert await store.client.scard(store._user_key(1)) == 3
+
+    clock.offset = 61
+    fresh = record(1, 3600)
+    await store.add_active(None, [fresh])
+
+    assert await store.client.smembers(store._user_key(1)) == {fresh["jti_hash"].hex()}